@@ -20,22 +20,46 @@ def create_app(test_config=None):
     
     # Configure the app
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev_health_tracker_key')
-    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URI', 'sqlite:///health_tracker.db')
+    from app.utils import database
+    app.config['SQLALCHEMY_DATABASE_URI'] = database.database_uri()
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['ITEMS_PER_PAGE'] = int(os.environ.get('ITEMS_PER_PAGE', 20))
+    app.config['MAX_ITEMS_PER_PAGE'] = 100
+    app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_CONTENT_LENGTH', 16 * 1024 * 1024))
+    app.config['API_MAX_BATCH'] = int(os.environ.get('API_MAX_BATCH', 5000))
+    database.configure(app)
     
     # Initialize extensions with app
     db.init_app(app)
+    database.init_app(app, db)
     migrate.init_app(app, db)
     login_manager.init_app(app)
     login_manager.login_view = 'auth.login'
     
+    from app.utils import charts, identity, passwords, instrumentation, analytics, archive, fragments, search
+    charts.init_app(app)
+    analytics.init_app(app)
+    archive.init_app(app)
+    fragments.init_app(app)
+    identity.init_app(app)
+    passwords.init_app(app)
+    search.init_app(app)
+    instrumentation.init_app(app, db)
+    
     # Register blueprints
     from app.routes.auth import auth_bp
     from app.routes.main import main_bp
     from app.routes.health import health_bp
+    from app.routes.export import export_bp
+    from app.routes.api import api_bp
     app.register_blueprint(auth_bp)
     app.register_blueprint(main_bp)
     app.register_blueprint(health_bp)
+    app.register_blueprint(export_bp)
+    app.register_blueprint(api_bp)
+    
+    from app.cli import register_commands
+    register_commands(app)
     
     # Create database tables
     with app.app_context():
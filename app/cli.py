@@ -0,0 +1,128 @@
+import click
+from app import db
+from app.models.user import User
+
+def register_commands(app):
+    @app.cli.command('rebuild-summaries')
+    @click.option('--user', 'username', help='Only rebuild this user\'s summaries.')
+    def rebuild_summaries(username):
+        """Recompute the daily summary table from the raw logs."""
+        from app.utils.summary import rebuild_daily_summaries
+        
+        user_ids = None
+        if username:
+            user = User.query.filter_by(username=username).first()
+            if user is None:
+                raise click.ClickException(f'No user named {username!r}')
+            user_ids = [user.id]
+        
+        written = rebuild_daily_summaries(user_ids)
+        click.echo(f'Wrote {written} daily summary rows.')
+        
+        # Goal progress is derived from the summaries, so bring it up to date too
+        from app.utils.goals import evaluate_goals
+        achieved = 0
+        for user_id in user_ids or [user_id for (user_id,) in db.session.query(User.id)]:
+            achieved += len(evaluate_goals(user_id))
+            db.session.commit()
+        click.echo(f'Evaluated active goals; {achieved} newly achieved.')
+    
+    @app.cli.command('rebuild-search-index')
+    @click.option('--user', 'username', help='Only reindex this user\'s logs.')
+    def rebuild_search_index_command(username):
+        """Recreate the full-text search entries from the raw logs."""
+        from app.models.search import SearchEntry
+        from app.utils.search import rebuild_search_index
+        
+        query = db.session.query(User.id).order_by(User.id)
+        if username:
+            query = query.filter(User.username == username)
+            if query.first() is None:
+                raise click.ClickException(f'No user named {username!r}')
+        rebuild_search_index([user_id for (user_id,) in query])
+        click.echo(f'Search index holds {SearchEntry.query.count()} entries.')
+    
+    @app.cli.command('archive-logs')
+    @click.option('--days', type=int, help='Archive logs older than this (default ARCHIVE_AFTER_DAYS).')
+    @click.option('--user', 'username', help='Only archive this user\'s logs.')
+    @click.option('--kind', type=click.Choice(['weight', 'nutrition', 'workout', 'sleep']), multiple=True)
+    def archive_logs_command(days, username, kind):
+        """Move old logs out of the database into per-user, per-year column files."""
+        from app.utils.archive import MIN_ARCHIVE_DAYS, MODELS, archive_user_logs, cutoff
+        
+        days = app.config['ARCHIVE_AFTER_DAYS'] if days is None else days
+        if days < MIN_ARCHIVE_DAYS:
+            raise click.ClickException(f'--days must be at least {MIN_ARCHIVE_DAYS}')
+        
+        query = db.session.query(User.id).order_by(User.id)
+        if username:
+            query = query.filter(User.username == username)
+            if query.first() is None:
+                raise click.ClickException(f'No user named {username!r}')
+        
+        moved = 0
+        for user_id in [user_id for (user_id,) in query]:
+            for name in kind or MODELS:
+                before = cutoff(user_id, name, days)
+                if before is not None:
+                    moved += archive_user_logs(user_id, name, before)
+        click.echo(f'Archived {moved} log rows older than {days} days to {app.config["ARCHIVE_DIR"]}.')
+    
+    @app.cli.command('population-stats')
+    @click.option('--workers', type=int, help='Worker processes (default: one per CPU).')
+    @click.option('--chunk-size', default=500, show_default=True, help='Users per worker task.')
+    @click.option('--full', is_flag=True, help='Recompute every user, not only those whose logs changed.')
+    def population_stats(workers, chunk_size, full):
+        """Recompute statistics across all users into the population_stats table."""
+        from app.utils.population import refresh_population_stats
+        
+        run = refresh_population_stats(workers=workers, chunk_size=chunk_size, full=full)
+        for metric, bucket, value, count in run.stats:
+            shown = '-' if value is None else f'{value:.1f}'
+            click.echo(f'{metric:24} {bucket:12} {shown:>8}  (n={count})')
+        rate = run.processed / run.seconds if run.seconds else 0
+        click.echo(f'Processed {run.processed} of {run.users} users in {run.seconds:.2f}s '
+                   f'({rate:.0f} users/s, {run.workers} workers); dropped {run.removed} stale rows.')
+    
+    @app.cli.command('import-logs')
+    @click.argument('username')
+    @click.argument('log_type', type=click.Choice(['weight', 'nutrition', 'workout', 'sleep']))
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--format', 'fmt', type=click.Choice(['csv', 'json', 'ndjson']), help='Defaults to the file extension.')
+    @click.option('--batch-size', default=1000, show_default=True)
+    def import_logs_command(username, log_type, path, fmt, batch_size):
+        """Bulk import historical logs from a CSV, JSON or NDJSON file."""
+        import time
+        from app.utils.importer import import_logs, detect_format
+        
+        user = User.query.filter_by(username=username).first()
+        if user is None:
+            raise click.ClickException(f'No user named {username!r}')
+        
+        started = time.perf_counter()
+        with open(path, 'rb') as stream:
+            try:
+                result = import_logs(user.id, log_type, stream, fmt or detect_format(path), batch_size=batch_size)
+            except ValueError as exc:
+                db.session.rollback()
+                raise click.ClickException(str(exc))
+        elapsed = time.perf_counter() - started
+        
+        for record, message in result.errors:
+            click.echo(f'record {record}: {message}', err=True)
+        if result.error_count > len(result.errors):
+            click.echo(f'... and {result.error_count - len(result.errors)} more errors', err=True)
+        click.echo(f'Imported {result.imported} rows in {elapsed:.2f}s '
+                   f'({result.imported / elapsed if elapsed else 0:.0f} rows/s), skipped {result.error_count}.')
+    
+    @app.cli.command('purge-idempotency-keys')
+    @click.option('--days', default=7, show_default=True, help='Keep keys newer than this.')
+    def purge_idempotency_keys(days):
+        """Delete API idempotency keys older than the retry window."""
+        from datetime import datetime, timedelta
+        from app.models.idempotency import IdempotencyKey
+        
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        deleted = IdempotencyKey.query.filter(IdempotencyKey.created_at < cutoff).delete()
+        db.session.commit()
+        click.echo(f'Deleted {deleted} idempotency keys.')
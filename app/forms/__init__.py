@@ -1,2 +1,2 @@
-from app.forms.auth import LoginForm, RegistrationForm, ProfileForm
-from app.forms.health import WeightLogForm, NutritionLogForm, WorkoutLogForm, SleepLogForm, GoalForm 
\ No newline at end of file
+from app.forms.auth import LoginForm, RegistrationForm, ProfileForm, ChangePasswordForm
+from app.forms.health import WeightLogForm, NutritionLogForm, WorkoutLogForm, SleepLogForm, GoalForm, ImportForm 
\ No newline at end of file
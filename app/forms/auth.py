@@ -38,4 +38,10 @@ class ProfileForm(FlaskForm):
         ('prefer-not-to-say', 'Prefer not to say')
     ], validators=[Optional()])
     height = FloatField('Height (cm)', validators=[Optional(), NumberRange(min=30, max=300)])
-    submit = SubmitField('Update Profile') 
\ No newline at end of file
+    submit = SubmitField('Update Profile')
+
+class ChangePasswordForm(FlaskForm):
+    current_password = PasswordField('Current Password', validators=[DataRequired()])
+    new_password = PasswordField('New Password', validators=[DataRequired(), Length(min=8)])
+    confirm_password = PasswordField('Confirm New Password', validators=[DataRequired(), EqualTo('new_password')])
+    submit = SubmitField('Change Password')
@@ -1,4 +1,5 @@
 from flask_wtf import FlaskForm
+from flask_wtf.file import FileField, FileRequired, FileAllowed
 from wtforms import StringField, TextAreaField, FloatField, IntegerField, SelectField, DateField, SubmitField, BooleanField
 from wtforms.validators import DataRequired, Optional, NumberRange, Length
 from datetime import datetime
@@ -51,4 +52,17 @@ class GoalForm(FlaskForm):
     target_value = FloatField('Target Value', validators=[DataRequired()])
     target_date = DateField('Target Date', validators=[DataRequired()])
     description = TextAreaField('Description', validators=[DataRequired(), Length(max=500)])
-    submit = SubmitField('Set Goal') 
\ No newline at end of file
+    submit = SubmitField('Set Goal')
+
+class ImportForm(FlaskForm):
+    log_type = SelectField('Log Type', choices=[
+        ('weight', 'Weight'),
+        ('nutrition', 'Nutrition'),
+        ('workout', 'Workouts'),
+        ('sleep', 'Sleep')
+    ], validators=[DataRequired()])
+    file = FileField('File', validators=[
+        FileRequired(),
+        FileAllowed(['csv', 'json', 'jsonl', 'ndjson'], 'Upload a CSV, JSON or NDJSON file')
+    ])
+    submit = SubmitField('Import')
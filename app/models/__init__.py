@@ -1,2 +1,8 @@
 from app.models.user import User
-from app.models.health import WeightLog, NutritionLog, WorkoutLog, SleepLog, Goal 
\ No newline at end of file
+from app.models.health import WeightLog, NutritionLog, WorkoutLog, SleepLog, Goal
+from app.models.summary import DailySummary
+from app.models.idempotency import IdempotencyKey
+from app.models.search import SearchEntry
+from app.models.population import UserStats, PopulationStat
+from app.models.version import DataVersion
+from app.models.archive import ArchiveRun
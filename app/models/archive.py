@@ -0,0 +1,17 @@
+from app import db
+from datetime import datetime
+
+# One row per committed `flask archive-logs` run for a user and kind, inserted in
+# the same transaction that deletes the moved logs. The run's new archive files
+# carry its token and only become visible once this row exists.
+class ArchiveRun(db.Model):
+    __tablename__ = 'archive_runs'
+    
+    token = db.Column(db.String(32), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    kind = db.Column(db.String(20), nullable=False)
+    rows = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<ArchiveRun: user {self.user_id} {self.kind} {self.token}>'
@@ -3,6 +3,9 @@ from datetime import datetime
 
 class WeightLog(db.Model):
     __tablename__ = 'weight_logs'
+    __table_args__ = (
+        db.Index('ix_weight_logs_user_id_date', 'user_id', 'date'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -15,6 +18,9 @@ class WeightLog(db.Model):
 
 class NutritionLog(db.Model):
     __tablename__ = 'nutrition_logs'
+    __table_args__ = (
+        db.Index('ix_nutrition_logs_user_id_date', 'user_id', 'date'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -32,6 +38,9 @@ class NutritionLog(db.Model):
 
 class WorkoutLog(db.Model):
     __tablename__ = 'workout_logs'
+    __table_args__ = (
+        db.Index('ix_workout_logs_user_id_date', 'user_id', 'date'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -47,6 +56,9 @@ class WorkoutLog(db.Model):
 
 class SleepLog(db.Model):
     __tablename__ = 'sleep_logs'
+    __table_args__ = (
+        db.Index('ix_sleep_logs_user_id_date', 'user_id', 'date'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -60,6 +72,9 @@ class SleepLog(db.Model):
 
 class Goal(db.Model):
     __tablename__ = 'goals'
+    __table_args__ = (
+        db.Index('ix_goals_user_id_achieved_target_date', 'user_id', 'achieved', 'target_date'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -71,5 +86,11 @@ class Goal(db.Model):
     achieved_date = db.Column(db.DateTime)
     description = db.Column(db.Text)
     
+    # Cached by app.utils.goals whenever logs of this goal's type change
+    start_value = db.Column(db.Float)
+    current_value = db.Column(db.Float)
+    progress = db.Column(db.Float)  # percent of the way to target_value, 0-100
+    evaluated_at = db.Column(db.DateTime)
+    
     def __repr__(self):
         return f'<Goal: {self.goal_type} - {self.description}>' 
\ No newline at end of file
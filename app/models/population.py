@@ -0,0 +1,37 @@
+from app import db
+from datetime import datetime
+
+# Per-user figures behind the population statistics, written by app.utils.population.
+# summary_days and summary_updated_at fingerprint the user's daily summaries when
+# the row was computed, so a run only recomputes users whose summaries changed.
+class UserStats(db.Model):
+    __tablename__ = 'user_stats'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    latest_weight = db.Column(db.Float)  # in kg
+    bmi = db.Column(db.Float)
+    avg_sleep_hours = db.Column(db.Float)  # per logged night
+    weekly_workout_minutes = db.Column(db.Float)  # over the span of logged days
+    summary_days = db.Column(db.Integer, nullable=False)
+    summary_updated_at = db.Column(db.DateTime, nullable=False)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<UserStats: user {self.user_id}>'
+
+# One figure across all users, e.g. ('bmi', 'p50') or ('goal_achievement', 'sleep')
+class PopulationStat(db.Model):
+    __tablename__ = 'population_stats'
+    __table_args__ = (
+        db.UniqueConstraint('metric', 'bucket', name='uq_population_stats_metric_bucket'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    metric = db.Column(db.String(50), nullable=False)
+    bucket = db.Column(db.String(50), nullable=False)
+    value = db.Column(db.Float)
+    count = db.Column(db.Integer, nullable=False)  # users (or goals) the value covers
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<PopulationStat: {self.metric} {self.bucket}>'
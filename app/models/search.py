@@ -0,0 +1,48 @@
+from sqlalchemy import DDL, event
+from app import db
+
+# Free text of one log, kept in step with the logs by app.utils.search. The
+# full-text index itself is dialect specific and created with the table below.
+class SearchEntry(db.Model):
+    __tablename__ = 'search_entries'
+    __table_args__ = (
+        db.Index('ix_search_entries_user_id_kind_day', 'user_id', 'kind', 'day'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    kind = db.Column(db.String(20), nullable=False)  # weight, nutrition, workout, sleep
+    log_id = db.Column(db.Integer, nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    
+    def __repr__(self):
+        return f'<SearchEntry: {self.kind} {self.log_id}>'
+
+# External-content FTS5 table: the text lives once, in search_entries. user_id
+# and kind are indexed as tokens so queries can filter on them inside the index.
+SQLITE_FTS = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_entries_fts USING fts5("
+    "user_id, kind, body, content='search_entries', content_rowid='id', "
+    "tokenize='porter unicode61', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS search_entries_ai AFTER INSERT ON search_entries BEGIN "
+    "INSERT INTO search_entries_fts(rowid, user_id, kind, body) VALUES (new.id, new.user_id, new.kind, new.body); END",
+    "CREATE TRIGGER IF NOT EXISTS search_entries_ad AFTER DELETE ON search_entries BEGIN "
+    "INSERT INTO search_entries_fts(search_entries_fts, rowid, user_id, kind, body) "
+    "VALUES ('delete', old.id, old.user_id, old.kind, old.body); END",
+]
+
+POSTGRESQL_FTS = [
+    # btree_gin lets one GIN index cover the user filter and the text match
+    "CREATE EXTENSION IF NOT EXISTS btree_gin",
+    "ALTER TABLE search_entries ADD COLUMN IF NOT EXISTS document tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('english', body)) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_search_entries_user_id_document ON search_entries USING gin (user_id, document)",
+]
+
+for statement in SQLITE_FTS:
+    event.listen(SearchEntry.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+for statement in POSTGRESQL_FTS:
+    event.listen(SearchEntry.__table__, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+event.listen(SearchEntry.__table__, 'before_drop',
+             DDL('DROP TABLE IF EXISTS search_entries_fts').execute_if(dialect='sqlite'))
@@ -0,0 +1,30 @@
+from app import db
+from datetime import datetime
+
+class DailySummary(db.Model):
+    __tablename__ = 'daily_summaries'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'day', name='uq_daily_summaries_user_id_day'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    # Nutrition totals; NULL when nothing was logged that day
+    calories = db.Column(db.Integer)
+    protein = db.Column(db.Float)  # in grams
+    carbs = db.Column(db.Float)    # in grams
+    fat = db.Column(db.Float)      # in grams
+    # Workout totals
+    workout_minutes = db.Column(db.Integer)
+    calories_burned = db.Column(db.Integer)
+    distance = db.Column(db.Float)  # in km
+    # Sleep
+    sleep_hours = db.Column(db.Float)
+    avg_sleep_quality = db.Column(db.Float)
+    # Weight of the latest weight log that day
+    last_weight = db.Column(db.Float)  # in kg
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<DailySummary: user {self.user_id} on {self.day.strftime("%Y-%m-%d")}>'
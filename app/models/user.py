@@ -1,6 +1,6 @@
 from app import db, login_manager
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.utils.passwords import get_hasher
 from datetime import datetime
 
 class User(UserMixin, db.Model):
@@ -24,32 +24,30 @@ class User(UserMixin, db.Model):
     sleep_logs = db.relationship('SleepLog', backref='user', lazy='dynamic', cascade='all, delete-orphan')
     goals = db.relationship('Goal', backref='user', lazy='dynamic', cascade='all, delete-orphan')
     
+    # Both may raise HasherBusy when the hashing pool is saturated
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = get_hasher().hash(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return get_hasher().verify(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        return get_hasher().needs_rehash(self.password_hash)
     
     def get_latest_weight(self):
-        latest_weight = self.weight_logs.order_by(WeightLog.date.desc()).first()
-        return latest_weight.weight if latest_weight else None
+        from app.utils.dashboard import load_recent
+        latest = load_recent(self.id, ('recent_weight',))['recent_weight']
+        return latest.weight if latest else None
     
     def get_bmi(self):
-        if not self.height or self.height <= 0:
-            return None
-        
-        latest_weight = self.get_latest_weight()
-        if not latest_weight:
-            return None
-        
-        # BMI = weight(kg) / (height(m))^2
-        height_in_meters = self.height / 100
-        bmi = latest_weight / (height_in_meters * height_in_meters)
-        return round(bmi, 1)
+        from app.utils.dashboard import load_bmi
+        return load_bmi(self)
     
     def __repr__(self):
         return f'<User {self.username}>'
 
 @login_manager.user_loader
 def load_user(id):
-    return User.query.get(int(id)) 
\ No newline at end of file
+    # Served from the identity cache, so most requests skip the users query
+    from app.utils.identity import load_identity
+    return load_identity(int(id)) 
\ No newline at end of file
@@ -0,0 +1,16 @@
+from app import db
+from datetime import datetime
+
+# A counter per user and data set ('weight', 'nutrition', 'workout', 'sleep',
+# 'goals'), advanced by every write to it. Cached renderings include the version
+# in their key, so a write makes them unreachable in every process at once.
+class DataVersion(db.Model):
+    __tablename__ = 'data_versions'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    kind = db.Column(db.String(20), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=1)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<DataVersion: user {self.user_id} {self.kind} v{self.version}>'
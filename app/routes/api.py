@@ -0,0 +1,196 @@
+from flask import Blueprint, request, jsonify, abort, current_app
+from flask_login import current_user
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.health import Goal
+from app.models.idempotency import IdempotencyKey
+from app.forms.health import GoalForm
+from app.utils.analytics import get_trends
+from app.utils.archive import archived_logs
+from app.utils.export import export_columns, plain_value
+from app.utils.goals import evaluate_goals
+from app.utils.hooks import logs_changed
+from app.utils.importer import LOG_TYPES, field_rules, clean_record
+from app.utils.pagination import keyset_paginate, get_page_size
+from app.utils.versions import bump_versions
+from app.utils.search import SOURCES as SEARCH_KINDS, search as search_logs, plain, highlight
+from functools import wraps
+import hashlib
+import json
+
+api_bp = Blueprint('api', __name__, url_prefix='/api/v1')
+
+# Resource name -> (model, form whose validators define accepted values)
+RESOURCES = dict(LOG_TYPES, goals=(Goal, GoalForm))
+
+def _error(status, message, **extra):
+    response = jsonify(error=message, **extra)
+    response.status_code = status
+    return response
+
+def api_login_required(view):
+    # Clients get a JSON 401 instead of the HTML login redirect
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        if not current_user.is_authenticated:
+            return _error(401, 'authentication required')
+        return view(*args, **kwargs)
+    return wrapped
+
+def _resource(kind):
+    if kind not in RESOURCES:
+        abort(_error(404, f'unknown resource {kind!r}'))
+    return RESOURCES[kind][0]
+
+def _serialize(kind, row):
+    return {column.name: plain_value(getattr(row, column.name)) for column in export_columns(kind)}
+
+@api_bp.route('/analytics/trends', methods=['GET'])
+@api_login_required
+def trends():
+    days = request.args.get('days', 90, type=int)
+    return jsonify(get_trends(current_user.id).as_dict(days=max(days, 1)))
+
+@api_bp.route('/search', methods=['GET'])
+@api_login_required
+def search():
+    query = request.args.get('q', '').strip()
+    kind = request.args.get('kind')
+    if not query:
+        return _error(400, 'q is required')
+    if kind is not None and kind not in SEARCH_KINDS:
+        return _error(400, f'unknown kind {kind!r}')
+    
+    page_number = max(1, request.args.get('page', 1, type=int))
+    page = search_logs(current_user.id, query, kind=kind, page=page_number, per_page=get_page_size())
+    items = [
+        dict(kind=result.kind, id=result.log_id, day=result.day.isoformat(), score=result.score,
+             snippet=plain(result.snippet), snippet_html=str(highlight(result.snippet)))
+        for result in page.items
+    ]
+    return jsonify(items=items, page=page.page, next_page=page.page + 1 if page.has_next else None)
+
+@api_bp.route('/<kind>', methods=['GET'])
+@api_login_required
+def list_entries(kind):
+    model = _resource(kind)
+    query = model.query.filter_by(user_id=current_user.id)
+    
+    if kind == 'goals':
+        goals = query.order_by(Goal.achieved, Goal.target_date).all()
+        return jsonify(items=[_serialize(kind, goal) for goal in goals])
+    
+    page = keyset_paginate(
+        query, model,
+        after=request.args.get('after'),
+        before=request.args.get('before'),
+        per_page=get_page_size(),
+        archive=archived_logs(current_user.id, kind)
+    )
+    return jsonify(
+        items=[_serialize(kind, row) for row in page.items],
+        next=page.next_cursor,
+        prev=page.prev_cursor
+    )
+
+@api_bp.route('/<kind>', methods=['POST'])
+@api_login_required
+def create_entries(kind):
+    """Insert one entry or an array of entries in a single transaction.
+
+    Send an ``Idempotency-Key`` header to make retries safe: a repeated key
+    with the same body replays the original response instead of inserting
+    again. Either every entry is stored or, on validation errors, none are.
+    """
+    model = _resource(kind)
+    body = request.get_data()
+    key = request.headers.get('Idempotency-Key', '').strip()[:255]
+    request_hash = hashlib.sha256(request.method.encode() + request.path.encode() + body).hexdigest()
+    
+    if key:
+        replay = _replay(key, request_hash)
+        if replay is not None:
+            return replay
+    
+    # Requiring a JSON content type also keeps plain cross-site form posts out
+    if not request.is_json:
+        return _error(415, 'expected an application/json body')
+    payload = request.get_json(silent=True)
+    if payload is None:
+        return _error(400, 'malformed JSON body')
+    entries = payload if isinstance(payload, list) else [payload]
+    if not entries:
+        return _error(400, 'no entries given')
+    if len(entries) > current_app.config['API_MAX_BATCH']:
+        return _error(413, f'at most {current_app.config["API_MAX_BATCH"]} entries per request')
+    
+    rules = field_rules(RESOURCES[kind][1])
+    rows, errors = [], []
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            errors.append({'index': index, 'message': 'expected an object'})
+            continue
+        row, problems = clean_record(rules, entry)
+        if problems:
+            errors.append({'index': index, 'message': '; '.join(problems)})
+        row['user_id'] = current_user.id
+        rows.append(row)
+    if errors:
+        return _error(422, 'invalid entries', errors=errors)
+    
+    ids = db.session.execute(insert(model).returning(model.id, sort_by_parameter_order=True), rows).scalars().all()
+    if kind != 'goals':
+        logs_changed(current_user.id, kind, [row['date'] for row in rows])
+    else:
+        evaluate_goals(current_user.id, {row['goal_type'] for row in rows})
+    
+    status, response_body = 201, json.dumps({'ids': ids}, separators=(',', ':'))
+    if key:
+        # Stored in the same transaction, so the key exists if and only if the rows do
+        db.session.add(IdempotencyKey(
+            user_id=current_user.id,
+            key=key,
+            request_hash=request_hash,
+            status_code=status,
+            response_body=response_body
+        ))
+    
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent retry with the same key won the race
+        db.session.rollback()
+        replay = _replay(key, request_hash) if key else None
+        if replay is None:
+            raise
+        return replay
+    
+    return current_app.response_class(response_body, status=status, mimetype='application/json')
+
+def _replay(key, request_hash):
+    stored = IdempotencyKey.query.filter_by(user_id=current_user.id, key=key).first()
+    if stored is None:
+        return None
+    if stored.request_hash != request_hash:
+        return _error(422, 'idempotency key was already used for a different request')
+    
+    response = current_app.response_class(stored.response_body, status=stored.status_code, mimetype='application/json')
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+@api_bp.route('/<kind>/<int:entry_id>', methods=['DELETE'])
+@api_login_required
+def delete_entry(kind, entry_id):
+    model = _resource(kind)
+    entry = model.query.filter_by(id=entry_id, user_id=current_user.id).first()
+    if entry is None:
+        return _error(404, 'not found')
+    
+    db.session.delete(entry)
+    if kind != 'goals':
+        logs_changed(current_user.id, kind, [entry.date])
+    else:
+        bump_versions(current_user.id, 'goals')
+    db.session.commit()
+    return '', 204
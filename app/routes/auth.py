@@ -2,7 +2,11 @@ from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_user, logout_user, current_user, login_required
 from app import db
 from app.models.user import User
-from app.forms.auth import LoginForm, RegistrationForm, ProfileForm
+from app.forms.auth import LoginForm, RegistrationForm, ProfileForm, ChangePasswordForm
+from app.utils.identity import invalidate_identity
+from app.utils.passwords import HasherBusy
+
+BUSY_MESSAGE = 'We are handling a lot of sign-ins right now. Please try again in a moment.'
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/auth')
 
@@ -14,10 +18,25 @@ def login():
     form = LoginForm()
     if form.validate_on_submit():
         user = User.query.filter_by(username=form.username.data).first()
-        if user is None or not user.check_password(form.password.data):
+        try:
+            valid = user is not None and user.check_password(form.password.data)
+        except HasherBusy:
+            flash(BUSY_MESSAGE, 'warning')
+            return render_template('auth/login.html', form=form), 503
+        
+        if not valid:
             flash('Invalid username or password', 'danger')
             return render_template('auth/login.html', form=form)
         
+        # Upgrade hashes made with older cost settings while we have the plain password;
+        # when the hasher is busy the upgrade waits for a later login
+        if user.password_needs_rehash():
+            try:
+                user.set_password(form.password.data)
+                db.session.commit()
+            except HasherBusy:
+                pass
+        
         login_user(user, remember=form.remember_me.data)
         next_page = request.args.get('next')
         
@@ -43,7 +62,11 @@ def register():
     form = RegistrationForm()
     if form.validate_on_submit():
         user = User(username=form.username.data, email=form.email.data)
-        user.set_password(form.password.data)
+        try:
+            user.set_password(form.password.data)
+        except HasherBusy:
+            flash(BUSY_MESSAGE, 'warning')
+            return render_template('auth/register.html', form=form), 503
         
         db.session.add(user)
         db.session.commit()
@@ -73,7 +96,29 @@ def profile():
         current_user.height = form.height.data
         
         db.session.commit()
+        invalidate_identity(current_user.id)
         flash('Profile updated successfully!', 'success')
         return redirect(url_for('main.dashboard'))
     
-    return render_template('auth/profile.html', form=form) 
\ No newline at end of file
+    return render_template('auth/profile.html', form=form)
+
+@auth_bp.route('/change-password', methods=['GET', 'POST'])
+@login_required
+def change_password():
+    form = ChangePasswordForm()
+    
+    if form.validate_on_submit():
+        try:
+            if not current_user.check_password(form.current_password.data):
+                flash('Current password is incorrect', 'danger')
+                return render_template('auth/change_password.html', form=form)
+            current_user.set_password(form.new_password.data)
+        except HasherBusy:
+            flash(BUSY_MESSAGE, 'warning')
+            return render_template('auth/change_password.html', form=form), 503
+        
+        db.session.commit()
+        flash('Your password has been changed.', 'success')
+        return redirect(url_for('main.dashboard'))
+    
+    return render_template('auth/change_password.html', form=form)
@@ -0,0 +1,41 @@
+from flask import Blueprint, render_template, request, abort, Response, stream_with_context
+from flask_login import current_user, login_required
+from app.utils.export import EXPORTS, FORMATS, iter_export, iter_zip_archive, gzip_chunks
+from datetime import datetime
+
+export_bp = Blueprint('export', __name__, url_prefix='/export')
+
+def _download(chunks, filename, mimetype):
+    # stream_with_context keeps the request (and its DB session) alive while streaming
+    response = Response(stream_with_context(chunks), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['X-Accel-Buffering'] = 'no'  # let proxies pass chunks straight through
+    response.cache_control.no_store = True
+    return response
+
+@export_bp.route('/')
+@login_required
+def index():
+    return render_template('export/index.html', kinds=list(EXPORTS), formats=list(FORMATS))
+
+@export_bp.route('/<kind>.<fmt>')
+@login_required
+def download(kind, fmt):
+    if kind not in EXPORTS or fmt not in FORMATS:
+        abort(404)
+    
+    filename = f'{kind}-{datetime.utcnow():%Y%m%d}.{fmt}'
+    chunks = iter_export(current_user.id, kind, fmt)
+    if request.args.get('gzip', type=int):
+        return _download(gzip_chunks(chunks), filename + '.gz', 'application/gzip')
+    return _download(chunks, filename, FORMATS[fmt])
+
+@export_bp.route('/all.zip')
+@login_required
+def archive():
+    fmt = request.args.get('format', 'csv')
+    if fmt not in FORMATS:
+        abort(404)
+    
+    filename = f'health-tracker-{current_user.username}-{datetime.utcnow():%Y%m%d}.zip'
+    return _download(iter_zip_archive(current_user.id, fmt), filename, 'application/zip')
@@ -2,12 +2,30 @@ from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import current_user, login_required
 from app import db
 from app.models.health import WeightLog, NutritionLog, WorkoutLog, SleepLog, Goal
-from app.forms.health import WeightLogForm, NutritionLogForm, WorkoutLogForm, SleepLogForm, GoalForm
+from app.forms.health import WeightLogForm, NutritionLogForm, WorkoutLogForm, SleepLogForm, GoalForm, ImportForm
 from datetime import datetime, timedelta
 from sqlalchemy import func
+from app.utils.hooks import logs_changed
+from app.utils.goals import evaluate_goals
+from app.utils.importer import import_logs, detect_format
+from app.utils.pagination import keyset_paginate, get_page_size
+from app.utils.aggregates import daily_nutrition, days_ago
+from app.utils.archive import archived_logs
+from app.utils.search import SOURCES as SEARCH_KINDS, search as search_logs, highlight
+from app.utils.versions import bump_versions, data_versions
 
 health_bp = Blueprint('health', __name__, url_prefix='/health')
 
+def _history_page(model, kind):
+    return keyset_paginate(
+        model.query.filter_by(user_id=current_user.id),
+        model,
+        after=request.args.get('after'),
+        before=request.args.get('before'),
+        per_page=get_page_size(),
+        archive=archived_logs(current_user.id, kind)
+    )
+
 # Weight tracking routes
 @health_bp.route('/weight', methods=['GET', 'POST'])
 @login_required
@@ -23,6 +41,7 @@ def weight():
         )
         
         db.session.add(weight_log)
+        logs_changed(current_user.id, 'weight', [weight_log.date])
         db.session.commit()
         
         flash('Weight log added successfully!', 'success')
@@ -33,8 +52,24 @@ def weight():
 @health_bp.route('/weight/history')
 @login_required
 def weight_history():
-    logs = WeightLog.query.filter_by(user_id=current_user.id).order_by(WeightLog.date.desc()).all()
-    return render_template('health/weight_history.html', logs=logs)
+    page = _history_page(WeightLog, 'weight')
+    
+    # The summary spans all logs, not just the current page
+    summary = None
+    if page.items:
+        user_logs = WeightLog.query.filter_by(user_id=current_user.id)
+        latest = user_logs.order_by(WeightLog.date.desc(), WeightLog.id.desc()).first()
+        earliest = user_logs.order_by(WeightLog.date.asc(), WeightLog.id.asc()).first()
+        # Archiving keeps the newest log live, but it may have been deleted since
+        archive = archived_logs(current_user.id, 'weight')
+        if archive is not None:
+            earliest = archive.oldest() or earliest
+            latest = latest or archive.older(None, 1)[0]
+        if latest.id != earliest.id:
+            summary = {'current': latest, 'start': earliest}
+    
+    return render_template('health/weight_history.html', page=page, logs=page.items,
+                          versions=data_versions(current_user.id, ['weight']), summary=summary)
 
 @health_bp.route('/weight/<int:log_id>/delete', methods=['POST'])
 @login_required
@@ -46,6 +81,7 @@ def delete_weight(log_id):
         return redirect(url_for('health.weight_history'))
     
     db.session.delete(log)
+    logs_changed(current_user.id, 'weight', [log.date])
     db.session.commit()
     
     flash('Weight log deleted.', 'success')
@@ -71,6 +107,7 @@ def nutrition():
         )
         
         db.session.add(nutrition_log)
+        logs_changed(current_user.id, 'nutrition', [nutrition_log.date])
         db.session.commit()
         
         flash('Nutrition log added successfully!', 'success')
@@ -81,40 +118,13 @@ def nutrition():
 @health_bp.route('/nutrition/history')
 @login_required
 def nutrition_history():
-    logs = NutritionLog.query.filter_by(user_id=current_user.id).order_by(NutritionLog.date.desc()).all()
+    page = _history_page(NutritionLog, 'nutrition')
     
-    # Calculate daily averages for the last 7 days
-    seven_days_ago = datetime.utcnow().date() - timedelta(days=7)
-    recent_logs = NutritionLog.query.filter(
-        NutritionLog.user_id == current_user.id,
-        NutritionLog.date >= seven_days_ago
-    ).all()
-    
-    daily_averages = {
-        'calories': 0,
-        'protein': 0,
-        'carbs': 0,
-        'fat': 0
-    }
+    # Daily averages for the last 7 days, counting each calendar day once
+    _, daily_averages = daily_nutrition(current_user.id, days_ago(7))
     
-    if recent_logs:
-        total_calories = sum(log.calories or 0 for log in recent_logs)
-        total_protein = sum(log.protein or 0 for log in recent_logs)
-        total_carbs = sum(log.carbs or 0 for log in recent_logs)
-        total_fat = sum(log.fat or 0 for log in recent_logs)
-        
-        # Group by date to count unique days
-        unique_dates = set(log.date for log in recent_logs)
-        num_days = len(unique_dates) or 1  # Avoid division by zero
-        
-        daily_averages = {
-            'calories': total_calories / num_days,
-            'protein': total_protein / num_days,
-            'carbs': total_carbs / num_days,
-            'fat': total_fat / num_days
-        }
-    
-    return render_template('health/nutrition_history.html', logs=logs, daily_averages=daily_averages)
+    return render_template('health/nutrition_history.html', page=page, logs=page.items,
+                          versions=data_versions(current_user.id, ['nutrition']), daily_averages=daily_averages)
 
 @health_bp.route('/nutrition/<int:log_id>/delete', methods=['POST'])
 @login_required
@@ -126,6 +136,7 @@ def delete_nutrition(log_id):
         return redirect(url_for('health.nutrition_history'))
     
     db.session.delete(log)
+    logs_changed(current_user.id, 'nutrition', [log.date])
     db.session.commit()
     
     flash('Nutrition log deleted.', 'success')
@@ -149,6 +160,7 @@ def workout():
         )
         
         db.session.add(workout_log)
+        logs_changed(current_user.id, 'workout', [workout_log.date])
         db.session.commit()
         
         flash('Workout log added successfully!', 'success')
@@ -159,8 +171,24 @@ def workout():
 @health_bp.route('/workout/history')
 @login_required
 def workout_history():
-    logs = WorkoutLog.query.filter_by(user_id=current_user.id).order_by(WorkoutLog.date.desc()).all()
-    return render_template('health/workout_history.html', logs=logs)
+    page = _history_page(WorkoutLog, 'workout')
+    
+    month_start = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    count, total_minutes = db.session.query(
+        func.count(WorkoutLog.id),
+        func.coalesce(func.sum(WorkoutLog.duration), 0)
+    ).filter(
+        WorkoutLog.user_id == current_user.id,
+        WorkoutLog.date >= month_start
+    ).one()
+    summary = {
+        'count': count,
+        'total_minutes': total_minutes,
+        'avg_minutes': total_minutes / count if count else 0
+    }
+    
+    return render_template('health/workout_history.html', page=page, logs=page.items,
+                          versions=data_versions(current_user.id, ['workout']), summary=summary)
 
 @health_bp.route('/workout/<int:log_id>/delete', methods=['POST'])
 @login_required
@@ -172,6 +200,7 @@ def delete_workout(log_id):
         return redirect(url_for('health.workout_history'))
     
     db.session.delete(log)
+    logs_changed(current_user.id, 'workout', [log.date])
     db.session.commit()
     
     flash('Workout log deleted.', 'success')
@@ -193,6 +222,7 @@ def sleep():
         )
         
         db.session.add(sleep_log)
+        logs_changed(current_user.id, 'sleep', [sleep_log.date])
         db.session.commit()
         
         flash('Sleep log added successfully!', 'success')
@@ -203,8 +233,20 @@ def sleep():
 @health_bp.route('/sleep/history')
 @login_required
 def sleep_history():
-    logs = SleepLog.query.filter_by(user_id=current_user.id).order_by(SleepLog.date.desc()).all()
-    return render_template('health/sleep_history.html', logs=logs)
+    page = _history_page(SleepLog, 'sleep')
+    
+    seven_days_ago = datetime.utcnow().date() - timedelta(days=7)
+    avg_hours, avg_quality = db.session.query(
+        func.avg(SleepLog.hours),
+        func.avg(SleepLog.quality)
+    ).filter(
+        SleepLog.user_id == current_user.id,
+        SleepLog.date >= seven_days_ago
+    ).one()
+    summary = {'avg_hours': avg_hours, 'avg_quality': avg_quality}
+    
+    return render_template('health/sleep_history.html', page=page, logs=page.items,
+                          versions=data_versions(current_user.id, ['sleep']), summary=summary)
 
 @health_bp.route('/sleep/<int:log_id>/delete', methods=['POST'])
 @login_required
@@ -216,6 +258,7 @@ def delete_sleep(log_id):
         return redirect(url_for('health.sleep_history'))
     
     db.session.delete(log)
+    logs_changed(current_user.id, 'sleep', [log.date])
     db.session.commit()
     
     flash('Sleep log deleted.', 'success')
@@ -237,6 +280,8 @@ def goals():
         )
         
         db.session.add(goal)
+        db.session.flush()
+        evaluate_goals(current_user.id, [goal.goal_type])
         db.session.commit()
         
         flash('Goal added successfully!', 'success')
@@ -250,7 +295,8 @@ def goals_list():
     active_goals = Goal.query.filter_by(user_id=current_user.id, achieved=False).order_by(Goal.target_date).all()
     achieved_goals = Goal.query.filter_by(user_id=current_user.id, achieved=True).order_by(Goal.achieved_date.desc()).all()
     
-    return render_template('health/goals_list.html', active_goals=active_goals, achieved_goals=achieved_goals)
+    return render_template('health/goals_list.html', active_goals=active_goals, achieved_goals=achieved_goals,
+                          today=datetime.utcnow().date())
 
 @health_bp.route('/goals/<int:goal_id>/mark-achieved', methods=['POST'])
 @login_required
@@ -263,6 +309,7 @@ def mark_goal_achieved(goal_id):
     
     goal.achieved = True
     goal.achieved_date = datetime.utcnow()
+    bump_versions(current_user.id, 'goals')
     
     db.session.commit()
     
@@ -279,7 +326,39 @@ def delete_goal(goal_id):
         return redirect(url_for('health.goals_list'))
     
     db.session.delete(goal)
+    bump_versions(current_user.id, 'goals')
     db.session.commit()
     
     flash('Goal deleted.', 'success')
-    return redirect(url_for('health.goals_list')) 
\ No newline at end of file
+    return redirect(url_for('health.goals_list'))
+
+# Bulk import
+@health_bp.route('/import', methods=['GET', 'POST'])
+@login_required
+def import_data():
+    form = ImportForm()
+    result = None
+    
+    if form.validate_on_submit():
+        upload = form.file.data
+        try:
+            result = import_logs(current_user.id, form.log_type.data, upload.stream, detect_format(upload.filename))
+        except ValueError as exc:
+            db.session.rollback()
+            flash(f'Could not read the file: {exc}', 'danger')
+        else:
+            flash(f'Imported {result.imported} {form.log_type.data} logs '
+                  f'({result.error_count} rows skipped).', 'success' if not result.error_count else 'warning')
+    
+    return render_template('health/import_form.html', form=form, result=result)
+
+# Full-text search over log text
+@health_bp.route('/search')
+@login_required
+def search():
+    query = request.args.get('q', '').strip()
+    kind = request.args.get('kind') if request.args.get('kind') in SEARCH_KINDS else None
+    page_number = max(1, request.args.get('page', 1, type=int))
+    page = search_logs(current_user.id, query, kind=kind, page=page_number, per_page=get_page_size()) if query else None
+    return render_template('health/search.html', query=query, kind=kind, kinds=SEARCH_KINDS, page=page,
+                           highlight=highlight)
@@ -1,14 +1,10 @@
-from flask import Blueprint, render_template, redirect, url_for
+from flask import Blueprint, render_template, redirect, url_for, request, abort, make_response, jsonify
 from flask_login import current_user, login_required
-from app import db
-from app.models.health import WeightLog, NutritionLog, WorkoutLog, SleepLog, Goal
-import matplotlib.pyplot as plt
-import numpy as np
-import pandas as pd
-import os
-import base64
-from io import BytesIO
-from datetime import datetime, timedelta
+from app.utils.charts import (CHARTS, RANGES, PLACEHOLDER_SVG, ChartUnavailable, resolve_range, chart_version,
+                              chart_etag, get_chart, get_chart_data)
+from app.utils.dashboard import PANELS, panel_etag, load_recent, load_bmi, load_active_goals
+from app.utils.versions import data_versions
+from functools import partial
 
 main_bp = Blueprint('main', __name__)
 
@@ -22,81 +18,100 @@ def index():
 @main_bp.route('/dashboard')
 @login_required
 def dashboard():
-    # Get recent data
-    recent_weight = WeightLog.query.filter_by(user_id=current_user.id).order_by(WeightLog.date.desc()).first()
-    recent_workout = WorkoutLog.query.filter_by(user_id=current_user.id).order_by(WorkoutLog.date.desc()).first()
-    recent_sleep = SleepLog.query.filter_by(user_id=current_user.id).order_by(SleepLog.date.desc()).first()
-    
-    # Get goals that are not yet achieved
-    active_goals = Goal.query.filter_by(user_id=current_user.id, achieved=False).order_by(Goal.target_date).all()
-    
-    # Generate weight chart for the last 30 days
-    weight_data = WeightLog.query.filter(
-        WeightLog.user_id == current_user.id,
-        WeightLog.date >= (datetime.utcnow() - timedelta(days=30))
-    ).order_by(WeightLog.date).all()
-    
-    weight_chart = None
-    if weight_data:
-        dates = [log.date for log in weight_data]
-        weights = [log.weight for log in weight_data]
-        
-        plt.figure(figsize=(10, 4))
-        plt.plot(dates, weights, 'b-o')
-        plt.title('Weight Over Last 30 Days')
-        plt.xlabel('Date')
-        plt.ylabel('Weight (kg)')
-        plt.grid(True)
-        
-        # Save plot to a BytesIO object
-        buf = BytesIO()
-        plt.savefig(buf, format='png')
-        buf.seek(0)
-        plt.close()
-        
-        # Encode the image to embed in HTML
-        weight_chart = base64.b64encode(buf.getbuffer()).decode('utf-8')
-    
-    # Generate nutrition summary for the last 7 days
-    nutrition_data = NutritionLog.query.filter(
-        NutritionLog.user_id == current_user.id,
-        NutritionLog.date >= (datetime.utcnow() - timedelta(days=7))
-    ).all()
+    # Only the shell renders here; the page fetches each panel from its own endpoint in parallel
+    # ?weight_range=1y etc. pick each chart's range independently
+    ranges = {kind: resolve_range(kind, request.args.get(f'{kind}_range')) or CHARTS[kind].range for kind in CHARTS}
+    return render_template('dashboard.html', charts=ranges)
+
+def _panel(template, etag, load):
+    # Unchanged data versions mean an unchanged panel, so answer revalidations without loading anything
+    if request.if_none_match.contains(etag):
+        return _revalidate(make_response('', 304), etag)
+    return _revalidate(make_response(render_template(f'dashboard/{template}.html', **load())), etag)
+
+def _versioned_panel(name, *parts, load):
+    versions = data_versions(current_user.id, PANELS[name])
+    etag = panel_etag(current_user.id, name, *versions.values(), *parts)
+    return _panel(name, etag, lambda: load(versions))
+
+@main_bp.route('/dashboard/panels/recent')
+@login_required
+def recent_panel():
+    return _versioned_panel('recent', load=lambda versions: load_recent(current_user.id))
+
+@main_bp.route('/dashboard/panels/bmi')
+@login_required
+def bmi_panel():
+    # Height lives on the user, not in a versioned data set
+    return _versioned_panel('bmi', current_user.height, load=lambda versions: dict(bmi=load_bmi(current_user)))
+
+@main_bp.route('/dashboard/panels/goals')
+@login_required
+def goals_panel():
+    # The goals are only queried when the cached table fragment misses
+    return _versioned_panel('goals', load=lambda versions: dict(
+        versions=versions, load_goals=partial(load_active_goals, current_user.id)
+    ))
+
+@main_bp.route('/dashboard/panels/charts/<kind>')
+@login_required
+def chart_panel(kind):
+    range_name = resolve_range(kind, request.args.get('range')) if kind in CHARTS else None
+    if range_name is None:
+        abort(404)
+    # The panel only says whether there is data to plot; main.chart serves the image
+    version = chart_version(current_user.id, kind, range_name)
+    etag = panel_etag(current_user.id, 'chart', kind, range_name, version)
+    return _panel('chart', etag, lambda: dict(
+        kind=kind, chart_range=range_name, has_data=version is not None, ranges=RANGES
+    ))
+
+def _chart_request(kind, fmt):
+    # Resolve ?range= and the data version, or 404 when there is nothing to show
+    range_name = resolve_range(kind, request.args.get('range')) if kind in CHARTS else None
+    if range_name is None:
+        abort(404)
+    version = chart_version(current_user.id, kind, range_name)
+    if version is None:
+        abort(404)
+    return range_name, version, chart_etag(current_user.id, kind, version, fmt)
+
+def _revalidate(response, etag):
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+@main_bp.route('/charts/<kind>.png')
+@login_required
+def chart(kind):
+    range_name, version, etag = _chart_request(kind, 'png')
     
-    nutrition_chart = None
-    if nutrition_data:
-        # Group by date and sum calories
-        df = pd.DataFrame([{
-            'date': log.date.date(),
-            'calories': log.calories or 0
-        } for log in nutrition_data])
-        
-        daily_calories = df.groupby('date')['calories'].sum().reset_index()
-        
-        plt.figure(figsize=(10, 4))
-        plt.bar(daily_calories['date'], daily_calories['calories'], width=0.5, color='green')
-        plt.title('Daily Calorie Intake (Last 7 Days)')
-        plt.xlabel('Date')
-        plt.ylabel('Calories')
-        plt.grid(True, axis='y')
+    # Unchanged data means an unchanged image, so answer revalidations without rendering
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    else:
+        try:
+            png = get_chart(current_user.id, kind, version, range_name)
+        except ChartUnavailable:
+            # Degrade to a placeholder the browser must not cache
+            response = make_response(PLACEHOLDER_SVG)
+            response.mimetype = 'image/svg+xml'
+            response.cache_control.no_store = True
+            return response
         
-        # Save plot to a BytesIO object
-        buf = BytesIO()
-        plt.savefig(buf, format='png')
-        buf.seek(0)
-        plt.close()
-        
-        # Encode the image to embed in HTML
-        nutrition_chart = base64.b64encode(buf.getbuffer()).decode('utf-8')
+        response = make_response(png)
+        response.mimetype = 'image/png'
     
-    return render_template('dashboard.html',
-                          recent_weight=recent_weight,
-                          recent_workout=recent_workout,
-                          recent_sleep=recent_sleep,
-                          active_goals=active_goals,
-                          weight_chart=weight_chart,
-                          nutrition_chart=nutrition_chart,
-                          bmi=current_user.get_bmi())
+    return _revalidate(response, etag)
+
+@main_bp.route('/charts/<kind>.json')
+@login_required
+def chart_data(kind):
+    range_name, version, etag = _chart_request(kind, 'json')
+    if request.if_none_match.contains(etag):
+        return _revalidate(make_response('', 304), etag)
+    return _revalidate(jsonify(get_chart_data(current_user.id, kind, version, range_name)), etag)
 
 @main_bp.route('/about')
 def about():
@@ -0,0 +1,44 @@
+from sqlalchemy import func
+from app import db
+from app.models.summary import DailySummary
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+
+NUTRIENTS = ('calories', 'protein', 'carbs', 'fat')
+
+DailyNutrition = namedtuple('DailyNutrition', ('day',) + NUTRIENTS)
+
+def as_date(value):
+    # SQLite's date() returns 'YYYY-MM-DD' strings, PostgreSQL returns dates
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+def days_ago(days):
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    return today - timedelta(days=days)
+
+def daily_nutrition(user_id, since):
+    """Return (daily totals, averages per logged day) for days on or after ``since``.
+
+    Reads the daily summary table, so the cost is one row per day however many
+    meals were logged. The averages are window aggregates over the same rows
+    and come back in the same query.
+    """
+    totals = [getattr(DailySummary, name) for name in NUTRIENTS]
+    averages = [func.avg(total).over() for total in totals]
+
+    rows = db.session.query(DailySummary.day, *totals, *averages).filter(
+        DailySummary.user_id == user_id,
+        DailySummary.day >= as_date(since),
+        DailySummary.calories.isnot(None)
+    ).order_by(DailySummary.day).all()
+
+    daily = [DailyNutrition(*row[:len(NUTRIENTS) + 1]) for row in rows]
+    if rows:
+        daily_averages = dict(zip(NUTRIENTS, (float(value) for value in rows[0][len(NUTRIENTS) + 1:])))
+    else:
+        daily_averages = dict.fromkeys(NUTRIENTS, 0)
+    return daily, daily_averages
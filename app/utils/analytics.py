@@ -0,0 +1,237 @@
+from flask import current_app
+from sqlalchemy import func, select
+from app import db
+from app.models.health import Goal
+from app.models.summary import DailySummary
+from app.utils.aggregates import as_date
+from app.utils.cache import LRUCache
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+# Share of each day's weight that moves the smoothed trend (Hacker's Diet style)
+TREND_ALPHA = 0.1
+ROLLING_WINDOWS = (7, 30)
+# Week-over-week deltas reported per series
+WEEKLY_DELTAS = 12
+# The goal projection fits a line through the weigh-ins of this many recent days
+PROJECTION_DAYS = 28
+# Projected reach dates further out than this are reported as never reached
+MAX_PROJECTION_DAYS = 5 * 365
+# Days per block of the vectorised EWMA, small enough that (1 - alpha) ** -block stays finite
+EWMA_BLOCK = 128
+
+# Series -> DailySummary column. Days without a row are gaps (NaN), except for
+# workouts where a day without one simply had 0 minutes.
+SERIES = {
+    'weight': 'last_weight',
+    'calories': 'calories',
+    'sleep_hours': 'sleep_hours',
+    'workout_minutes': 'workout_minutes',
+}
+ZERO_FILLED = ('workout_minutes',)
+
+@dataclass(frozen=True)
+class Trends:
+    # First day of the daily grid; every array holds one value per day up to today
+    start: Optional[date]
+    series: dict = field(default_factory=dict)
+    latest: dict = field(default_factory=dict)
+    weekly: dict = field(default_factory=dict)
+    projection: Optional[dict] = None
+
+    def as_dict(self, days=None):
+        """JSON-ready copy with the daily series cut to the last ``days`` days."""
+        length = len(next(iter(self.series.values()), ()))
+        offset = max(0, length - days) if days else 0
+        return dict(
+            start=self.start and (self.start + timedelta(days=offset)).isoformat(),
+            series={name: _plain_list(values[offset:]) for name, values in self.series.items()},
+            latest={name: _plain(value) for name, value in self.latest.items()},
+            weekly={name: _plain_list(values) for name, values in self.weekly.items()},
+            projection=self.projection,
+        )
+
+def init_app(app):
+    app.config.setdefault('ANALYTICS_CACHE_SIZE', 256)
+    app.extensions['analytics_cache'] = LRUCache(maxsize=app.config['ANALYTICS_CACHE_SIZE'])
+
+def _cache():
+    return current_app.extensions['analytics_cache']
+
+def _plain(value):
+    value = float(value)
+    return None if value != value else round(value, 2)
+
+def _plain_list(values):
+    return [None if value != value else value for value in values.round(2).tolist()]
+
+def data_version(user_id):
+    """Return a token that changes whenever any of the user's daily summaries does."""
+    count, updated_at = db.session.query(func.count(DailySummary.id), func.max(DailySummary.updated_at)).filter(
+        DailySummary.user_id == user_id
+    ).one()
+    return f'{count}-{updated_at:%Y%m%d%H%M%S%f}' if count else '0'
+
+def active_weight_goal(user_id):
+    # The open weight goal due soonest is the one the projection aims at
+    return db.session.execute(
+        select(Goal.id, Goal.target_value, Goal.target_date).where(
+            Goal.user_id == user_id,
+            Goal.goal_type == 'weight',
+            Goal.achieved.is_(False),
+            Goal.target_date.isnot(None)
+        ).order_by(Goal.target_date).limit(1)
+    ).first()
+
+def get_trends(user_id):
+    """Return the user's Trends, memoised per data version and active weight goal.
+
+    Costs two small queries when cached; otherwise one more that reads the
+    user's summary rows as plain tuples straight into NumPy arrays.
+    """
+    today = datetime.utcnow().date()
+    goal = active_weight_goal(user_id)
+    key = (user_id, today, data_version(user_id), tuple(goal) if goal else None)
+    cache = _cache()
+    trends = cache.get(key)
+    if trends is None:
+        # Older versions can never be requested again
+        invalidate_analytics(user_id)
+        trends = compute_trends(load_series(user_id, today), today, goal)
+        cache.set(key, trends)
+    return trends
+
+def invalidate_analytics(user_id):
+    _cache().discard_where(lambda key: key[0] == user_id)
+
+def load_series(user_id, today):
+    """Return (first day, {series: array}) on a daily grid from the first summary to ``today``."""
+    import numpy as np
+
+    columns = [getattr(DailySummary, column) for column in SERIES.values()]
+    rows = db.session.execute(
+        select(DailySummary.day, *columns).where(DailySummary.user_id == user_id).order_by(DailySummary.day)
+    ).all()
+    if not rows:
+        return None, {name: np.empty(0) for name in SERIES}
+
+    days, *values = zip(*rows)
+    ordinals = np.fromiter((as_date(day).toordinal() for day in days), dtype=np.int64, count=len(days))
+    start = int(ordinals[0])
+    index = ordinals - start
+    length = max(int(index[-1]), today.toordinal() - start) + 1
+
+    series = {}
+    for name, column in zip(SERIES, values):
+        grid = np.zeros(length) if name in ZERO_FILLED else np.full(length, np.nan)
+        # None becomes NaN in a float array
+        grid[index] = np.array(column, dtype=float)
+        if name in ZERO_FILLED:
+            grid[np.isnan(grid)] = 0.0
+        series[name] = grid
+    return date.fromordinal(start), series
+
+def ewma(values, alpha=TREND_ALPHA):
+    """Exponentially weighted moving average of a gap-free series, started at its first value.
+
+    The recurrence y[i] = (1 - alpha) * y[i - 1] + alpha * x[i] is unrolled
+    per block into a cumulative sum scaled by powers of (1 - alpha), so only
+    one Python iteration runs per EWMA_BLOCK days.
+    """
+    import numpy as np
+
+    decay = 1.0 - alpha
+    steps = np.arange(EWMA_BLOCK)
+    forward, backward = decay ** steps, decay ** -steps
+    result = np.empty(len(values))
+    level = values[0] if len(values) else 0.0
+    for begin in range(0, len(values), EWMA_BLOCK):
+        block = values[begin:begin + EWMA_BLOCK]
+        size = len(block)
+        result[begin:begin + size] = forward[:size] * (
+            decay * level + alpha * np.cumsum(block * backward[:size])
+        )
+        level = result[begin + size - 1]
+    return result
+
+def rolling_mean(values, window):
+    """Mean of the non-NaN values in each trailing ``window``-day window (NaN when there are none)."""
+    import numpy as np
+
+    present = ~np.isnan(values)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(present, values, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(present)))
+    upper = np.arange(1, len(values) + 1)
+    lower = np.maximum(upper - window, 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (sums[upper] - sums[lower]) / (counts[upper] - counts[lower])
+
+def weight_trend(weights):
+    """Smoothed weight per day; NaN before the first weigh-in, gaps interpolated linearly."""
+    import numpy as np
+
+    trend = np.full(len(weights), np.nan)
+    measured = np.flatnonzero(~np.isnan(weights))
+    if len(measured):
+        first = measured[0]
+        filled = np.interp(np.arange(first, len(weights)), measured, weights[measured])
+        trend[first:] = ewma(filled)
+    return trend
+
+def weekly_deltas(values, weeks=WEEKLY_DELTAS):
+    # Differences between the values at successive 7-day steps ending today, oldest first
+    points = values[::-7][:weeks + 1][::-1]
+    return points[1:] - points[:-1]
+
+def project_weight(start, weights, today, goal):
+    """Fit the recent weigh-ins and extend the line to the goal's target date."""
+    import numpy as np
+
+    if goal is None or start is None:
+        return None
+    recent = weights[-PROJECTION_DAYS:]
+    offsets = np.flatnonzero(~np.isnan(recent)) - (len(recent) - 1)
+    if len(offsets) < 2 or offsets[0] == offsets[-1]:
+        return None
+
+    slope, current = np.polyfit(offsets, recent[offsets + len(recent) - 1], 1)
+    target_date = as_date(goal.target_date)
+    projected = current + slope * (target_date - today).days
+    remaining = goal.target_value - current
+    reach_date = None
+    # A flat history fits a slope of about 1e-15 rather than 0, so bound the horizon instead
+    if np.isclose(remaining, 0):
+        reach_date = today
+    elif slope and 0 <= remaining / slope <= MAX_PROJECTION_DAYS:
+        reach_date = today + timedelta(days=int(np.ceil(remaining / slope)))
+    return dict(
+        goal_id=goal.id,
+        target_value=goal.target_value,
+        target_date=target_date.isoformat(),
+        rate_per_week=round(float(slope) * 7, 3),
+        projected_weight=round(float(projected), 2),
+        reach_date=reach_date and reach_date.isoformat(),
+        on_track=reach_date is not None and reach_date <= target_date,
+    )
+
+def compute_trends(loaded, today, goal=None):
+    start, raw = loaded
+    if start is None:
+        return Trends(start=None)
+
+    series = {'weight': raw['weight'], 'weight_trend': weight_trend(raw['weight'])}
+    for name in ('calories', 'sleep_hours', 'workout_minutes'):
+        for window in ROLLING_WINDOWS:
+            series[f'{name}_{window}d'] = rolling_mean(raw[name], window)
+
+    weekly = {'weight_trend': weekly_deltas(series['weight_trend'])}
+    weekly.update({name: weekly_deltas(series[f'{name}_7d']) for name in ('calories', 'sleep_hours', 'workout_minutes')})
+    latest = {name: values[-1] for name, values in series.items() if name != 'weight'}
+    return Trends(
+        start=start,
+        series=series,
+        latest=latest,
+        weekly=weekly,
+        projection=project_weight(start, raw['weight'], today, goal),
+    )
@@ -0,0 +1,456 @@
+from flask import current_app
+from sqlalchemy import select, delete, func
+from app import db
+from app.models.archive import ArchiveRun
+from app.models.health import WeightLog, NutritionLog, WorkoutLog, SleepLog
+from app.utils.aggregates import as_date
+from app.utils.cache import LRUCache
+from app.utils.versions import bump_versions
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta
+import fcntl
+import os
+import shutil
+import tempfile
+import uuid
+
+# Log kind -> archived model; goals and daily summaries always stay in the database
+MODELS = {
+    'weight': WeightLog,
+    'nutrition': NutritionLog,
+    'workout': WorkoutLog,
+    'sleep': SleepLog,
+}
+
+# Rows newer than this are never archived, whatever ARCHIVE_AFTER_DAYS says
+MIN_ARCHIVE_DAYS = 90
+
+# Layout: <ARCHIVE_DIR>/<user id>/<kind>/<year>.<version>/<column>.npy, one
+# directory per user, kind and year holding that year's rows sorted by (date, id).
+# Numbers are float64 with NaN for NULL, dates datetime64[us], and text is a
+# UTF-8 byte array plus offsets and a NULL mask. Every file is memory-mapped on
+# read. A rewrite goes to a new version directory that is renamed into place
+# once complete, so readers never see a partial year.
+#
+# A run first renames its new versions to <year>.<version>.<run token>.pending.
+# They only become visible once the run's archive_runs row exists, which commits
+# together with the delete of the moved live rows, so no row is ever readable
+# in both places. Runs hold an exclusive lock on <kind>/.lock; a pending version
+# without a committed run whose lock is free belongs to a run that died, and is
+# removed.
+PENDING = '.pending'
+LOCK = '.lock'
+
+def init_app(app):
+    app.config.setdefault('ARCHIVE_DIR', os.environ.get('ARCHIVE_DIR') or os.path.join(app.instance_path, 'archive'))
+    app.config.setdefault('ARCHIVE_AFTER_DAYS', int(os.environ.get('ARCHIVE_AFTER_DAYS', 730)))
+    # Open years by path; a path never changes content, so entries need no invalidation
+    app.extensions['archive_years'] = LRUCache(maxsize=256)
+
+def columns(kind):
+    # user_id is implied by the directory
+    return [column for column in MODELS[kind].__table__.columns if column.name != 'user_id']
+
+def _storage(column):
+    if column.name == 'id':
+        return 'id'
+    if isinstance(column.type, db.DateTime):
+        return 'datetime'
+    if isinstance(column.type, (db.Integer, db.Float)):
+        return 'number'
+    return 'text'
+
+def _kind_dir(user_id, kind):
+    return os.path.join(current_app.config['ARCHIVE_DIR'], str(user_id), kind)
+
+@contextmanager
+def _run_lock(root, blocking=True):
+    """Hold the lock of an archive run on ``root``; yields False if not ``blocking`` and a run holds it."""
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, LOCK), 'a') as file:
+        try:
+            fcntl.flock(file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(file, fcntl.LOCK_UN)
+
+def _committed(tokens):
+    # A connection of its own sees runs committed after the session's snapshot
+    with db.engine.connect() as connection:
+        return set(connection.execute(select(ArchiveRun.token).where(ArchiveRun.token.in_(tokens))).scalars())
+
+def _promote(path):
+    final = path[:-len(PENDING)].rsplit('.', 1)[0]
+    try:
+        os.rename(path, final)
+    except OSError:
+        # Another process renamed it first
+        pass
+    return final if os.path.isdir(final) else None
+
+def _token(path):
+    return path[:-len(PENDING)].rsplit('.', 1)[1]
+
+def _discard_dead(paths):
+    """Remove pending versions whose run never committed; call with the run lock held.
+
+    Under the lock no run is in progress, so a run still without its row died.
+    The rows are checked again in case the run committed since the caller looked.
+    """
+    committed = _committed([_token(path) for path in paths])
+    for path in paths:
+        if _token(path) in committed:
+            _promote(path)
+        else:
+            shutil.rmtree(path, ignore_errors=True)
+
+def _versions(user_id, kind, discard=False):
+    """Return {year: (version, path)} of the newest complete version of each archived year.
+
+    Pending versions of committed runs are renamed into place and those of
+    dead runs removed. ``discard`` also removes versions superseded by a newer
+    one; only archive_user_logs passes it, while holding the run lock.
+    """
+    root = _kind_dir(user_id, kind)
+    try:
+        names = os.listdir(root)
+    except FileNotFoundError:
+        return {}
+
+    pending = [os.path.join(root, name) for name in names if name.endswith(PENDING)]
+    if pending:
+        committed = _committed([_token(path) for path in pending])
+        dead = [path for path in pending if _token(path) not in committed]
+        names = {name for name in names if not name.endswith(PENDING)}
+        for path in pending:
+            final = _promote(path) if path not in dead else None
+            if final is not None:
+                names.add(os.path.basename(final))
+        if dead and discard:
+            _discard_dead(dead)
+        elif dead:
+            with _run_lock(root, blocking=False) as free:
+                if free:
+                    _discard_dead(dead)
+
+    latest = {}
+    for name in names:
+        year, _, version = name.partition('.')
+        # Skips temporary directories of writes in progress and the lock file
+        if not (year.isdigit() and version.isdigit()):
+            continue
+        year, version = int(year), int(version)
+        path = os.path.join(root, name)
+        if year in latest and version < latest[year][0]:
+            if discard:
+                shutil.rmtree(path, ignore_errors=True)
+            continue
+        if discard and year in latest:
+            shutil.rmtree(latest[year][1], ignore_errors=True)
+        latest[year] = (version, path)
+    return latest
+
+def archived_years(user_id, kind):
+    """Return the user's archived years of ``kind`` as [(year, ArchivedYear)], oldest first."""
+    cache = current_app.extensions['archive_years']
+    years = []
+    for year, (_, path) in sorted(_versions(user_id, kind).items()):
+        archived = cache.get(path)
+        if archived is None:
+            archived = ArchivedYear(kind, path)
+            cache.set(path, archived)
+        years.append((year, archived))
+    return years
+
+def has_archive(user_id, kind=None):
+    kinds = [kind] if kind else MODELS
+    return any(os.path.isdir(_kind_dir(user_id, name)) for name in kinds)
+
+class ArchivedYear:
+    """Memory-mapped columns of one user's logs of one kind in one year, sorted by (date, id)."""
+
+    def __init__(self, kind, path):
+        import numpy as np
+
+        self.kind = kind
+        self.path = path
+        self.ids = np.load(os.path.join(path, 'id.npy'), mmap_mode='r')
+        self.dates = np.load(os.path.join(path, 'date.npy'), mmap_mode='r')
+        self._columns = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _load(self, name):
+        import numpy as np
+
+        if name not in self._columns:
+            path = os.path.join(self.path, name + '.npy')
+            # Columns added to the model after the year was written read as NULL
+            self._columns[name] = np.load(path, mmap_mode='r') if os.path.exists(path) else None
+        return self._columns[name]
+
+    def position(self, key, side='left'):
+        """Index of ``key`` = (date, id) among the rows; 'right' skips a row equal to it."""
+        import numpy as np
+
+        when, row_id = key
+        when = np.datetime64(when, 'us')
+        low = int(np.searchsorted(self.dates, when, 'left'))
+        high = int(np.searchsorted(self.dates, when, 'right'))
+        return low + int(np.searchsorted(self.ids[low:high], row_id, side))
+
+    def day_range(self, first, last):
+        """Slice bounds of the rows dated from ``first`` through ``last`` (dates)."""
+        import numpy as np
+
+        start = np.datetime64(datetime.combine(first, time.min), 'us')
+        end = np.datetime64(datetime.combine(last + timedelta(days=1), time.min), 'us')
+        return int(np.searchsorted(self.dates, start, 'left')), int(np.searchsorted(self.dates, end, 'left'))
+
+    def column(self, column, start=0, stop=None):
+        """Values of ``column`` for rows [start, stop) as a list of Python values."""
+        import numpy as np
+
+        stop = len(self) if stop is None else stop
+        storage = _storage(column)
+        if storage == 'id':
+            return self.ids[start:stop].tolist()
+        if storage == 'datetime':
+            return self.dates[start:stop].astype('datetime64[us]').tolist()
+        if storage == 'number':
+            values = self._load(column.name)
+            if values is None:
+                return [None] * (stop - start)
+            values = np.asarray(values[start:stop])
+            cast = int if isinstance(column.type, db.Integer) else float
+            return [None if value != value else cast(value) for value in values.tolist()]
+
+        data, offsets, nulls = (self._load(f'{column.name}.{part}') for part in ('data', 'offsets', 'nulls'))
+        if data is None:
+            return [None] * (stop - start)
+        bounds = offsets[start:stop + 1].tolist()
+        raw = bytes(data[bounds[0]:bounds[-1]])
+        base = bounds[0]
+        return [
+            None if null else raw[begin - base:end - base].decode()
+            for begin, end, null in zip(bounds, bounds[1:], nulls[start:stop].tolist())
+        ]
+
+    def numbers(self, name, start=0, stop=None):
+        """Float array of a numeric column, NaN for NULL (no Python objects)."""
+        import numpy as np
+
+        values = self._load(name)
+        stop = len(self) if stop is None else stop
+        return np.full(stop - start, np.nan) if values is None else np.asarray(values[start:stop], dtype=float)
+
+    def rows(self, start=0, stop=None):
+        """Rows [start, stop) as dicts of column values."""
+        stop = len(self) if stop is None else stop
+        values = {column.name: self.column(column, start, stop) for column in columns(self.kind)}
+        return [dict(zip(values, row)) for row in zip(*values.values())]
+
+def _to_log(kind, row, user_id):
+    # Transient model instances render like live rows; they never join the session
+    log = MODELS[kind](user_id=user_id, **row)
+    log.archived = True
+    return log
+
+class ArchivedLogs:
+    """Keyset access to one user's archived logs of one kind, merged into live pages by keyset_paginate."""
+
+    def __init__(self, user_id, kind):
+        self.user_id = user_id
+        self.kind = kind
+        self.years = archived_years(user_id, kind)
+        last = self.years[-1][1] if self.years else None
+        # (date, id) of the newest archived row
+        self.latest = (last.dates[-1].astype('datetime64[us]').item(), int(last.ids[-1])) if last is not None else None
+
+    def older(self, key, limit):
+        """Up to ``limit`` logs before ``key`` (or the newest ones when None), newest first."""
+        found = []
+        for year, archived in reversed(self.years):
+            if key is not None and year > key[0].year:
+                continue
+            stop = archived.position(key) if key is not None and year == key[0].year else len(archived)
+            start = max(0, stop - (limit - len(found)))
+            found += reversed(archived.rows(start, stop))
+            if len(found) >= limit:
+                break
+        return [_to_log(self.kind, row, self.user_id) for row in found]
+
+    def newer(self, key, limit):
+        """Up to ``limit`` logs after ``key``, oldest first."""
+        if self.latest is None or self.latest <= key:
+            return []
+        found = []
+        for year, archived in self.years:
+            if year < key[0].year:
+                continue
+            start = archived.position(key, 'right') if year == key[0].year else 0
+            found += archived.rows(start, min(len(archived), start + limit - len(found)))
+            if len(found) >= limit:
+                break
+        return [_to_log(self.kind, row, self.user_id) for row in found]
+
+    def oldest(self):
+        for _, archived in self.years:
+            if len(archived):
+                return _to_log(self.kind, archived.rows(0, 1)[0], self.user_id)
+        return None
+
+def archived_logs(user_id, kind):
+    """Return an ArchivedLogs for keyset_paginate, or None when nothing is archived."""
+    if not has_archive(user_id, kind):
+        return None
+    logs = ArchivedLogs(user_id, kind)
+    return logs if logs.years else None
+
+def iter_archived(user_id, kind, days=None):
+    """Yield archived rows as dicts, oldest first; ``days`` limits them to those dates."""
+    if not has_archive(user_id, kind):
+        return
+    wanted = None if days is None else sorted({as_date(day) for day in days})
+    for year, archived in archived_years(user_id, kind):
+        if wanted is None:
+            yield from archived.rows()
+            continue
+        for day in wanted:
+            if day.year == year:
+                yield from archived.rows(*archived.day_range(day, day))
+
+def archived_arrays(user_id, kind, names, first=None, last=None):
+    """Yield (dates, ids, {name: float array}) per archived year, sorted by (date, id).
+
+    ``first`` and ``last`` limit the rows to those dates. Nothing is copied
+    into Python objects, so whole archives aggregate at array speed.
+    """
+    if not has_archive(user_id, kind):
+        return
+    for year, archived in archived_years(user_id, kind):
+        if first is None:
+            start, stop = 0, len(archived)
+        elif first.year <= year <= last.year:
+            start, stop = archived.day_range(first, last)
+        else:
+            continue
+        if stop > start:
+            yield archived.dates[start:stop], archived.ids[start:stop], {
+                name: archived.numbers(name, start, stop) for name in names
+            }
+
+def archived_days(user_id, days):
+    """Subset of ``days`` on which any kind of the user's logs is archived."""
+    days = {as_date(day) for day in days}
+    found = set()
+    if not days or not has_archive(user_id):
+        return found
+    for kind in MODELS:
+        for year, archived in archived_years(user_id, kind):
+            for day in days - found:
+                if day.year == year:
+                    start, stop = archived.day_range(day, day)
+                    if stop > start:
+                        found.add(day)
+    return found
+
+def _write_year(kind, root, year, version, rows, token):
+    """Write a version of a year holding ``rows``, pending until run ``token`` commits."""
+    import numpy as np
+
+    os.makedirs(root, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix='.tmp-', dir=root)
+    for column in columns(kind):
+        values = [row[column.name] for row in rows]
+        storage = _storage(column)
+        if storage == 'id':
+            np.save(os.path.join(staging, 'id.npy'), np.array(values, dtype=np.int64))
+        elif storage == 'datetime':
+            np.save(os.path.join(staging, f'{column.name}.npy'), np.array(values, dtype='datetime64[us]'))
+        elif storage == 'number':
+            np.save(os.path.join(staging, f'{column.name}.npy'), np.array(values, dtype=float))
+        else:
+            encoded = [(value or '').encode() for value in values]
+            offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+            np.cumsum([len(value) for value in encoded], out=offsets[1:])
+            np.save(os.path.join(staging, f'{column.name}.data.npy'), np.frombuffer(b''.join(encoded), dtype=np.uint8))
+            np.save(os.path.join(staging, f'{column.name}.offsets.npy'), offsets)
+            np.save(os.path.join(staging, f'{column.name}.nulls.npy'), np.array([value is None for value in values]))
+    pending = os.path.join(root, f'{year}.{version}.{token}{PENDING}')
+    os.rename(staging, pending)
+    return pending
+
+def cutoff(user_id, kind, days):
+    """Logs dated before the returned datetime are due for archiving.
+
+    That is ``days`` ago, but never later than the user's newest log of the
+    kind, so "latest entry" lookups always find a live row.
+    """
+    model = MODELS[kind]
+    horizon = datetime.combine(date.today() - timedelta(days=max(days, MIN_ARCHIVE_DAYS)), time.min)
+    newest = db.session.query(func.max(model.date)).filter(model.user_id == user_id).scalar()
+    return min(horizon, newest) if newest is not None else None
+
+def archive_user_logs(user_id, kind, before):
+    """Move the user's ``kind`` logs dated before ``before`` into the archive and commit.
+
+    Years that already have an archive are rewritten with the new rows merged
+    in. The new files stay pending until the run's archive_runs row commits
+    with the delete of the live rows. A run that dies before committing leaves
+    the rows live and its files are removed by the next reader or run; one
+    that dies after committing has its files picked up by the next reader.
+    Runs for the same user and kind wait for each other. Returns the number
+    of rows moved.
+    """
+    model = MODELS[kind]
+    names = [column.name for column in columns(kind)]
+    root = _kind_dir(user_id, kind)
+    with _run_lock(root):
+        # End any snapshot taken before the wait; a run that held the lock may have moved these rows
+        db.session.commit()
+        rows = [dict(zip(names, row)) for row in db.session.execute(
+            select(*columns(kind)).where(model.user_id == user_id, model.date < before).order_by(model.date, model.id)
+        )]
+        if not rows:
+            return 0
+
+        by_year = {}
+        for row in rows:
+            by_year.setdefault(row['date'].year, []).append(row)
+
+        existing = _versions(user_id, kind, discard=True)
+        token = uuid.uuid4().hex
+        replaced, pending = [], []
+        try:
+            for year, new_rows in sorted(by_year.items()):
+                version, path = existing.get(year, (0, None))
+                if path is not None:
+                    new_rows = sorted(ArchivedYear(kind, path).rows() + new_rows, key=lambda row: (row['date'], row['id']))
+                    replaced.append(path)
+                pending.append(_write_year(kind, root, year, version + 1, new_rows, token))
+
+            ids = [row['id'] for row in rows]
+            for start in range(0, len(ids), 500):
+                db.session.execute(delete(model).where(model.id.in_(ids[start:start + 500])))
+            db.session.add(ArchiveRun(token=token, user_id=user_id, kind=kind, rows=len(rows)))
+            # Archived rows render differently (read-only) in the history tables
+            bump_versions(user_id, kind)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            for path in pending:
+                shutil.rmtree(path, ignore_errors=True)
+            raise
+
+        for path in pending:
+            _promote(path)
+        # Readers that already mapped an old version keep working; the files go with the last map
+        for path in replaced:
+            shutil.rmtree(path, ignore_errors=True)
+    return len(rows)
@@ -0,0 +1,282 @@
+from flask import current_app
+from sqlalchemy import func, select
+from app import db
+from app.models.summary import DailySummary
+from app.utils.cache import LRUCache
+from app.utils.aggregates import as_date, days_ago
+from app.utils.instrumentation import timed
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from collections import namedtuple
+from datetime import date
+import multiprocessing
+import threading
+import hashlib
+import os
+from io import BytesIO
+
+# Daily values are drawn as a 'line' (reduced with LTTB beyond the point budget)
+# or as 'bar's (reduced to per-bucket mean with a min/max band)
+ChartSpec = namedtuple('ChartSpec', ('column', 'range', 'title', 'ylabel', 'style'))
+
+# Chart kind -> DailySummary column, default range and presentation
+CHARTS = {
+    'weight': ChartSpec('last_weight', '30d', 'Weight', 'Weight (kg)', 'line'),
+    'nutrition': ChartSpec('calories', '7d', 'Daily Calorie Intake', 'Calories', 'bar'),
+    'workout': ChartSpec('workout_minutes', '30d', 'Workout Minutes', 'Minutes', 'bar'),
+    'sleep': ChartSpec('sleep_hours', '30d', 'Sleep', 'Hours', 'line'),
+}
+
+# Selectable range -> (days, label); None covers everything logged
+RANGES = {
+    '7d': (7, 'Last 7 Days'),
+    '30d': (30, 'Last 30 Days'),
+    '90d': (90, 'Last 90 Days'),
+    '1y': (365, 'Last Year'),
+    'all': (None, 'All Time'),
+}
+
+# Served in place of a chart when the render pool is saturated or too slow
+PLACEHOLDER_SVG = (
+    '<svg xmlns="http://www.w3.org/2000/svg" width="1000" height="400" viewBox="0 0 1000 400">'
+    '<rect width="1000" height="400" fill="#f8f9fa"/>'
+    '<text x="500" y="200" font-family="sans-serif" font-size="24" fill="#6c757d" '
+    'text-anchor="middle">Chart is being prepared, refresh in a moment</text>'
+    '</svg>'
+)
+
+class ChartUnavailable(Exception):
+    pass
+
+def init_app(app):
+    app.config.setdefault('CHART_CACHE_SIZE', int(os.environ.get('CHART_CACHE_SIZE', 256)))
+    # Most points a chart or its JSON ever carries, whatever the range
+    app.config.setdefault('CHART_POINTS', int(os.environ.get('CHART_POINTS', 400)))
+    # 0 renders on the request thread, which is handy for development and tests
+    app.config.setdefault('CHART_RENDER_WORKERS', int(os.environ.get('CHART_RENDER_WORKERS', 2)))
+    app.config.setdefault('CHART_RENDER_QUEUE', int(os.environ.get('CHART_RENDER_QUEUE', 8)))
+    app.config.setdefault('CHART_RENDER_TIMEOUT', float(os.environ.get('CHART_RENDER_TIMEOUT', 5.0)))
+    app.extensions['chart_cache'] = LRUCache(maxsize=app.config['CHART_CACHE_SIZE'])
+    app.extensions['chart_renderer'] = ChartRenderer(
+        workers=app.config['CHART_RENDER_WORKERS'],
+        queue_size=app.config['CHART_RENDER_QUEUE'],
+        timeout=app.config['CHART_RENDER_TIMEOUT']
+    )
+
+def _cache():
+    return current_app.extensions['chart_cache']
+
+class ChartRenderer:
+    """Runs plot functions in a bounded process pool.
+
+    The pool is created on first use so that each gunicorn worker gets its own
+    after forking. At most ``queue_size`` renders may be in flight; beyond that,
+    or when a render exceeds ``timeout`` seconds, ChartUnavailable is raised.
+    """
+
+    def __init__(self, workers, queue_size, timeout):
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(queue_size)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+                self._pid = os.getpid()
+            return self._executor
+
+    def render(self, plot, *args, on_done=None):
+        if not self.workers:
+            return plot(*args)
+
+        if not self._slots.acquire(blocking=False):
+            raise ChartUnavailable('chart render queue is full')
+
+        try:
+            future = self._get_executor().submit(plot, *args)
+        except BrokenProcessPool:
+            self._slots.release()
+            self._reset()
+            raise ChartUnavailable('chart render pool is broken')
+        except Exception:
+            self._slots.release()
+            raise
+
+        def _finished(future):
+            self._slots.release()
+            # A render that outlived its request still fills the cache for the next one
+            if on_done is not None and not future.cancelled() and future.exception() is None:
+                on_done(future.result())
+
+        future.add_done_callback(_finished)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            raise ChartUnavailable('chart render timed out')
+        except BrokenProcessPool:
+            self._reset()
+            raise ChartUnavailable('chart render pool is broken')
+
+    def _reset(self):
+        # A crashed worker poisons the whole executor; start a fresh one next time
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+def resolve_range(kind, name=None):
+    """Return the range name to use for ``kind``, or None if ``name`` is not a known range."""
+    name = name or CHARTS[kind].range
+    return name if name in RANGES else None
+
+def range_start(name):
+    days = RANGES[name][0]
+    return None if days is None else as_date(days_ago(days))
+
+def chart_version(user_id, kind, range_name=None):
+    """Return a token that changes whenever the data behind a chart changes.
+
+    The window start is part of the token so charts roll over at midnight
+    even without new logs. Returns None when the window holds no data.
+    """
+    range_name = resolve_range(kind, range_name)
+    column = getattr(DailySummary, CHARTS[kind].column)
+    since = range_start(range_name)
+    query = db.session.query(func.count(DailySummary.id), func.max(DailySummary.updated_at)).filter(
+        DailySummary.user_id == user_id,
+        column.isnot(None)
+    )
+    if since is not None:
+        query = query.filter(DailySummary.day >= since)
+    count, updated_at = query.one()
+
+    if not count:
+        return None
+    return f'{range_name}-{since or "all"}-{count}-{updated_at:%Y%m%d%H%M%S%f}'
+
+def chart_etag(user_id, kind, version, fmt='png'):
+    return hashlib.sha1(f'{user_id}:{kind}:{fmt}:{version}'.encode()).hexdigest()
+
+def _cached(user_id, kind, range_name, fmt, version, build):
+    key = (user_id, kind, range_name, fmt, version)
+    cache = _cache()
+    value = cache.get(key)
+    if value is None:
+        # Older versions of this chart can never be requested again
+        cache.discard_where(lambda other: other[:4] == key[:4] and other != key)
+        value = build(lambda result: cache.set(key, result))
+        cache.set(key, value)
+    return value
+
+def get_chart(user_id, kind, version=None, range_name=None):
+    """Return the chart as PNG bytes, or None when there is nothing to plot.
+
+    Raises ChartUnavailable when the render pool cannot produce it in time.
+    """
+    range_name = resolve_range(kind, range_name)
+    if version is None:
+        version = chart_version(user_id, kind, range_name)
+    if version is None:
+        return None
+
+    def render(on_done):
+        # Queries and downsampling run on the request thread; at most the
+        # point budget crosses into the pool as plain lists
+        series = load_chart_series(user_id, kind, range_name)
+        spec = CHARTS[kind]
+        with timed('chart'):
+            return current_app.extensions['chart_renderer'].render(
+                plot_series, f'{spec.title} ({RANGES[range_name][1]})', spec.ylabel, spec.style,
+                [date.fromordinal(day) for day in series['x']], series['y'], series.get('low'), series.get('high'),
+                on_done=on_done
+            )
+
+    return _cached(user_id, kind, range_name, 'png', version, render)
+
+def get_chart_data(user_id, kind, version=None, range_name=None):
+    """Return the downsampled series as a JSON-ready dict, or None when there is nothing to plot."""
+    range_name = resolve_range(kind, range_name)
+    if version is None:
+        version = chart_version(user_id, kind, range_name)
+    if version is None:
+        return None
+
+    def build(on_done):
+        series = load_chart_series(user_id, kind, range_name)
+        series['x'] = [date.fromordinal(day).isoformat() for day in series['x']]
+        return dict(kind=kind, range=range_name, **series)
+
+    return _cached(user_id, kind, range_name, 'json', version, build)
+
+def invalidate_charts(user_id, kind=None):
+    _cache().discard_where(lambda key: key[0] == user_id and (kind is None or key[1] == kind))
+
+def load_chart_series(user_id, kind, range_name):
+    """Read a chart's daily values and reduce them to at most CHART_POINTS points.
+
+    Returns a dict with the day ordinals ``x``, values ``y``, the method used
+    and the number of days read. Bar charts past the budget become per-bucket
+    means with ``low``/``high`` bands.
+    """
+    import numpy as np
+    from app.utils.downsample import lttb, bucket_stats
+
+    spec = CHARTS[kind]
+    column = getattr(DailySummary, spec.column)
+    since = range_start(range_name)
+    query = select(DailySummary.day, column).where(DailySummary.user_id == user_id, column.isnot(None))
+    if since is not None:
+        query = query.where(DailySummary.day >= since)
+    rows = db.session.execute(query.order_by(DailySummary.day)).all()
+
+    x = np.fromiter((as_date(day).toordinal() for day, _ in rows), dtype=np.int64, count=len(rows))
+    y = np.fromiter((value for _, value in rows), dtype=float, count=len(rows))
+    budget = current_app.config['CHART_POINTS']
+    series = dict(days=len(rows), method='raw')
+    if len(rows) > budget and spec.style == 'line':
+        kept = lttb(x.astype(float), y, budget)
+        x, y = x[kept], y[kept]
+        series['method'] = 'lttb'
+    elif len(rows) > budget:
+        # The band doubles the payload, so bar charts get half as many buckets
+        x, y, low, high = bucket_stats(x, y, budget // 2)
+        series.update(method='buckets', low=np.round(low, 2).tolist(), high=np.round(high, 2).tolist())
+    series.update(x=x.tolist(), y=np.round(y, 2).tolist())
+    return series
+
+# Plot functions run in pool processes, so they use the object-oriented Figure
+# API rather than pyplot's process-global figure manager. matplotlib is imported
+# on first use to keep it out of web worker startup.
+
+def plot_series(title, ylabel, style, dates, values, lows=None, highs=None):
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(10, 4))
+    ax = fig.subplots()
+    if lows is not None:
+        ax.fill_between(dates, lows, highs, color='green', alpha=0.25, step='post', label='Daily range')
+        ax.step(dates, values, 'g-', where='post', label='Average')
+        ax.legend(loc='upper left')
+    elif style == 'bar':
+        ax.bar(dates, values, width=0.5 if len(dates) <= 31 else 0.8, color='green')
+    else:
+        # Markers only while they can still be told apart
+        ax.plot(dates, values, 'b-o' if len(dates) <= 60 else 'b-', markersize=4)
+    ax.set_title(title)
+    ax.set_xlabel('Date')
+    ax.set_ylabel(ylabel)
+    ax.grid(True, axis='y' if style == 'bar' else 'both')
+    fig.autofmt_xdate()
+    return _encode(fig)
+
+def _encode(fig):
+    buf = BytesIO()
+    fig.savefig(buf, format='png')
+    return buf.getvalue()
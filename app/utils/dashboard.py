@@ -0,0 +1,76 @@
+from sqlalchemy import select
+from app import db
+from app.models.health import WeightLog, WorkoutLog, SleepLog, Goal
+from app.utils.identity import calculate_bmi
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+import hashlib
+
+@dataclass(frozen=True)
+class RecentWeight:
+    weight: float
+    date: datetime
+
+@dataclass(frozen=True)
+class RecentWorkout:
+    workout_type: str
+    duration: Optional[int]
+    date: datetime
+
+@dataclass(frozen=True)
+class RecentSleep:
+    hours: float
+    quality: Optional[int]
+    date: datetime
+
+# Field -> (dataclass, model, columns read from the user's latest log)
+LATEST = {
+    'recent_weight': (RecentWeight, WeightLog, ('weight', 'date')),
+    'recent_workout': (RecentWorkout, WorkoutLog, ('workout_type', 'duration', 'date')),
+    'recent_sleep': (RecentSleep, SleepLog, ('hours', 'quality', 'date')),
+}
+
+# Dashboard panel -> data sets it shows; their versions make up the panel's ETag.
+# Chart panels are keyed on app.utils.charts.chart_version instead.
+PANELS = {
+    'recent': ('weight', 'workout', 'sleep'),
+    'bmi': ('weight',),
+    'goals': ('goals',),
+}
+
+def _latest_column(model, user_id, name):
+    # Each is a single seek on the (user_id, date) index
+    return select(getattr(model, name)).where(model.user_id == user_id).order_by(
+        model.date.desc(), model.id.desc()
+    ).limit(1).scalar_subquery()
+
+def panel_etag(user_id, name, *parts):
+    return hashlib.sha1(':'.join(map(str, (user_id, 'panel', name) + parts)).encode()).hexdigest()
+
+def load_recent(user_id, fields=tuple(LATEST)):
+    """Return {field: latest log or None} for ``fields`` of LATEST in one query.
+
+    Every column is a scalar subquery of the same SELECT, so the panel costs
+    one round trip however many logs it shows.
+    """
+    columns = []
+    for field in fields:
+        _, model, names = LATEST[field]
+        columns += [_latest_column(model, user_id, name).label(f'{field}__{name}') for name in names]
+    row = db.session.execute(select(*columns)).one()._mapping
+
+    recent = {}
+    for field in fields:
+        cls, _, names = LATEST[field]
+        values = {name: row[f'{field}__{name}'] for name in names}
+        # The date column is NOT NULL, so a NULL date means no log at all
+        recent[field] = cls(**values) if values['date'] is not None else None
+    return recent
+
+def load_bmi(user):
+    latest = load_recent(user.id, ('recent_weight',))['recent_weight']
+    return calculate_bmi(latest.weight if latest else None, user.height)
+
+def load_active_goals(user_id):
+    return Goal.query.filter_by(user_id=user_id, achieved=False).order_by(Goal.target_date).all()
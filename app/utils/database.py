@@ -0,0 +1,69 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+import os
+
+def _env_bool(name, default):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+def database_uri():
+    # docker-compose and env.example use DATABASE_URL; DATABASE_URI is the old name
+    uri = os.environ.get('DATABASE_URL') or os.environ.get('DATABASE_URI') or 'sqlite:///health_tracker.db'
+    # Hosted PostgreSQL often hands out postgres://, which SQLAlchemy no longer accepts
+    if uri.startswith('postgres://'):
+        uri = 'postgresql://' + uri[len('postgres://'):]
+    return uri
+
+def configure(app):
+    """Fill in per-backend engine settings; call before ``db.init_app``."""
+    config = app.config
+    config.setdefault('SQLITE_JOURNAL_MODE', os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'))
+    config.setdefault('SQLITE_SYNCHRONOUS', os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'))
+    config.setdefault('SQLITE_BUSY_TIMEOUT', int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)))  # ms
+    config.setdefault('SQLITE_MMAP_SIZE', int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)))
+    # Negative values are KiB, so this is a 64MB page cache per connection
+    config.setdefault('SQLITE_CACHE_SIZE', int(os.environ.get('SQLITE_CACHE_SIZE', -64000)))
+    config.setdefault('DB_POOL_SIZE', int(os.environ.get('DB_POOL_SIZE', 5)))
+    config.setdefault('DB_MAX_OVERFLOW', int(os.environ.get('DB_MAX_OVERFLOW', 10)))
+    config.setdefault('DB_POOL_TIMEOUT', int(os.environ.get('DB_POOL_TIMEOUT', 30)))
+    config.setdefault('DB_POOL_RECYCLE', int(os.environ.get('DB_POOL_RECYCLE', 1800)))
+    config.setdefault('DB_POOL_PRE_PING', _env_bool('DB_POOL_PRE_PING', True))
+
+    options = config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+    backend = make_url(config['SQLALCHEMY_DATABASE_URI']).get_backend_name()
+    if backend == 'sqlite':
+        # The driver's own lock wait; busy_timeout below covers the same ground per connection
+        connect_args = options.setdefault('connect_args', {})
+        connect_args.setdefault('timeout', config['SQLITE_BUSY_TIMEOUT'] / 1000)
+    elif backend == 'postgresql':
+        options.setdefault('pool_size', config['DB_POOL_SIZE'])
+        options.setdefault('max_overflow', config['DB_MAX_OVERFLOW'])
+        options.setdefault('pool_timeout', config['DB_POOL_TIMEOUT'])
+        options.setdefault('pool_recycle', config['DB_POOL_RECYCLE'])
+        options.setdefault('pool_pre_ping', config['DB_POOL_PRE_PING'])
+
+def init_app(app, db):
+    """Install the SQLite connect hook on the app's engine; call after ``db.init_app``."""
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        return
+
+    pragmas = [
+        ('journal_mode', app.config['SQLITE_JOURNAL_MODE']),
+        ('synchronous', app.config['SQLITE_SYNCHRONOUS']),
+        ('busy_timeout', app.config['SQLITE_BUSY_TIMEOUT']),
+        ('mmap_size', app.config['SQLITE_MMAP_SIZE']),
+        ('cache_size', app.config['SQLITE_CACHE_SIZE']),
+    ]
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
@@ -0,0 +1,55 @@
+# Reduce long series to a fixed point budget before plotting or serialising.
+# x values are numbers sorted ascending (day ordinals for charts).
+
+def lttb(x, y, points):
+    """Indices of the points Largest-Triangle-Three-Buckets keeps.
+
+    The first and last points always stay. The rest are split into
+    ``points - 2`` buckets. From each bucket LTTB keeps the point that forms
+    the largest triangle with the previously kept point and the average of
+    the next bucket, which preserves peaks and the overall shape of a line.
+    """
+    import numpy as np
+
+    length = len(x)
+    if points >= length or points < 3:
+        return np.arange(length)
+
+    edges = np.linspace(1, length - 1, points - 1).astype(np.int64)
+    # Average of every bucket plus the last point, computed once up front
+    starts = np.append(edges[:-1], length - 1)
+    sizes = np.diff(np.append(starts, length))
+    mean_x = np.add.reduceat(x, starts) / sizes
+    mean_y = np.add.reduceat(y, starts) / sizes
+
+    kept = np.empty(points, dtype=np.int64)
+    kept[0], kept[-1] = 0, length - 1
+    previous = 0
+    for bucket in range(points - 2):
+        begin, end = edges[bucket], edges[bucket + 1]
+        next_x, next_y = mean_x[bucket + 1], mean_y[bucket + 1]
+        px, py = x[previous], y[previous]
+        area = np.abs((px - next_x) * (y[begin:end] - py) - (px - x[begin:end]) * (next_y - py))
+        previous = begin + int(area.argmax())
+        kept[bucket + 1] = previous
+    return kept
+
+def bucket_stats(x, y, buckets):
+    """Split the x range into ``buckets`` equal spans; return (x, mean, min, max) of the non-empty ones.
+
+    The x of a bucket is its first point, so bars and bands line up with real days.
+    """
+    import numpy as np
+
+    if not len(x):
+        return x, y, y, y
+    edges = np.linspace(x[0], x[-1] + 1, buckets + 1)
+    index = np.searchsorted(edges, x, side='right') - 1
+    starts = np.flatnonzero(np.diff(index, prepend=-1))
+    sizes = np.diff(np.append(starts, len(x)))
+    return (
+        x[starts],
+        np.add.reduceat(y, starts) / sizes,
+        np.minimum.reduceat(y, starts),
+        np.maximum.reduceat(y, starts),
+    )
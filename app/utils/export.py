@@ -0,0 +1,119 @@
+from sqlalchemy import select
+from app import db
+from app.models.health import WeightLog, NutritionLog, WorkoutLog, SleepLog, Goal
+from app.utils.archive import MODELS as ARCHIVED, has_archive, iter_archived
+from operator import itemgetter
+import csv
+import heapq
+import io
+import json
+import zipfile
+import zlib
+from datetime import date
+
+# Export name -> model; rows come out oldest first so files re-import cleanly
+EXPORTS = {
+    'weight': WeightLog,
+    'nutrition': NutritionLog,
+    'workout': WorkoutLog,
+    'sleep': SleepLog,
+    'goals': Goal,
+}
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Rows fetched per round trip and bytes buffered before handing a chunk to the server
+YIELD_PER = 1000
+CHUNK_SIZE = 64 * 1024
+
+def export_columns(kind):
+    return [column for column in EXPORTS[kind].__table__.columns if column.name != 'user_id']
+
+def iter_rows(user_id, kind):
+    model = EXPORTS[kind]
+    order = (model.date, model.id) if hasattr(model, 'date') else (model.id,)
+    stmt = select(*export_columns(kind)).where(model.user_id == user_id).order_by(*order)
+    # yield_per streams from a server-side cursor where the driver supports it
+    rows = db.session.execute(stmt.execution_options(yield_per=YIELD_PER))
+    if kind not in ARCHIVED or not has_archive(user_id, kind):
+        return rows
+
+    # Archived rows are older than most live ones; merging keeps the file in (date, id) order
+    names = [column.name for column in export_columns(kind)]
+    archived = (tuple(row[name] for name in names) for row in iter_archived(user_id, kind))
+    return heapq.merge(archived, rows, key=itemgetter(names.index('date'), names.index('id')))
+
+def plain_value(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+def iter_csv(user_id, kind):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(column.name for column in export_columns(kind))
+    for row in iter_rows(user_id, kind):
+        writer.writerow('' if value is None else plain_value(value) for value in row)
+        if buf.tell() >= CHUNK_SIZE:
+            yield buf.getvalue().encode()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue().encode()
+
+def iter_ndjson(user_id, kind):
+    names = [column.name for column in export_columns(kind)]
+    buf = io.StringIO()
+    for row in iter_rows(user_id, kind):
+        buf.write(json.dumps(dict(zip(names, map(plain_value, row))), separators=(',', ':')))
+        buf.write('\n')
+        if buf.tell() >= CHUNK_SIZE:
+            yield buf.getvalue().encode()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue().encode()
+
+def iter_export(user_id, kind, fmt):
+    return iter_csv(user_id, kind) if fmt == 'csv' else iter_ndjson(user_id, kind)
+
+def gzip_chunks(chunks, level=6):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31 = gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, unseekable file that collects bytes until drained."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+def iter_zip_archive(user_id, fmt='csv'):
+    """Stream a zip holding one file per export kind without buffering it whole."""
+    sink = _ChunkSink()
+    # An unseekable target makes zipfile write sizes in data descriptors instead
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for kind in EXPORTS:
+            with archive.open(f'{kind}.{fmt}', 'w', force_zip64=True) as entry:
+                for chunk in iter_export(user_id, kind, fmt):
+                    entry.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+    yield sink.drain()
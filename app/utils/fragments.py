@@ -0,0 +1,89 @@
+from flask import current_app
+from flask_login import current_user
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+from collections import OrderedDict
+import os
+import sys
+import threading
+
+def init_app(app):
+    # Bytes of rendered HTML kept per process; 0 turns fragment caching off
+    app.config.setdefault('FRAGMENT_CACHE_BYTES', int(os.environ.get('FRAGMENT_CACHE_BYTES', 8 * 1024 * 1024)))
+    app.extensions['fragment_cache'] = FragmentCache(app.config['FRAGMENT_CACHE_BYTES'])
+    app.jinja_env.add_extension(FragmentCacheExtension)
+
+class FragmentCache:
+    """Thread-safe LRU of rendered fragments bounded by their total size in bytes."""
+
+    def __init__(self, maxbytes):
+        self.maxbytes = maxbytes
+        self.hits = self.misses = self.evictions = 0
+        self._bytes = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return self._data[key][0]
+
+    def set(self, key, html):
+        size = sys.getsizeof(html)
+        if size > self.maxbytes:
+            return
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._data[key] = (html, size)
+            self._bytes += size
+            while self._bytes > self.maxbytes:
+                _, (_, evicted) = self._data.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return dict(hits=self.hits, misses=self.misses, evictions=self.evictions,
+                        entries=len(self._data), bytes=self._bytes)
+
+class FragmentCacheExtension(Extension):
+    """``{% cache name, key... %} ... {% endcache %}`` renders the body once per user and key.
+
+    The key parts must be hashable and cover everything the body depends on,
+    normally the data versions from app.utils.versions plus request arguments.
+    The signed-in user's id is always part of the key; anonymous requests
+    render the body uncached.
+    """
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        parts = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            parts.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(self.call_method('_cached', [nodes.List(parts)]), [], [], body).set_lineno(lineno)
+
+    def _cached(self, parts, caller):
+        cache = current_app.extensions.get('fragment_cache')
+        if cache is None or not cache.maxbytes or not current_user.is_authenticated:
+            return caller()
+        key = (current_user.id, *parts)
+        html = cache.get(key)
+        if html is None:
+            html = str(caller())
+            cache.set(key, html)
+        return Markup(html)
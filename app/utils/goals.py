@@ -0,0 +1,126 @@
+from sqlalchemy import func
+from app import db
+from app.models.health import WorkoutLog, Goal
+from app.models.summary import DailySummary
+from app.utils.aggregates import as_date
+from app.utils.versions import bump_versions
+from datetime import datetime, time, timedelta
+
+# Rolling goals (nutrition, workout, sleep) are judged on the last WINDOW_DAYS days
+WINDOW_DAYS = 7
+
+def _latest_weight(user_id, on_or_before=None, after=None):
+    query = db.session.query(DailySummary.last_weight).filter(
+        DailySummary.user_id == user_id,
+        DailySummary.last_weight.isnot(None)
+    )
+    if on_or_before is not None:
+        query = query.filter(DailySummary.day <= on_or_before).order_by(DailySummary.day.desc())
+    elif after is not None:
+        query = query.filter(DailySummary.day > after).order_by(DailySummary.day)
+    else:
+        query = query.order_by(DailySummary.day.desc())
+    return query.limit(1).scalar()
+
+def _evaluate_weight(goal, today):
+    # Reach target_value from wherever the user stood when the goal was set
+    current = _latest_weight(goal.user_id)
+    if goal.start_value is None:
+        start_day = as_date(goal.start_date)
+        goal.start_value = _latest_weight(goal.user_id, on_or_before=start_day)
+        if goal.start_value is None:
+            goal.start_value = _latest_weight(goal.user_id, after=start_day)
+    if current is None or goal.start_value is None:
+        return None, None, False
+
+    start, target = goal.start_value, goal.target_value
+    if start == target:
+        return current, 100.0, current == target
+    progress = (start - current) / (start - target) * 100
+    achieved = current <= target if start > target else current >= target
+    return current, progress, achieved
+
+def _window(goal, today):
+    start_day = as_date(goal.start_date)
+    window_start = today - timedelta(days=WINDOW_DAYS - 1)
+    # A goal is only achieved once a whole window has passed since it was set
+    return max(window_start, start_day), start_day <= window_start
+
+def _window_totals(goal, today, *columns):
+    since, complete = _window(goal, today)
+    totals = db.session.query(*columns).filter(
+        DailySummary.user_id == goal.user_id,
+        DailySummary.day >= since,
+        DailySummary.day <= today
+    ).one()
+    return totals, complete
+
+def _evaluate_nutrition(goal, today):
+    # Keep average daily calories at or below target_value
+    (average,), complete = _window_totals(goal, today, func.avg(DailySummary.calories))
+    if average is None:
+        return None, None, False
+    average = float(average)
+    progress = 100.0 if average <= goal.target_value else goal.target_value / average * 100
+    return average, progress, complete and average <= goal.target_value
+
+def _evaluate_workout(goal, today):
+    # At least target_value workouts within the window; the summary has no per-day
+    # count, so this reads the window's raw logs (a short range on the user/date index)
+    since, complete = _window(goal, today)
+    count = float(db.session.query(func.count(WorkoutLog.id)).filter(
+        WorkoutLog.user_id == goal.user_id,
+        WorkoutLog.date >= datetime.combine(since, time.min),
+        WorkoutLog.date < datetime.combine(today + timedelta(days=1), time.min)
+    ).scalar())
+    return count, count / goal.target_value * 100, complete and count >= goal.target_value
+
+def _evaluate_sleep(goal, today):
+    # Average at least target_value hours a night
+    (average,), complete = _window_totals(goal, today, func.avg(DailySummary.sleep_hours))
+    if average is None:
+        return None, None, False
+    average = float(average)
+    return average, average / goal.target_value * 100, complete and average >= goal.target_value
+
+EVALUATORS = {
+    'weight': _evaluate_weight,
+    'nutrition': _evaluate_nutrition,
+    'workout': _evaluate_workout,
+    'sleep': _evaluate_sleep,
+}
+
+def evaluate_goals(user_id, goal_types=None):
+    """Refresh cached progress of a user's active goals and mark reached ones achieved.
+
+    Only active goals of ``goal_types`` (default: all types) are read, and each
+    costs one or two index range lookups over at most a week of rows, so the
+    work does not grow with the user's history. Rolling-window goals are only
+    re-evaluated on writes, so their window trails the user's last log. Does
+    not commit; returns the goals that were newly achieved.
+    """
+    query = Goal.query.filter_by(user_id=user_id, achieved=False)
+    if goal_types is not None:
+        query = query.filter(Goal.goal_type.in_(list(goal_types)))
+
+    now = datetime.utcnow()
+    today = now.date()
+    achieved = []
+    seen = False
+    for goal in query:
+        seen = True
+        evaluate = EVALUATORS.get(goal.goal_type)
+        if evaluate is None or not goal.target_value:
+            continue
+        current, progress, reached = evaluate(goal, today)
+        goal.current_value = current
+        goal.progress = None if progress is None else max(0.0, min(100.0, progress))
+        goal.evaluated_at = now
+        if reached:
+            goal.achieved = True
+            goal.achieved_date = now
+            goal.progress = 100.0
+            achieved.append(goal)
+    if seen:
+        bump_versions(user_id, 'goals')
+    return achieved
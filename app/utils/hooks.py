@@ -0,0 +1,35 @@
+from app.utils.aggregates import as_date
+from app.utils.analytics import invalidate_analytics
+from app.utils.charts import CHARTS, invalidate_charts
+from app.utils.goals import evaluate_goals
+from app.utils.search import index_logs
+from app.utils.summary import refresh_daily_summary, rebuild_user_summaries
+from app.utils.versions import bump_versions
+
+# Beyond this many touched days one grouped rebuild beats per-day refreshes
+BULK_REFRESH_DAYS = 31
+
+def logs_changed(user_id, kind, days):
+    """Bring data derived from a user's logs up to date after a write.
+
+    ``kind`` is the log type ('weight', 'nutrition', 'workout' or 'sleep') and
+    ``days`` the dates of the added or deleted logs. Call it after adding or
+    deleting the logs and before committing, so derived rows commit with them.
+    """
+    days = {as_date(day) for day in days}
+    if len(days) > BULK_REFRESH_DAYS:
+        rebuild_user_summaries(user_id)
+        index_logs(user_id, kind)
+    else:
+        for day in days:
+            refresh_daily_summary(user_id, day)
+        index_logs(user_id, kind, days)
+    
+    bump_versions(user_id, kind)
+    
+    # Goals read the summary rows refreshed above, so only this type's active goals are touched
+    evaluate_goals(user_id, [kind])
+    
+    invalidate_analytics(user_id)
+    if kind in CHARTS:
+        invalidate_charts(user_id, kind)
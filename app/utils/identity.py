@@ -0,0 +1,84 @@
+from flask import current_app
+from sqlalchemy.orm import make_transient_to_detached
+from app import db
+from app.utils.cache import LRUCache
+import os
+import time
+
+# Columns kept in the cache; password_hash stays out and lazy-loads on first access
+PROFILE_FIELDS = ('id', 'username', 'email', 'first_name', 'last_name', 'age', 'gender', 'height', 'created_at')
+
+class MemoryStore:
+    """Per-process store with LRU eviction and a time-to-live per entry.
+
+    Any object with the same ``get``/``set``/``delete`` methods (for example a
+    thin Redis wrapper) can be passed to ``init_app`` to share the cache between
+    workers; values are plain dicts of column values.
+    """
+
+    def __init__(self, maxsize=1024):
+        self._entries = LRUCache(maxsize=maxsize)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires < time.monotonic():
+            self._entries.discard(key)
+            return None
+        return value
+
+    def set(self, key, value, ttl):
+        self._entries.set(key, (time.monotonic() + ttl, value))
+
+    def delete(self, key):
+        self._entries.discard(key)
+
+def init_app(app, store=None):
+    # Seconds a cached user may be served for; 0 disables the cache
+    app.config.setdefault('IDENTITY_CACHE_TTL', int(os.environ.get('IDENTITY_CACHE_TTL', 60)))
+    app.config.setdefault('IDENTITY_CACHE_SIZE', 1024)
+    app.extensions['identity_store'] = store or MemoryStore(maxsize=app.config['IDENTITY_CACHE_SIZE'])
+
+def _store():
+    return current_app.extensions['identity_store']
+
+def _ttl():
+    return current_app.config['IDENTITY_CACHE_TTL']
+
+def load_identity(user_id):
+    """Return the User for ``user_id``, attached to the session without a query when cached."""
+    from app.models.user import User
+
+    if _ttl() <= 0:
+        return db.session.get(User, user_id)
+
+    snapshot = _store().get(f'user:{user_id}')
+    if snapshot is None:
+        user = db.session.get(User, user_id)
+        if user is not None:
+            _store().set(f'user:{user_id}', {field: getattr(user, field) for field in PROFILE_FIELDS}, _ttl())
+        return user
+
+    # Rebuild as if freshly loaded; columns not in the snapshot load on access
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
+
+def calculate_bmi(weight, height):
+    if not weight or not height or height <= 0:
+        return None
+    # BMI = weight(kg) / (height(m))^2
+    height_in_meters = height / 100
+    return round(weight / (height_in_meters * height_in_meters), 1)
+
+def invalidate_identity(user_id):
+    """Drop the cached profile after an update.
+
+    With the default MemoryStore this only reaches the calling process; other
+    workers keep serving their copy until it expires, so profile edits can take
+    up to IDENTITY_CACHE_TTL seconds to show everywhere. Pass a shared store to
+    ``init_app`` to invalidate all workers at once.
+    """
+    _store().delete(f'user:{user_id}')
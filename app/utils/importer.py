@@ -0,0 +1,248 @@
+from sqlalchemy import insert
+from wtforms import IntegerField, FloatField, DateField, SelectField, SubmitField
+from wtforms.validators import DataRequired, NumberRange, Length
+from app import db
+from app.models.health import WeightLog, NutritionLog, WorkoutLog, SleepLog
+from app.forms.health import WeightLogForm, NutritionLogForm, WorkoutLogForm, SleepLogForm
+from app.utils.hooks import logs_changed
+import codecs
+import csv
+import io
+import json
+import math
+from datetime import date, datetime
+
+# Log type -> (model, form whose validators define the accepted values)
+LOG_TYPES = {
+    'weight': (WeightLog, WeightLogForm),
+    'nutrition': (NutritionLog, NutritionLogForm),
+    'workout': (WorkoutLog, WorkoutLogForm),
+    'sleep': (SleepLog, SleepLogForm),
+}
+
+FORMATS = ('csv', 'json', 'ndjson')
+
+MAX_REPORTED_ERRORS = 100
+
+class ImportResult:
+    def __init__(self):
+        self.imported = 0
+        self.error_count = 0
+        self.errors = []  # (record number, message), capped at MAX_REPORTED_ERRORS
+
+    def add_error(self, record, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((record, message))
+
+class FieldRule:
+    """Conversion and range checks for one column, read off a WTForms field."""
+
+    def __init__(self, name, unbound):
+        validators = unbound.kwargs.get('validators') or []
+        self.name = name
+        self.field_class = unbound.field_class
+        self.required = any(isinstance(v, DataRequired) for v in validators)
+        self.ranges = [v for v in validators if isinstance(v, NumberRange)]
+        self.lengths = [v for v in validators if isinstance(v, Length)]
+        self.choices = None
+        if issubclass(self.field_class, SelectField):
+            self.choices = {value for value, _ in unbound.kwargs.get('choices', [])}
+
+    def clean(self, raw):
+        if raw is None or (isinstance(raw, str) and not raw.strip()):
+            if self.required:
+                raise ValueError('is required')
+            return None
+
+        if issubclass(self.field_class, DateField):
+            value = _parse_datetime(raw)
+        elif issubclass(self.field_class, IntegerField):
+            value = _parse_integer(raw)
+        elif issubclass(self.field_class, FloatField):
+            value = _parse_number(raw)
+        else:
+            value = str(raw).strip()
+
+        # DataRequired rejects falsy values such as 0 in the web forms too
+        if self.required and not value:
+            raise ValueError('is required')
+        for rule in self.ranges:
+            if (rule.min is not None and value < rule.min) or (rule.max is not None and value > rule.max):
+                raise ValueError(f'must be between {rule.min} and {rule.max}')
+        for rule in self.lengths:
+            if rule.max is not None and rule.max >= 0 and len(value) > rule.max:
+                raise ValueError(f'must be at most {rule.max} characters')
+        if self.choices is not None and value not in self.choices:
+            raise ValueError(f'must be one of {", ".join(sorted(self.choices))}')
+        return value
+
+def _parse_number(raw):
+    # JSON true/false are ints in Python, but never a valid measurement
+    if isinstance(raw, bool):
+        raise ValueError('must be a number')
+    value = float(raw)
+    # NaN slips through the range comparisons, which NumberRange rejects
+    if not math.isfinite(value):
+        raise ValueError('must be a finite number')
+    return value
+
+def _parse_integer(raw):
+    if isinstance(raw, int) and not isinstance(raw, bool):
+        return raw
+    if isinstance(raw, str):
+        try:
+            return int(raw.strip())
+        except ValueError:
+            pass
+    # Accept 72.0 or "72.0", but don't silently truncate 72.9
+    value = _parse_number(raw)
+    if not value.is_integer():
+        raise ValueError('must be a whole number')
+    return int(value)
+
+def _parse_datetime(raw):
+    if isinstance(raw, datetime):
+        return raw
+    if isinstance(raw, date):
+        return datetime.combine(raw, datetime.min.time())
+    return datetime.fromisoformat(str(raw).strip())
+
+def field_rules(form_class):
+    return [
+        FieldRule(name, unbound)
+        for name, unbound in vars(form_class).items()
+        if hasattr(unbound, 'field_class') and not issubclass(unbound.field_class, SubmitField)
+    ]
+
+def clean_record(rules, record):
+    """Return (column values, list of problems) for one incoming record."""
+    row, problems = {}, []
+    for rule in rules:
+        try:
+            row[rule.name] = rule.clean(record.get(rule.name))
+        except (TypeError, ValueError, OverflowError) as exc:
+            problems.append(f'{rule.name} {exc}' if str(exc).startswith(('is ', 'must ')) else f'{rule.name} is invalid')
+    return row, problems
+
+def detect_format(filename):
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if extension in ('jsonl', 'ndjson'):
+        return 'ndjson'
+    if extension in FORMATS:
+        return extension
+    raise ValueError(f'Unsupported file type {filename!r}; use CSV, JSON or NDJSON')
+
+def iter_records(stream, fmt, chunk_size=64 * 1024):
+    """Yield dicts from a binary stream without reading it into memory at once."""
+    if fmt == 'csv':
+        yield from csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    elif fmt == 'ndjson':
+        for line in io.TextIOWrapper(stream, encoding='utf-8-sig'):
+            if line.strip():
+                yield json.loads(line)
+    else:
+        yield from _iter_json_array(stream, chunk_size)
+
+def _iter_json_array(stream, chunk_size):
+    # Decode one array element at a time, topping up the buffer as needed
+    decoder = json.JSONDecoder()
+    reader = codecs.getincrementaldecoder('utf-8-sig')()
+    buffer, position, started, eof = '', 0, False, False
+
+    while True:
+        # Skip whitespace and separators between elements
+        while position < len(buffer) and buffer[position] in ' \t\r\n,':
+            position += 1
+        if not started and position < len(buffer):
+            if buffer[position] != '[':
+                raise ValueError('JSON imports must be an array of objects')
+            started = True
+            position += 1
+            continue
+        if started and position < len(buffer) and buffer[position] == ']':
+            return
+
+        if position < len(buffer):
+            try:
+                record, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                yield record
+                position = end
+                continue
+        elif eof:
+            if started:
+                raise ValueError('Unterminated JSON array')
+            return
+
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[position:] + reader.decode(chunk or b'', final=eof)
+        position = 0
+
+def import_logs(user_id, kind, stream, fmt, batch_size=1000, commit_every=20):
+    """Validate and insert logs of ``kind`` for a user from a CSV/JSON/NDJSON stream.
+
+    Rows are inserted with executemany in batches of ``batch_size`` and
+    committed every ``commit_every`` batches; invalid rows are skipped and
+    reported in the returned ImportResult. If reading the stream fails part
+    way, the batches already committed stay and their days are still passed
+    to logs_changed before the error propagates.
+    """
+    model, form_class = LOG_TYPES[kind]
+    rules = field_rules(form_class)
+    result = ImportResult()
+    batch, pending_batches = [], 0
+    days, pending_days = set(), set()
+
+    def flush():
+        nonlocal batch, pending_batches
+        if batch:
+            db.session.execute(insert(model), batch)
+            result.imported += len(batch)
+            batch = []
+            pending_batches += 1
+
+    def commit():
+        nonlocal pending_batches
+        db.session.commit()
+        days.update(pending_days)
+        pending_days.clear()
+        pending_batches = 0
+
+    try:
+        for number, record in enumerate(iter_records(stream, fmt), start=1):
+            if not isinstance(record, dict):
+                result.add_error(number, 'expected an object with named fields')
+                continue
+
+            row, problems = clean_record(rules, record)
+            if problems:
+                result.add_error(number, '; '.join(problems))
+                continue
+
+            row['user_id'] = user_id
+            batch.append(row)
+            pending_days.add(row['date'].date())
+            if len(batch) >= batch_size:
+                flush()
+                if pending_batches >= commit_every:
+                    commit()
+
+        flush()
+        days.update(pending_days)
+    except Exception:
+        # Uncommitted batches are dropped; committed ones still need their summaries and indexes
+        db.session.rollback()
+        if days:
+            logs_changed(user_id, kind, days)
+            db.session.commit()
+        raise
+
+    if days:
+        logs_changed(user_id, kind, days)
+    db.session.commit()
+    return result
@@ -0,0 +1,267 @@
+from flask import g, request, has_request_context, template_rendered, before_render_template, abort
+from sqlalchemy import event
+from collections import defaultdict, Counter
+from contextlib import contextmanager
+from datetime import datetime
+import threading
+import time
+import sys
+import os
+
+# Upper bounds (seconds) of the request duration histogram buckets
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Per-request phases reported as totals and Server-Timing entries
+PHASES = ('sql', 'template', 'chart')
+
+def _env_bool(name, default=False):
+    return os.environ.get(name, str(default)).strip().lower() in ('1', 'true', 'yes', 'on')
+
+def init_app(app, db):
+    """Install request instrumentation when METRICS_ENABLED is set.
+
+    When it is off nothing is registered at all: no request hooks, engine
+    events, signal receivers or /metrics route.
+    """
+    app.config.setdefault('METRICS_ENABLED', _env_bool('METRICS_ENABLED'))
+    app.config.setdefault('METRICS_SERVER_TIMING', _env_bool('METRICS_SERVER_TIMING'))
+    # When set, /metrics requires "Authorization: Bearer <token>"
+    app.config.setdefault('METRICS_TOKEN', os.environ.get('METRICS_TOKEN'))
+    # Requests slower than this get their sampled stacks written out; 0 turns sampling off
+    app.config.setdefault('PROFILE_SLOW_REQUEST_MS', int(os.environ.get('PROFILE_SLOW_REQUEST_MS', 0)))
+    app.config.setdefault('PROFILE_INTERVAL_MS', 5)
+    app.config.setdefault('PROFILE_DIR', os.environ.get('PROFILE_DIR') or os.path.join(app.instance_path, 'profiles'))
+    if not app.config['METRICS_ENABLED']:
+        return
+
+    metrics = app.extensions['metrics'] = Metrics()
+    sampler = None
+    if app.config['PROFILE_SLOW_REQUEST_MS'] > 0:
+        sampler = app.extensions['profile_sampler'] = StackSampler(app.config['PROFILE_INTERVAL_MS'] / 1000)
+
+    @app.before_request
+    def start_timing():
+        g._timings = dict.fromkeys(PHASES, 0.0)
+        g._timings['queries'] = 0
+        g._timings['started'] = time.perf_counter()
+        if sampler is not None:
+            sampler.watch()
+
+    @app.after_request
+    def finish_timing(response):
+        timings = g.pop('_timings', None)
+        if timings is None:
+            return response
+        wall = time.perf_counter() - timings['started']
+        endpoint = request.endpoint or 'unmatched'
+        metrics.observe(endpoint, wall, timings)
+
+        if sampler is not None:
+            stacks = sampler.unwatch()
+            if wall * 1000 >= app.config['PROFILE_SLOW_REQUEST_MS'] and stacks:
+                _dump_stacks(app.config['PROFILE_DIR'], endpoint, wall, stacks)
+
+        if app.config['METRICS_SERVER_TIMING']:
+            response.headers['Server-Timing'] = ', '.join([
+                f'app;dur={wall * 1000:.1f}',
+                f'db;dur={timings["sql"] * 1000:.1f};desc="{timings["queries"]} queries"',
+                f'tpl;dur={timings["template"] * 1000:.1f}',
+                f'chart;dur={timings["chart"] * 1000:.1f}',
+            ])
+        return response
+
+    @app.teardown_request
+    def stop_sampling(exc):
+        # after_request is skipped on unhandled errors; don't leave the thread watched
+        if sampler is not None:
+            sampler.unwatch()
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def query_started(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def query_finished(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_started'].pop()
+        timings = g.get('_timings') if has_request_context() else None
+        if timings is not None:
+            timings['queries'] += 1
+            timings['sql'] += elapsed
+
+    def template_started(sender, template, context, **extra):
+        if has_request_context():
+            g._template_started = time.perf_counter()
+
+    def template_finished(sender, template, context, **extra):
+        started = g.pop('_template_started', None) if has_request_context() else None
+        timings = g.get('_timings') if has_request_context() else None
+        if started is not None and timings is not None:
+            timings['template'] += time.perf_counter() - started
+
+    # Signals hold weak references by default, which would drop these closures
+    before_render_template.connect(template_started, app, weak=False)
+    template_rendered.connect(template_finished, app, weak=False)
+
+    def metrics_view():
+        token = app.config['METRICS_TOKEN']
+        if token and request.headers.get('Authorization') != f'Bearer {token}':
+            abort(403)
+        return metrics.render(app), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
+
+@contextmanager
+def timed(phase):
+    """Add the time spent in the block to the current request's ``phase`` total."""
+    timings = g.get('_timings') if has_request_context() else None
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[phase] += time.perf_counter() - started
+
+class Metrics:
+    """Per-endpoint counters for this process, rendered in Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = defaultdict(lambda: dict(
+            count=0, wall=0.0, queries=0, buckets=[0] * len(BUCKETS), **dict.fromkeys(PHASES, 0.0)
+        ))
+
+    def observe(self, endpoint, wall, timings):
+        with self._lock:
+            stats = self._endpoints[endpoint]
+            stats['count'] += 1
+            stats['wall'] += wall
+            stats['queries'] += timings['queries']
+            for phase in PHASES:
+                stats[phase] += timings[phase]
+            for index, bound in enumerate(BUCKETS):
+                if wall <= bound:
+                    stats['buckets'][index] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {endpoint: dict(stats, buckets=list(stats['buckets'])) for endpoint, stats in self._endpoints.items()}
+
+    def render(self, app):
+        endpoints = sorted(self.snapshot().items())
+        lines = [
+            '# HELP healthtracker_request_duration_seconds Wall time spent handling requests.',
+            '# TYPE healthtracker_request_duration_seconds histogram',
+        ]
+        for endpoint, stats in endpoints:
+            label = f'endpoint="{endpoint}"'
+            for bound, count in zip(BUCKETS, stats['buckets']):
+                lines.append(f'healthtracker_request_duration_seconds_bucket{{{label},le="{bound}"}} {count}')
+            lines.append(f'healthtracker_request_duration_seconds_bucket{{{label},le="+Inf"}} {stats["count"]}')
+            lines.append(f'healthtracker_request_duration_seconds_sum{{{label}}} {stats["wall"]:.6f}')
+            lines.append(f'healthtracker_request_duration_seconds_count{{{label}}} {stats["count"]}')
+
+        counters = [
+            ('db_queries_total', 'SQL statements executed while handling requests.', 'queries'),
+            ('db_query_seconds_total', 'Time spent executing SQL statements.', 'sql'),
+            ('template_render_seconds_total', 'Time spent rendering templates.', 'template'),
+            ('chart_render_seconds_total', 'Time spent producing chart images.', 'chart'),
+        ]
+        for name, help_text, key in counters:
+            lines += [f'# HELP healthtracker_{name} {help_text}', f'# TYPE healthtracker_{name} counter']
+            lines += [f'healthtracker_{name}{{endpoint="{endpoint}"}} {stats[key]:.6g}' for endpoint, stats in endpoints]
+
+        hasher = app.extensions.get('password_hasher')
+        if hasher is not None:
+            stats = hasher.stats()
+            lines += [
+                '# HELP healthtracker_password_hash_operations_total Password hash operations by outcome.',
+                '# TYPE healthtracker_password_hash_operations_total counter',
+            ]
+            for outcome in ('completed', 'rejected', 'timed_out'):
+                lines.append(f'healthtracker_password_hash_operations_total{{outcome="{outcome}"}} {stats[outcome]}')
+            lines += [
+                '# HELP healthtracker_password_hash_queue_seconds_total Time hash operations waited for a worker.',
+                '# TYPE healthtracker_password_hash_queue_seconds_total counter',
+                f'healthtracker_password_hash_queue_seconds_total {stats["queue_seconds"]:.6f}',
+            ]
+
+        fragments = app.extensions.get('fragment_cache')
+        if fragments is not None:
+            stats = fragments.stats()
+            lines += [
+                '# HELP healthtracker_fragment_cache_lookups_total Cached template fragment lookups by result.',
+                '# TYPE healthtracker_fragment_cache_lookups_total counter',
+                f'healthtracker_fragment_cache_lookups_total{{result="hit"}} {stats["hits"]}',
+                f'healthtracker_fragment_cache_lookups_total{{result="miss"}} {stats["misses"]}',
+                '# HELP healthtracker_fragment_cache_evictions_total Fragments dropped to stay within FRAGMENT_CACHE_BYTES.',
+                '# TYPE healthtracker_fragment_cache_evictions_total counter',
+                f'healthtracker_fragment_cache_evictions_total {stats["evictions"]}',
+                '# HELP healthtracker_fragment_cache_bytes Approximate size of the cached fragments.',
+                '# TYPE healthtracker_fragment_cache_bytes gauge',
+                f'healthtracker_fragment_cache_bytes {stats["bytes"]}',
+            ]
+        return '\n'.join(lines) + '\n'
+
+class StackSampler:
+    """Samples the stacks of threads that are handling requests.
+
+    A single daemon thread per process wakes every ``interval`` seconds and
+    records the current stack of each watched thread; ``unwatch`` hands back
+    the samples as collapsed-stack counts.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._watched = {}
+        self._thread = None
+        self._pid = None
+
+    def _ensure_running(self):
+        # The sampling thread does not survive a fork; start one per worker process
+        if self._thread is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+            self._thread.start()
+
+    def watch(self):
+        with self._lock:
+            self._ensure_running()
+            self._watched[threading.get_ident()] = Counter()
+
+    def unwatch(self):
+        with self._lock:
+            return self._watched.pop(threading.get_ident(), None)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._watched:
+                    continue
+                frames = sys._current_frames()
+                for ident, stacks in self._watched.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        stacks[_collapse(frame)] += 1
+
+def _collapse(frame):
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+def _dump_stacks(directory, endpoint, wall, stacks):
+    # One file per slow request, in the folded format flamegraph.pl and speedscope read
+    os.makedirs(directory, exist_ok=True)
+    name = f'{datetime.utcnow():%Y%m%dT%H%M%S%f}-{endpoint}-{wall * 1000:.0f}ms.folded'
+    with open(os.path.join(directory, name), 'w') as output:
+        for stack, count in stacks.most_common():
+            output.write(f'{stack} {count}\n')
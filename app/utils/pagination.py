@@ -0,0 +1,112 @@
+from flask import current_app, request
+from sqlalchemy import and_, or_
+import base64
+import binascii
+import heapq
+from datetime import datetime
+
+class KeysetPage:
+    """One page of a newest-first listing ordered by (date, id).
+
+    ``following`` is the row just after the last item (the next older entry),
+    which lets templates compare the last row on a page with its neighbour.
+    """
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None, following=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.following = following
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+def encode_cursor(row):
+    raw = f'{row.date.isoformat()}|{row.id}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        date, row_id = raw.split('|')
+        return datetime.fromisoformat(date), int(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        # A mangled cursor just restarts from the newest entries
+        return None
+
+def get_page_size():
+    default = current_app.config['ITEMS_PER_PAGE']
+    per_page = request.args.get('per_page', default, type=int)
+    return max(1, min(per_page, current_app.config['MAX_ITEMS_PER_PAGE']))
+
+def _older_than(model, key):
+    date, row_id = key
+    return or_(model.date < date, and_(model.date == date, model.id < row_id))
+
+def _newer_than(model, key):
+    date, row_id = key
+    return or_(model.date > date, and_(model.date == date, model.id > row_id))
+
+def _key(row):
+    return row.date, row.id
+
+def _merge(live, archived, limit, newest_first):
+    # Both inputs are already in page order
+    return list(heapq.merge(live, archived, key=_key, reverse=newest_first))[:limit]
+
+def keyset_paginate(query, model, after=None, before=None, per_page=20, archive=None):
+    """Return a KeysetPage of ``query`` rows, newest first.
+
+    ``after`` and ``before`` are cursors from a previous page. Each page is a
+    bounded index range scan, so deep pages cost the same as the first one and
+    rows inserted concurrently never shift or duplicate entries between pages.
+    ``archive`` (see app.utils.archive.archived_logs) merges archived rows into
+    the listing with the same (date, id) keys.
+    """
+    after, before = decode_cursor(after), decode_cursor(before)
+
+    if before is not None:
+        # Walk backwards towards newer rows, then restore newest-first order
+        rows = query.filter(_newer_than(model, before)).order_by(
+            model.date.asc(), model.id.asc()
+        ).limit(per_page + 1).all()
+        if archive is not None:
+            rows = _merge(rows, archive.newer(before, per_page + 1), per_page + 1, newest_first=False)
+        has_prev = len(rows) > per_page
+        items = list(reversed(rows[:per_page]))
+        following = None
+        if items:
+            last = _key(items[-1])
+            following = query.filter(_older_than(model, last)).order_by(
+                model.date.desc(), model.id.desc()
+            ).first()
+            if archive is not None and (following is None or archive.latest > _key(following)):
+                older = archive.older(last, 1)
+                if older and (following is None or _key(older[0]) > _key(following)):
+                    following = older[0]
+        has_next = following is not None
+    else:
+        if after is not None:
+            query = query.filter(_older_than(model, after))
+        rows = query.order_by(model.date.desc(), model.id.desc()).limit(per_page + 1).all()
+        # Recent pages are usually filled by live rows that are all newer than the archive
+        if archive is not None and (len(rows) <= per_page or archive.latest > _key(rows[-1])):
+            rows = _merge(rows, archive.older(after, per_page + 1), per_page + 1, newest_first=True)
+        items = rows[:per_page]
+        following = rows[per_page] if len(rows) > per_page else None
+        has_next = following is not None
+        has_prev = after is not None
+
+    return KeysetPage(
+        items,
+        next_cursor=encode_cursor(items[-1]) if has_next and items else None,
+        prev_cursor=encode_cursor(items[0]) if has_prev and items else None,
+        following=following
+    )
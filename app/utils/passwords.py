@@ -0,0 +1,131 @@
+from flask import current_app, has_app_context
+from werkzeug.security import generate_password_hash, check_password_hash
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import threading
+import time
+import os
+
+class HasherBusy(Exception):
+    pass
+
+def init_app(app):
+    # Any werkzeug method string, e.g. 'scrypt:32768:8:1' or 'pbkdf2:sha256:600000';
+    # empty keeps werkzeug's default. Changing it rehashes passwords on next login.
+    app.config.setdefault('PASSWORD_HASH_METHOD', os.environ.get('PASSWORD_HASH_METHOD', ''))
+    # 0 hashes on the request thread
+    app.config.setdefault('PASSWORD_HASH_WORKERS', int(os.environ.get('PASSWORD_HASH_WORKERS', 2)))
+    app.config.setdefault('PASSWORD_HASH_QUEUE', int(os.environ.get('PASSWORD_HASH_QUEUE', 4)))
+    app.config.setdefault('PASSWORD_HASH_TIMEOUT', 10.0)
+    app.extensions['password_hasher'] = PasswordHasher(
+        method=app.config['PASSWORD_HASH_METHOD'],
+        workers=app.config['PASSWORD_HASH_WORKERS'],
+        queue_size=app.config['PASSWORD_HASH_QUEUE'],
+        timeout=app.config['PASSWORD_HASH_TIMEOUT']
+    )
+
+class PasswordHasher:
+    """Hashes and verifies passwords on a small bounded thread pool.
+
+    hashlib's pbkdf2 and scrypt release the GIL, so a burst of logins is
+    limited to ``workers`` CPU-bound hashes at a time while other threads keep
+    serving pages. At most ``queue_size`` operations may be waiting or running;
+    beyond that, or after ``timeout`` seconds, HasherBusy is raised so the
+    caller can fail fast instead of piling up.
+
+    The limits are per process and assume threaded workers (gunicorn's
+    gthread class, as in the Dockerfile). Keep ``queue_size`` below the
+    threads per process, so logins can never hold every thread and pages
+    still get served. Under sync workers a process serves one request at a
+    time, so the queue never fills and only the timeout applies.
+    """
+
+    def __init__(self, method='', workers=2, queue_size=4, timeout=10.0):
+        self.method = method
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(queue_size)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._prefix = None
+        self._stats = dict(completed=0, rejected=0, timed_out=0,
+                           queue_seconds=0.0, max_queue_seconds=0.0, hash_seconds=0.0)
+
+    def _get_executor(self):
+        # Threads don't survive a fork, so each worker process starts its own pool
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hash')
+                self._pid = os.getpid()
+            return self._executor
+
+    def _timed(self, submitted, func, *args):
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            finished = time.perf_counter()
+            with self._lock:
+                waited = started - submitted
+                self._stats['completed'] += 1
+                self._stats['queue_seconds'] += waited
+                self._stats['max_queue_seconds'] = max(self._stats['max_queue_seconds'], waited)
+                self._stats['hash_seconds'] += finished - started
+
+    def _run(self, func, *args):
+        if not self.workers:
+            return self._timed(time.perf_counter(), func, *args)
+
+        if not self._slots.acquire(blocking=False):
+            self._count('rejected')
+            raise HasherBusy('password hashing queue is full')
+
+        try:
+            future = self._get_executor().submit(self._timed, time.perf_counter(), func, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda future: self._slots.release())
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            self._count('timed_out')
+            raise HasherBusy('password hashing timed out')
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _generate(self, password):
+        if self.method:
+            return generate_password_hash(password, method=self.method)
+        return generate_password_hash(password)
+
+    def hash(self, password):
+        return self._run(self._generate, password)
+
+    def verify(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        # Compare against the canonical prefix werkzeug writes, e.g. 'scrypt:32768:8:1'
+        if self._prefix is None:
+            self._prefix = self._generate('').split('$', 1)[0]
+        return pwhash.split('$', 1)[0] != self._prefix
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        completed = stats['completed'] or 1
+        stats['avg_queue_ms'] = stats['queue_seconds'] / completed * 1000
+        stats['avg_hash_ms'] = stats['hash_seconds'] / completed * 1000
+        return stats
+
+# Used outside an application (e.g. scripts), hashing inline with werkzeug's defaults
+_fallback = PasswordHasher(workers=0)
+
+def get_hasher():
+    if has_app_context():
+        return current_app.extensions.get('password_hasher', _fallback)
+    return _fallback
@@ -0,0 +1,203 @@
+from sqlalchemy import create_engine, select, insert, delete, func, case
+from app import db
+from app.models.user import User
+from app.models.health import Goal
+from app.models.summary import DailySummary
+from app.models.population import UserStats, PopulationStat
+from app.utils.identity import calculate_bmi
+from collections import namedtuple
+from datetime import datetime
+import multiprocessing
+import os
+import time
+
+# Users per task handed to a worker process
+CHUNK_SIZE = 500
+
+# user_stats columns summarised as distributions across users
+DISTRIBUTIONS = ('bmi', 'avg_sleep_hours', 'weekly_workout_minutes')
+PERCENTILES = (10, 25, 50, 75, 90)
+
+# WHO adult BMI categories: (name, upper bound); the last one is open-ended
+BMI_CATEGORIES = (('underweight', 18.5), ('normal', 25.0), ('overweight', 30.0), ('obese', None))
+
+PopulationRun = namedtuple('PopulationRun', ('users', 'processed', 'removed', 'workers', 'seconds', 'stats'))
+
+def _optional(value):
+    return None if value != value else value
+
+def compute_user_stats(connection, user_ids):
+    """Return user_stats rows for ``user_ids`` from two bulk reads.
+
+    All of the users' summary rows come back in one query ordered by user,
+    and the per-user figures are NumPy reductions over the user boundaries,
+    so the cost per user is a handful of array elements, not a query.
+    """
+    import numpy as np
+
+    heights = dict(connection.execute(select(User.id, User.height).where(User.id.in_(user_ids))).all())
+    rows = connection.execute(select(
+        DailySummary.user_id, DailySummary.day, DailySummary.sleep_hours,
+        DailySummary.workout_minutes, DailySummary.last_weight, DailySummary.updated_at
+    ).where(DailySummary.user_id.in_(user_ids)).order_by(DailySummary.user_id, DailySummary.day)).all()
+    if not rows:
+        return []
+
+    users, days, sleep, workout, weight, updated = zip(*rows)
+    users = np.array(users, dtype=np.int64)
+    days = np.array(days, dtype='datetime64[D]').astype(np.int64)
+    sleep = np.array(sleep, dtype=float)
+    workout = np.array(workout, dtype=float)
+    weight = np.array(weight, dtype=float)
+    updated = np.array(updated, dtype='datetime64[us]')
+
+    starts = np.flatnonzero(np.r_[True, users[1:] != users[:-1]])
+    ends = np.r_[starts[1:], len(users)]
+
+    def per_user_sum(values):
+        present = ~np.isnan(values)
+        return np.add.reduceat(np.where(present, values, 0.0), starts), np.add.reduceat(present.astype(np.int64), starts)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sleep_total, nights = per_user_sum(sleep)
+        avg_sleep = sleep_total / nights
+        workout_total, workout_days = per_user_sum(workout)
+        # Minutes per week over the span from the first to the last logged day
+        weeks = np.maximum((days[ends - 1] - days[starts] + 1) / 7, 1.0)
+        weekly_workout = np.where(workout_days > 0, workout_total / weeks, np.nan)
+
+    # Summaries are ordered by day, so the last row with a weight holds the latest one
+    last = np.maximum.reduceat(np.where(np.isnan(weight), -1, np.arange(len(weight))), starts)
+    latest_weight = np.where(last >= 0, weight[last], np.nan)
+    newest_update = np.maximum.reduceat(updated, starts)
+
+    result = []
+    for user_id, logged, current, sleep_hours, minutes, changed in zip(
+        users[starts].tolist(), (ends - starts).tolist(), latest_weight.tolist(),
+        avg_sleep.tolist(), weekly_workout.tolist(), newest_update.tolist()
+    ):
+        current = _optional(current)
+        result.append(dict(
+            user_id=user_id,
+            latest_weight=current,
+            bmi=calculate_bmi(current, heights.get(user_id)),
+            avg_sleep_hours=_optional(sleep_hours),
+            weekly_workout_minutes=_optional(minutes),
+            summary_days=logged,
+            summary_updated_at=changed
+        ))
+    return result
+
+# Each worker process opens its own engine; nothing is inherited from the parent
+_engine = None
+
+def _init_worker(database_url):
+    global _engine
+    _engine = create_engine(database_url)
+
+def _compute_chunk(user_ids):
+    with _engine.connect() as connection:
+        return compute_user_stats(connection, user_ids)
+
+def changed_users(full=False):
+    """Return (user ids to recompute, user ids whose stats should go).
+
+    A user is recomputed when the row count or newest updated_at of their
+    daily summaries differs from what their user_stats row was computed from,
+    which catches added, changed and deleted days alike.
+    """
+    current = {
+        user_id: (days, updated_at) for user_id, days, updated_at in db.session.execute(
+            select(DailySummary.user_id, func.count(DailySummary.id), func.max(DailySummary.updated_at))
+            .group_by(DailySummary.user_id)
+        )
+    }
+    stored = {
+        user_id: (days, updated_at) for user_id, days, updated_at in db.session.execute(
+            select(UserStats.user_id, UserStats.summary_days, UserStats.summary_updated_at)
+        )
+    }
+    changed = sorted(user_id for user_id, fingerprint in current.items() if full or stored.get(user_id) != fingerprint)
+    removed = sorted(stored.keys() - current.keys())
+    return changed, removed
+
+def _store_user_stats(rows, computed_at):
+    if not rows:
+        return
+    db.session.execute(delete(UserStats).where(UserStats.user_id.in_([row['user_id'] for row in rows])))
+    db.session.execute(insert(UserStats), [dict(row, computed_at=computed_at) for row in rows])
+    db.session.commit()
+
+def summarize_population():
+    """Recompute every population_stats row from user_stats and the goals table.
+
+    Returns the rows as (metric, bucket, value, count). Does not commit.
+    """
+    import numpy as np
+
+    rows = db.session.execute(select(*(getattr(UserStats, name) for name in DISTRIBUTIONS))).all()
+    values = np.array([tuple(row) for row in rows], dtype=float).reshape(-1, len(DISTRIBUTIONS))
+
+    stats = []
+    for name, column in zip(DISTRIBUTIONS, values.T):
+        present = column[~np.isnan(column)]
+        count = len(present)
+        stats.append((name, 'mean', float(present.mean()) if count else None, count))
+        for percentile, value in zip(PERCENTILES, np.percentile(present, PERCENTILES) if count else [None] * len(PERCENTILES)):
+            stats.append((name, f'p{percentile}', None if value is None else float(value), count))
+
+    bmi = values[:, DISTRIBUTIONS.index('bmi')]
+    bmi = bmi[~np.isnan(bmi)]
+    bounds = [bound for _, bound in BMI_CATEGORIES[:-1]]
+    counts = np.bincount(np.searchsorted(bounds, bmi, side='right'), minlength=len(BMI_CATEGORIES))
+    for (category, _), count in zip(BMI_CATEGORIES, counts.tolist()):
+        stats.append(('bmi_category', category, count / len(bmi) * 100 if len(bmi) else None, count))
+
+    # Goals are few per user, so one grouped query covers the whole population
+    for goal_type, total, achieved in db.session.execute(
+        select(Goal.goal_type, func.count(Goal.id), func.sum(case((Goal.achieved.is_(True), 1), else_=0)))
+        .group_by(Goal.goal_type).order_by(Goal.goal_type)
+    ):
+        stats.append(('goal_achievement', goal_type, achieved / total * 100, total))
+
+    now = datetime.utcnow()
+    db.session.execute(delete(PopulationStat))
+    db.session.execute(insert(PopulationStat), [
+        dict(metric=metric, bucket=bucket, value=value, count=count, computed_at=now)
+        for metric, bucket, value, count in stats
+    ])
+    return stats
+
+def refresh_population_stats(workers=None, chunk_size=CHUNK_SIZE, full=False):
+    """Update user_stats for users whose summaries changed, then population_stats.
+
+    Changed users are split into chunks of ``chunk_size`` and computed by
+    ``workers`` processes (default: one per CPU); this process writes the
+    results as chunks complete. ``full`` recomputes everyone, e.g. after
+    heights were edited, which the summary fingerprint does not see.
+    Commits and returns a PopulationRun.
+    """
+    began = time.perf_counter()
+    changed, removed = changed_users(full)
+    if removed:
+        db.session.execute(delete(UserStats).where(UserStats.user_id.in_(removed)))
+        db.session.commit()
+
+    chunks = [changed[start:start + chunk_size] for start in range(0, len(changed), chunk_size)]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(chunks)))
+    computed_at = datetime.utcnow()
+    if workers == 1:
+        for chunk in chunks:
+            _store_user_stats(compute_user_stats(db.session.connection(), chunk), computed_at)
+    else:
+        # spawn rather than fork: the parent holds pooled connections and worker threads
+        database_url = db.engine.url.render_as_string(hide_password=False)
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(workers, initializer=_init_worker, initargs=(database_url,)) as pool:
+            for rows in pool.imap_unordered(_compute_chunk, chunks):
+                _store_user_stats(rows, computed_at)
+
+    stats = summarize_population()
+    db.session.commit()
+    users = db.session.query(func.count(User.id)).scalar()
+    return PopulationRun(users, len(changed), len(removed), workers, time.perf_counter() - began, stats)
@@ -0,0 +1,193 @@
+from flask import current_app
+from markupsafe import Markup, escape
+from sqlalchemy import select, insert, literal, func, text, and_, or_
+from sqlalchemy.engine import make_url
+from app import db
+from app.models.health import WeightLog, NutritionLog, WorkoutLog, SleepLog
+from app.models.search import SearchEntry
+from app.utils.aggregates import as_date
+from app.utils.archive import iter_archived
+from collections import namedtuple
+from datetime import datetime, time, timedelta
+import os
+import re
+
+# Log kind -> (model, free-text columns that are searchable)
+SOURCES = {
+    'weight': (WeightLog, ('notes',)),
+    'nutrition': (NutritionLog, ('meal_type', 'food_items', 'notes')),
+    'workout': (WorkoutLog, ('workout_type', 'notes')),
+    'sleep': (SleepLog, ('notes',)),
+}
+
+# Backends with a full-text index on search_entries
+INDEXED_BACKENDS = ('sqlite', 'postgresql')
+
+# Only word characters reach the query syntax, so user input cannot inject operators
+TERM = re.compile(r'\w+')
+MAX_TERMS = 8
+
+# Snippet highlight markers; control characters never occur in logged text
+MARK_START, MARK_END = '\x02', '\x03'
+
+SearchResult = namedtuple('SearchResult', ('kind', 'log_id', 'day', 'snippet', 'score'))
+
+def init_app(app):
+    # Unindexed LIKE scans on other databases are for test setups only
+    app.config.setdefault('SEARCH_SUBSTRING_FALLBACK', os.environ.get(
+        'SEARCH_SUBSTRING_FALLBACK', 'false').strip().lower() in ('1', 'true', 'yes', 'on'))
+    backend = make_url(app.config['SQLALCHEMY_DATABASE_URI']).get_backend_name()
+    if backend not in INDEXED_BACKENDS and not app.config['SEARCH_SUBSTRING_FALLBACK']:
+        raise RuntimeError(
+            f'Search needs SQLite (FTS5) or PostgreSQL, not {backend}. '
+            'Set SEARCH_SUBSTRING_FALLBACK=true to scan entries without an index (tests only).'
+        )
+
+class SearchPage:
+    """One page of ranked results; pages are numbered from 1."""
+
+    def __init__(self, items, page, has_next):
+        self.items = items
+        self.page = page
+        self.has_next = has_next
+
+    @property
+    def has_prev(self):
+        return self.page > 1
+
+def _body(model, columns):
+    parts = [func.coalesce(getattr(model, name), '') for name in columns]
+    body = parts[0]
+    for part in parts[1:]:
+        body = body + ' ' + part
+    return func.trim(body)
+
+def index_logs(user_id, kind, days=None):
+    """Rebuild the search entries of one user's ``kind`` logs on ``days`` (default: every day).
+
+    The refresh is one DELETE and one INSERT ... SELECT over the logs of
+    those days, mirroring refresh_daily_summary, plus an insert of any
+    archived logs of those days. Does not commit.
+    """
+    model, columns = SOURCES[kind]
+    stale = SearchEntry.query.filter_by(user_id=user_id, kind=kind)
+    source = select(
+        model.user_id, literal(kind), model.id, func.date(model.date), _body(model, columns)
+    ).where(model.user_id == user_id, or_(*(getattr(model, name).isnot(None) for name in columns)))
+
+    if days is not None:
+        days = sorted({as_date(day) for day in days})
+        if not days:
+            return
+        stale = stale.filter(SearchEntry.day.in_(days))
+        starts = [datetime.combine(day, time.min) for day in days]
+        source = source.where(or_(*(
+            and_(model.date >= start, model.date < start + timedelta(days=1)) for start in starts
+        )))
+
+    stale.delete(synchronize_session=False)
+    db.session.execute(insert(SearchEntry).from_select(['user_id', 'kind', 'log_id', 'day', 'body'], source))
+
+    # Same body as _body builds in SQL
+    archived = [
+        dict(user_id=user_id, kind=kind, log_id=row['id'], day=row['date'].date(),
+             body=' '.join(row[name] or '' for name in columns).strip(' '))
+        for row in iter_archived(user_id, kind, days)
+        if any(row[name] is not None for name in columns)
+    ]
+    if archived:
+        db.session.execute(insert(SearchEntry), archived)
+
+def rebuild_search_index(user_ids):
+    """Reindex every log of the given users, committing once per user."""
+    for user_id in user_ids:
+        for kind in SOURCES:
+            index_logs(user_id, kind)
+        db.session.commit()
+
+def search(user_id, query, kind=None, page=1, per_page=20):
+    """Return a SearchPage of the user's logs matching every word of ``query``, best first.
+
+    The last word also matches as a prefix, so partial input finds results.
+    Ranking is BM25 on SQLite and ts_rank on PostgreSQL, newest first on ties.
+    Other databases are refused at startup unless SEARCH_SUBSTRING_FALLBACK
+    allows unranked substring matching, newest first.
+    """
+    terms = TERM.findall(query.lower())[:MAX_TERMS]
+    if not terms:
+        return SearchPage([], page, False)
+
+    # One extra row tells whether another page follows without counting every match
+    limit, offset = per_page + 1, (page - 1) * per_page
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        statement, params = _sqlite_query(user_id, terms, kind)
+    elif dialect == 'postgresql':
+        statement, params = _postgresql_query(user_id, terms, kind)
+    elif current_app.config['SEARCH_SUBSTRING_FALLBACK']:
+        current_app.logger.warning('search on %s scans every entry of the user without an index', dialect)
+        items = _like_search(user_id, terms, kind, limit, offset)
+        return SearchPage(items[:per_page], page, len(items) > per_page)
+    else:
+        raise RuntimeError(f'Search needs SQLite (FTS5) or PostgreSQL, not {dialect}')
+
+    params.update(limit=limit, offset=offset)
+    rows = db.session.execute(text(statement), params).all()
+    items = [SearchResult(row.kind, row.log_id, as_date(row.day), row.snippet, row.score) for row in rows[:per_page]]
+    return SearchPage(items, page, len(rows) > per_page)
+
+def _sqlite_query(user_id, terms, kind):
+    phrases = ' '.join(f'"{term}"' for term in terms) + '*'
+    match = f'user_id:"{user_id}" AND body:({phrases})'
+    if kind is not None:
+        match += f' AND kind:"{kind}"'
+    statement = '''
+        SELECT e.kind, e.log_id, e.day,
+               snippet(search_entries_fts, 2, :mark_start, :mark_end, '...', 16) AS snippet,
+               bm25(search_entries_fts, 0.0, 0.0, 1.0) AS score
+        FROM search_entries_fts
+        JOIN search_entries e ON e.id = search_entries_fts.rowid
+        WHERE search_entries_fts MATCH :match
+        ORDER BY score, e.day DESC
+        LIMIT :limit OFFSET :offset
+    '''
+    return statement, dict(match=match, mark_start=MARK_START, mark_end=MARK_END)
+
+def _postgresql_query(user_id, terms, kind):
+    tsquery = ' & '.join(terms) + ':*'
+    statement = f'''
+        SELECT e.kind, e.log_id, e.day,
+               ts_headline('english', e.body, q, :headline_options) AS snippet,
+               ts_rank(e.document, q) AS score
+        FROM search_entries e, to_tsquery('english', :tsquery) q
+        WHERE e.user_id = :user_id AND e.document @@ q {'AND e.kind = :kind' if kind else ''}
+        ORDER BY score DESC, e.day DESC
+        LIMIT :limit OFFSET :offset
+    '''
+    options = f'StartSel={MARK_START}, StopSel={MARK_END}, MaxWords=16, MinWords=6'
+    return statement, dict(tsquery=tsquery, user_id=user_id, kind=kind, headline_options=options)
+
+def _like_search(user_id, terms, kind, limit, offset):
+    # Without a full-text index every entry of the user is scanned, so this suits small installs only
+    query = select(SearchEntry.kind, SearchEntry.log_id, SearchEntry.day, SearchEntry.body).where(
+        SearchEntry.user_id == user_id,
+        *(func.lower(SearchEntry.body).contains(term, autoescape=True) for term in terms)
+    )
+    if kind is not None:
+        query = query.where(SearchEntry.kind == kind)
+    rows = db.session.execute(
+        query.order_by(SearchEntry.day.desc(), SearchEntry.id.desc()).limit(limit).offset(offset)
+    ).all()
+    matched = re.compile('|'.join(re.escape(term) for term in terms), re.IGNORECASE)
+    return [
+        SearchResult(row.kind, row.log_id, as_date(row.day),
+                     matched.sub(lambda found: MARK_START + found.group() + MARK_END, row.body), 0.0)
+        for row in rows
+    ]
+
+def highlight(snippet):
+    """Snippet as HTML with the matched words in <mark> and everything else escaped."""
+    return Markup(str(escape(snippet)).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>'))
+
+def plain(snippet):
+    return snippet.replace(MARK_START, '').replace(MARK_END, '')
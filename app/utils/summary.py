@@ -0,0 +1,278 @@
+from sqlalchemy import func, select, insert, true
+from app import db
+from app.models.user import User
+from app.models.health import WeightLog, NutritionLog, WorkoutLog, SleepLog
+from app.models.summary import DailySummary
+from app.utils.aggregates import as_date
+from app.utils.archive import MODELS as LOG_MODELS, archived_arrays, archived_days, has_archive
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+def _nutrition_columns():
+    return [
+        func.count(NutritionLog.id).label('nutrition_count'),
+        func.sum(NutritionLog.calories).label('calories'),
+        func.sum(NutritionLog.protein).label('protein'),
+        func.sum(NutritionLog.carbs).label('carbs'),
+        func.sum(NutritionLog.fat).label('fat'),
+    ]
+
+def _workout_columns():
+    return [
+        func.count(WorkoutLog.id).label('workout_count'),
+        func.sum(WorkoutLog.duration).label('workout_minutes'),
+        func.sum(WorkoutLog.calories_burned).label('calories_burned'),
+        func.sum(WorkoutLog.distance).label('distance'),
+    ]
+
+def _sleep_columns():
+    return [
+        func.count(SleepLog.id).label('sleep_count'),
+        func.sum(SleepLog.hours).label('sleep_hours'),
+        func.avg(SleepLog.quality).label('avg_sleep_quality'),
+    ]
+
+# Aggregated log tables and the DailySummary columns each one fills
+SOURCES = [
+    (NutritionLog, _nutrition_columns, 'nutrition_count', ('calories', 'protein', 'carbs', 'fat')),
+    (WorkoutLog, _workout_columns, 'workout_count', ('workout_minutes', 'calories_burned', 'distance')),
+    (SleepLog, _sleep_columns, 'sleep_count', ('sleep_hours', 'avg_sleep_quality')),
+]
+
+# Archived rows are aggregated outside SQL: kind -> (count key, [(summary field, log column)]).
+# avg_sleep_quality is averaged, every other field summed; weight only fills last_weight.
+ARCHIVED_FIELDS = {
+    'nutrition': ('nutrition_count', [(name, name) for name in ('calories', 'protein', 'carbs', 'fat')]),
+    'workout': ('workout_count', [('workout_minutes', 'duration'), ('calories_burned', 'calories_burned'), ('distance', 'distance')]),
+    'sleep': ('sleep_count', [('sleep_hours', 'hours'), ('avg_sleep_quality', 'quality')]),
+}
+
+def _log_columns(kind):
+    return ['weight'] if kind == 'weight' else [column for _, column in ARCHIVED_FIELDS[kind][1]]
+
+def _add_partials(kind, dates, ids, values, partials):
+    """Add per-day partial aggregates of rows sorted by (date, id) to ``partials``.
+
+    A partial holds the row count, (sum, non-NULL count) per field and the
+    (date, id) key of the last weight, so partials of the same day from the
+    archive and the live table add up to what SQL would return for both.
+    """
+    import numpy as np
+
+    if not len(dates):
+        return
+    days = np.asarray(dates).astype('datetime64[D]')
+    starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+    ends = np.r_[starts[1:], len(days)]
+    day_list = days[starts].tolist()
+
+    if kind == 'weight':
+        weights = values['weight']
+        for day, last in zip(day_list, (ends - 1).tolist()):
+            key = (dates[last].astype('datetime64[us]').item(), int(ids[last]))
+            current = partials[day].get('last_weight')
+            if current is None or key > current[0]:
+                partials[day]['last_weight'] = (key, float(weights[last]))
+        return
+
+    count_key, fields = ARCHIVED_FIELDS[kind]
+    columns = {}
+    for field, column in fields:
+        present = ~np.isnan(values[column])
+        totals = np.add.reduceat(np.where(present, values[column], 0.0), starts).tolist()
+        counts = np.add.reduceat(present.astype(np.int64), starts).tolist()
+        columns[field] = (totals, counts)
+    for position, (day, rows) in enumerate(zip(day_list, (ends - starts).tolist())):
+        partial = partials[day]
+        partial[count_key] = partial.get(count_key, 0) + rows
+        for field, (totals, counts) in columns.items():
+            total, present = partial.get(field, (0.0, 0))
+            partial[field] = (total + totals[position], present + counts[position])
+
+def _add_live_partials(user_id, days, partials):
+    # The live rows of days that also have archived rows, read as arrays
+    import numpy as np
+
+    start = datetime.combine(min(days), time.min)
+    end = datetime.combine(max(days), time.min) + timedelta(days=1)
+    for kind, model in LOG_MODELS.items():
+        names = _log_columns(kind)
+        rows = [row for row in db.session.execute(
+            select(model.date, model.id, *(getattr(model, name) for name in names)).where(
+                model.user_id == user_id, model.date >= start, model.date < end
+            ).order_by(model.date, model.id)
+        ) if row[0].date() in days]
+        if rows:
+            columns = list(zip(*rows))
+            _add_partials(
+                kind,
+                np.array(columns[0], dtype='datetime64[us]'),
+                np.array(columns[1], dtype=np.int64),
+                {name: np.array(column, dtype=float) for name, column in zip(names, columns[2:])},
+                partials
+            )
+
+def _archived_partials(user_id, first=None, last=None):
+    partials = defaultdict(dict)
+    for kind in LOG_MODELS:
+        for dates, ids, values in archived_arrays(user_id, kind, _log_columns(kind), first, last):
+            _add_partials(kind, dates, ids, values, partials)
+    return partials
+
+def _partial_totals(partial):
+    # The same mapping the SQL aggregates produce
+    totals = {}
+    for count_key, fields in ARCHIVED_FIELDS.values():
+        totals[count_key] = partial.get(count_key, 0)
+        for field, _ in fields:
+            total, present = partial.get(field, (0.0, 0))
+            if not present:
+                totals[field] = None
+            elif field == 'avg_sleep_quality':
+                totals[field] = total / present
+            elif isinstance(DailySummary.__table__.c[field].type, db.Integer):
+                totals[field] = int(round(total))
+            else:
+                totals[field] = total
+    totals['last_weight'] = partial['last_weight'][1] if 'last_weight' in partial else None
+    return totals
+
+def _summary_values(totals):
+    values = {}
+    for _, _, count_key, fields in SOURCES:
+        logged = totals.get(count_key)
+        for field in fields:
+            # Days with logs get zeros for missing values; days without stay NULL
+            value = totals.get(field)
+            if field == 'avg_sleep_quality':
+                values[field] = value
+            else:
+                values[field] = (value or 0) if logged else None
+    values['last_weight'] = totals.get('last_weight')
+    return values
+
+def _is_empty(values):
+    return all(value is None for value in values.values())
+
+def _upsert(user_id, day, values):
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        summary = DailySummary.query.filter_by(user_id=user_id, day=day).first()
+        if summary is None:
+            summary = DailySummary(user_id=user_id, day=day)
+            db.session.add(summary)
+        for field, value in values.items():
+            setattr(summary, field, value)
+        summary.updated_at = datetime.utcnow()
+        return
+
+    # Atomic so concurrent writers for the same day don't trip the unique constraint
+    row = dict(values, user_id=user_id, day=day, updated_at=datetime.utcnow())
+    stmt = dialect_insert(DailySummary).values(**row)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id', 'day'],
+        set_={field: stmt.excluded[field] for field in row if field not in ('user_id', 'day')}
+    )
+    db.session.execute(stmt)
+
+def refresh_daily_summary(user_id, day):
+    """Recompute one user's summary row for ``day`` from that day's raw logs.
+
+    Only the logs of that single day are read (index range scans), so the cost
+    of a write does not grow with the user's history. A day that also has
+    archived logs is aggregated from both.
+    """
+    day = as_date(day)
+    if archived_days(user_id, [day]):
+        partials = _archived_partials(user_id, day, day)
+        _add_live_partials(user_id, {day}, partials)
+        _store_day(user_id, day, _summary_values(_partial_totals(partials[day])))
+        return
+
+    start = datetime.combine(day, time.min)
+    end = start + timedelta(days=1)
+
+    def in_day(model):
+        return (model.user_id == user_id, model.date >= start, model.date < end)
+
+    subqueries = [select(*columns()).where(*in_day(model)).subquery() for model, columns, _, _ in SOURCES]
+    last_weight = select(WeightLog.weight).where(*in_day(WeightLog)).order_by(
+        WeightLog.date.desc(), WeightLog.id.desc()
+    ).limit(1).scalar_subquery()
+
+    # Each subquery yields exactly one row, so joining them costs a single round trip
+    source = subqueries[0]
+    for subquery in subqueries[1:]:
+        source = source.join(subquery, true())
+    stmt = select(*(column for subquery in subqueries for column in subquery.c), last_weight.label('last_weight')).select_from(source)
+    totals = db.session.execute(stmt).one()._mapping
+    _store_day(user_id, day, _summary_values(totals))
+
+def _store_day(user_id, day, values):
+    if _is_empty(values):
+        DailySummary.query.filter_by(user_id=user_id, day=day).delete()
+    else:
+        _upsert(user_id, day, values)
+
+def rebuild_user_summaries(user_id):
+    """Recreate every summary row for one user with a few grouped queries.
+
+    Does not commit; returns the number of rows written.
+    """
+    days = defaultdict(dict)
+    for model, columns, _, _ in SOURCES:
+        day = func.date(model.date).label('day')
+        for row in db.session.execute(select(day, *columns()).where(model.user_id == user_id).group_by(day)):
+            days[as_date(row.day)].update(row._mapping)
+
+    day = func.date(WeightLog.date)
+    ranked = select(
+        day.label('day'),
+        WeightLog.weight,
+        func.row_number().over(
+            partition_by=day,
+            order_by=(WeightLog.date.desc(), WeightLog.id.desc())
+        ).label('position')
+    ).where(WeightLog.user_id == user_id).subquery()
+    for row in db.session.execute(select(ranked.c.day, ranked.c.weight).where(ranked.c.position == 1)):
+        days[as_date(row.day)]['last_weight'] = row.weight
+
+    # Archived days are aggregated from the memory-mapped columns; the few days
+    # that also have live rows are recomputed from both
+    if has_archive(user_id):
+        partials = _archived_partials(user_id)
+        overlap = partials.keys() & days.keys()
+        if overlap:
+            _add_live_partials(user_id, overlap, partials)
+        for summary_day, partial in partials.items():
+            days[summary_day] = _partial_totals(partial)
+
+    now = datetime.utcnow()
+    rows = [
+        dict(_summary_values(totals), user_id=user_id, day=summary_day, updated_at=now)
+        for summary_day, totals in sorted(days.items())
+    ]
+
+    DailySummary.query.filter_by(user_id=user_id).delete()
+    if rows:
+        db.session.execute(insert(DailySummary), rows)
+    return len(rows)
+
+def rebuild_daily_summaries(user_ids=None):
+    """Recreate all summary rows for the given users (default: everyone).
+
+    Commits once per user and returns the number of rows written.
+    """
+    if user_ids is None:
+        user_ids = [user_id for (user_id,) in db.session.query(User.id).order_by(User.id)]
+
+    written = 0
+    for user_id in user_ids:
+        written += rebuild_user_summaries(user_id)
+        db.session.commit()
+
+    return written
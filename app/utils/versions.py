@@ -0,0 +1,52 @@
+from sqlalchemy import select
+from app import db
+from app.models.version import DataVersion
+from datetime import datetime
+
+# Data sets with a version: the four log types and goals
+KINDS = ('weight', 'nutrition', 'workout', 'sleep', 'goals')
+
+def bump_versions(user_id, *kinds):
+    """Advance the user's version of each of ``kinds``.
+
+    Call it in the transaction of the write, so the new version commits with
+    the data it describes. Does not commit.
+    """
+    now = datetime.utcnow()
+    rows = [dict(user_id=user_id, kind=kind, version=1, updated_at=now) for kind in kinds]
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        for row in rows:
+            current = db.session.get(DataVersion, (user_id, row['kind']))
+            if current is None:
+                db.session.add(DataVersion(**row))
+            else:
+                current.version += 1
+        return
+
+    stmt = dialect_insert(DataVersion).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id', 'kind'],
+        set_={'version': DataVersion.version + 1, 'updated_at': now}
+    )
+    db.session.execute(stmt)
+
+def version_column(user_id, kind):
+    """Scalar subquery of one version, for reading versions alongside other data."""
+    return select(DataVersion.version).where(
+        DataVersion.user_id == user_id, DataVersion.kind == kind
+    ).scalar_subquery()
+
+def data_versions(user_id, kinds=KINDS):
+    """Return {kind: version} for the user; data sets never written are version 0."""
+    versions = dict.fromkeys(kinds, 0)
+    versions.update(db.session.execute(
+        select(DataVersion.kind, DataVersion.version).where(
+            DataVersion.user_id == user_id, DataVersion.kind.in_(kinds)
+        )
+    ).all())
+    return versions
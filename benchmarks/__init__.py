@@ -0,0 +1 @@
+# Performance checks, run as ``python -m benchmarks.<name>`` from the project root
@@ -0,0 +1,87 @@
+"""Time the NumPy trend analytics on multi-year histories.
+
+Populates a fresh database with ``benchmarks.datagen``, then times loading a
+user's summaries into arrays, computing the trends and a memoised lookup. The
+vectorised EWMA and rolling means are checked against plain Python loops
+first. Exits non-zero when a cold computation exceeds ``--max-ms``.
+
+    python -m benchmarks.analytics --years 5 --max-ms 50
+"""
+import argparse
+import math
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+def _reference_ewma(values, alpha):
+    level, result = values[0], []
+    for value in values:
+        level = (1 - alpha) * level + alpha * value
+        result.append(level)
+    return result
+
+def _reference_rolling(values, window):
+    result = []
+    for end in range(1, len(values) + 1):
+        present = [value for value in values[max(0, end - window):end] if not math.isnan(value)]
+        result.append(sum(present) / len(present) if present else math.nan)
+    return result
+
+def check_against_loops():
+    import numpy as np
+    from app.utils.analytics import TREND_ALPHA, ewma, rolling_mean
+
+    rng = np.random.default_rng(0)
+    values = 80 + np.cumsum(rng.normal(0, 0.3, 1000))
+    assert np.allclose(ewma(values), _reference_ewma(values, TREND_ALPHA))
+    values[rng.random(1000) < 0.3] = np.nan
+    for window in (7, 30):
+        assert np.allclose(rolling_mean(values, window), _reference_rolling(values, window), equal_nan=True)
+
+def timed(operation, runs):
+    timings = []
+    for _ in range(runs):
+        began = time.perf_counter()
+        operation()
+        timings.append((time.perf_counter() - began) * 1000)
+    return statistics.median(timings)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=2)
+    parser.add_argument('--years', type=float, default=5.0)
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--max-ms', type=float, default=50.0)
+    args = parser.parse_args(argv)
+
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'analytics.db')
+
+    from app import create_app
+    from app.utils import analytics
+    from benchmarks.datagen import populate
+
+    check_against_loops()
+
+    app = create_app()
+    with app.app_context():
+        user_ids, rows = populate(args.users, args.years)
+        user_id = user_ids[0]
+        today = datetime.utcnow().date()
+        goal = analytics.active_weight_goal(user_id)
+
+        load = timed(lambda: analytics.load_series(user_id, today), args.runs)
+        loaded = analytics.load_series(user_id, today)
+        compute = timed(lambda: analytics.compute_trends(loaded, today, goal), args.runs)
+        cold = timed(lambda: (analytics.invalidate_analytics(user_id), analytics.get_trends(user_id)), args.runs)
+        warm = timed(lambda: analytics.get_trends(user_id), args.runs)
+
+    print(f'{rows} rows, {len(loaded[1]["weight"])} days for the measured user')
+    print(f'load {load:.2f}ms  compute {compute:.2f}ms  cold get_trends {cold:.2f}ms  '
+          f'memoised {warm:.2f}ms (limit {args.max_ms:.0f}ms)')
+    return 1 if cold > args.max_ms else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
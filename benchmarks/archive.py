@@ -0,0 +1,123 @@
+"""Archive old logs and compare reads before and after.
+
+Populates a fresh database with ``benchmarks.datagen``, then times the
+first and a deep page of each history listing, a CSV export and a summary
+rebuild. It archives everything older than ``--days`` and repeats the same
+reads. The archived listings, exports and summaries must match the live ones
+exactly (summary floats up to rounding, as NumPy adds in a different order
+than SQL), and the script exits non-zero when they don't.
+
+    python -m benchmarks.archive --users 5 --years 5 --days 365
+"""
+import argparse
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+KINDS = ('weight', 'nutrition', 'workout', 'sleep')
+
+def _timed(function, *args, **kwargs):
+    began = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, (time.perf_counter() - began) * 1000
+
+def walk(user_id, kind, pages, per_page=20):
+    """Keys of the first ``pages`` history pages, as the history routes read them."""
+    from app.utils.archive import MODELS, archived_logs
+    from app.utils.pagination import keyset_paginate
+
+    model = MODELS[kind]
+    keys, cursor = [], None
+    for _ in range(pages):
+        page = keyset_paginate(model.query.filter_by(user_id=user_id), model, after=cursor,
+                               per_page=per_page, archive=archived_logs(user_id, kind))
+        keys += [(row.date, row.id) for row in page.items]
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    return keys
+
+def measure(user_id):
+    from app.models.summary import DailySummary
+    from app.utils.export import iter_csv
+    from app.utils.summary import rebuild_user_summaries
+
+    results = {}
+    for kind in KINDS:
+        _, first = _timed(walk, user_id, kind, 1)
+        keys, deep = _timed(walk, user_id, kind, 50)
+        export, export_ms = _timed(lambda: b''.join(iter_csv(user_id, kind)))
+        results[kind] = dict(keys=keys, export=export, first=first, deep=deep / 50, export_ms=export_ms)
+    _, rebuild = _timed(rebuild_user_summaries, user_id)
+    summaries = [tuple(getattr(row, column.name) for column in DailySummary.__table__.columns
+                       if column.name not in ('id', 'updated_at'))
+                 for row in DailySummary.query.filter_by(user_id=user_id).order_by(DailySummary.day)]
+    return results, summaries, rebuild
+
+def same_summaries(live, archived):
+    return len(live) == len(archived) and all(
+        a == b or (isinstance(a, float) and isinstance(b, float) and math.isclose(a, b, rel_tol=1e-12))
+        for live_row, archived_row in zip(live, archived) for a, b in zip(live_row, archived_row)
+    )
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=5)
+    parser.add_argument('--years', type=float, default=5.0)
+    parser.add_argument('--days', type=int, default=365)
+    args = parser.parse_args(argv)
+
+    root = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(root, 'archive.db')
+    os.environ['ARCHIVE_DIR'] = os.path.join(root, 'archive')
+
+    from app import create_app, db
+    from app.utils.archive import MODELS, archive_user_logs, cutoff
+    from benchmarks.datagen import populate
+
+    app = create_app()
+    mismatched = []
+    with app.app_context():
+        user_ids, rows = populate(args.users, args.years)
+        user_id = user_ids[0]
+        print(f'{rows} rows for {args.users} users over {args.years:g} years\n')
+
+        live, live_summaries, live_rebuild = measure(user_id)
+        db.session.rollback()
+
+        moved, elapsed = 0, time.perf_counter()
+        for archived_user in user_ids:
+            for kind in MODELS:
+                moved += archive_user_logs(archived_user, kind, cutoff(archived_user, kind, args.days))
+        elapsed = time.perf_counter() - elapsed
+        remaining = sum(model.query.count() for model in MODELS.values())
+        size = sum(os.path.getsize(os.path.join(path, name))
+                   for path, _, names in os.walk(os.environ['ARCHIVE_DIR']) for name in names)
+        print(f'Archived {moved} rows older than {args.days} days in {elapsed:.1f}s '
+              f'({size / 1024 / 1024:.1f}MB on disk); {remaining} rows stay live\n')
+
+        archived, archived_summaries, archived_rebuild = measure(user_id)
+        db.session.rollback()
+
+    print(f'{"kind":10} {"first page":>17} {"deep page":>17} {"csv export":>19}')
+    for kind in KINDS:
+        before, after = live[kind], archived[kind]
+        print(f'{kind:10} {before["first"]:6.1f} -> {after["first"]:5.1f}ms '
+              f'{before["deep"]:6.1f} -> {after["deep"]:5.1f}ms {before["export_ms"]:7.0f} -> {after["export_ms"]:5.0f}ms')
+        if before['keys'] != after['keys'] or before['export'] != after['export']:
+            mismatched.append(kind)
+    print(f'summary rebuild {live_rebuild:.0f} -> {archived_rebuild:.0f}ms')
+    if not same_summaries(live_summaries, archived_summaries):
+        mismatched.append('summaries')
+
+    shutil.rmtree(root, ignore_errors=True)
+    if mismatched:
+        print(f'Archived reads differ from live ones: {", ".join(mismatched)}')
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,176 @@
+"""Hammer one SQLite database with writes from several processes.
+
+Each writer process builds its own app (as a gunicorn worker would) and
+repeatedly logs weight and a meal for its own user, going through the same
+``logs_changed`` summary refresh and commit as the web handlers. Optional
+reader processes load history pages at the same time. Reports throughput and
+latency, and exits non-zero if any write failed with ``database is locked``.
+``tests/test_concurrent_writes.py`` runs a short version of the same check.
+
+    python -m benchmarks.concurrent_writes --writers 4 --readers 2 --writes 200
+    python -m benchmarks.concurrent_writes --baseline   # rollback journal, synchronous=FULL
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+def _app(uri, baseline):
+    os.environ['DATABASE_URL'] = uri
+    if baseline:
+        os.environ['SQLITE_JOURNAL_MODE'] = 'DELETE'
+        os.environ['SQLITE_SYNCHRONOUS'] = 'FULL'
+    from app import create_app
+    return create_app()
+
+def writer(uri, baseline, user_id, writes, start, results):
+    from sqlalchemy.exc import OperationalError
+    from app import db
+    from app.models.health import WeightLog, NutritionLog
+    from app.utils.hooks import logs_changed
+
+    app = _app(uri, baseline)
+    latencies, errors = [], 0
+    start.wait()
+    with app.app_context():
+        for i in range(writes):
+            when = datetime.utcnow() - timedelta(days=i % 60, minutes=i)
+            began = time.perf_counter()
+            try:
+                db.session.add(WeightLog(user_id=user_id, weight=70 + i % 10, date=when))
+                db.session.add(NutritionLog(user_id=user_id, meal_type='lunch', food_items='soup',
+                                            calories=400, protein=20, carbs=40, fat=10, date=when))
+                logs_changed(user_id, 'weight', [when.date()])
+                logs_changed(user_id, 'nutrition', [when.date()])
+                db.session.commit()
+            except OperationalError as exc:
+                db.session.rollback()
+                if 'locked' not in str(exc):
+                    raise
+                errors += 1
+            else:
+                latencies.append(time.perf_counter() - began)
+    results.put(('writer', latencies, errors))
+
+def reader(uri, baseline, user_id, stop, start, results):
+    from sqlalchemy.exc import OperationalError
+    from app import db
+    from app.models.health import WeightLog
+    from app.utils.aggregates import daily_nutrition, days_ago
+
+    app = _app(uri, baseline)
+    latencies, errors = [], 0
+    start.wait()
+    with app.app_context():
+        while not stop.is_set():
+            began = time.perf_counter()
+            try:
+                WeightLog.query.filter_by(user_id=user_id).order_by(WeightLog.date.desc()).limit(20).all()
+                daily_nutrition(user_id, days_ago(30))
+                db.session.rollback()
+            except OperationalError as exc:
+                db.session.rollback()
+                if 'locked' not in str(exc):
+                    raise
+                errors += 1
+            else:
+                latencies.append(time.perf_counter() - began)
+    results.put(('reader', latencies, errors))
+
+def setup(uri, baseline, users):
+    from app import db
+    from app.models.user import User
+
+    app = _app(uri, baseline)
+    with app.app_context():
+        for n in range(users):
+            user = User(username=f'bench{n}', email=f'bench{n}@example.com')
+            user.set_password('bench')
+            db.session.add(user)
+        db.session.commit()
+        mode = db.session.connection().exec_driver_sql('PRAGMA journal_mode').scalar()
+        ids = [user.id for user in User.query.order_by(User.id)]
+    return ids, mode
+
+def _collect(results, processes, count):
+    # Don't wait forever on a worker that crashed before reporting
+    collected = []
+    while len(collected) < count:
+        try:
+            collected.append(results.get(timeout=1))
+        except queue.Empty:
+            if any(process.exitcode not in (None, 0) for process in processes):
+                raise SystemExit('a benchmark process failed, see the traceback above')
+    return collected
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def run(uri, writers, readers, writes, baseline=False):
+    """Run the processes against ``uri`` and return their latencies and lock errors per role."""
+    user_ids, mode = setup(uri, baseline, max(writers, 1))
+
+    ctx = multiprocessing.get_context('spawn')
+    start, stop, results = ctx.Event(), ctx.Event(), ctx.Queue()
+    writer_processes = [ctx.Process(target=writer, args=(uri, baseline, user_ids[n], writes, start, results))
+                        for n in range(writers)]
+    reader_processes = [ctx.Process(target=reader, args=(uri, baseline, user_ids[n % len(user_ids)], stop, start, results))
+                        for n in range(readers)]
+    for process in writer_processes + reader_processes:
+        process.start()
+
+    # Let every process finish building its app before the clock starts
+    time.sleep(3)
+    began = time.perf_counter()
+    start.set()
+    collected = _collect(results, writer_processes, len(writer_processes))
+    elapsed = time.perf_counter() - began
+    stop.set()
+    collected += _collect(results, reader_processes, len(reader_processes))
+    for process in writer_processes + reader_processes:
+        process.join()
+
+    report = dict(mode=mode, elapsed=elapsed)
+    for role in ('writer', 'reader'):
+        latencies = [value for kind, values, _ in collected if kind == role for value in values]
+        errors = sum(count for kind, _, count in collected if kind == role)
+        report[role] = (latencies, errors)
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=2)
+    parser.add_argument('--writes', type=int, default=200, help='Commits per writer.')
+    parser.add_argument('--baseline', action='store_true', help='Use the old rollback-journal settings.')
+    args = parser.parse_args(argv)
+
+    uri = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'concurrency.db')
+    report = run(uri, args.writers, args.readers, args.writes, args.baseline)
+
+    for role in ('writer', 'reader'):
+        latencies, errors = report[role]
+        if latencies or errors:
+            print(f'{role}s: {len(latencies)} ok, {errors} locked, '
+                  f'p50 {percentile(latencies, 0.5) * 1000:.1f}ms, p95 {percentile(latencies, 0.95) * 1000:.1f}ms, '
+                  f'max {max(latencies, default=0) * 1000:.1f}ms')
+
+    commits = len(report['writer'][0])
+    elapsed = report['elapsed']
+    print(f'journal_mode={report["mode"]} writers={args.writers} readers={args.readers}: '
+          f'{commits} commits in {elapsed:.2f}s ({commits / elapsed:.0f}/s)')
+    if report['writer'][0]:
+        print(f'mean write latency {statistics.mean(report["writer"][0]) * 1000:.1f}ms')
+
+    return 1 if report['writer'][1] or report['reader'][1] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""Populate a database with synthetic users and years of realistic logs.
+
+Each user gets a slowly drifting daily weight, three or four meals a day,
+four or so workouts a week, a night of sleep most days and a few goals,
+with the gaps real people leave. Rows are written with executemany inserts
+and the daily summaries and search index are rebuilt at the end, so the
+result looks like a database that grew through the app.
+
+    python -m benchmarks.datagen --users 20 --years 2
+    python -m benchmarks.datagen --users 5 --years 1 --database-url postgresql://localhost/health_bench
+
+All generated users share the password ``benchmark-password``.
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+PASSWORD = 'benchmark-password'
+BATCH_SIZE = 5000
+
+MEALS = (
+    ('breakfast', 7, (250, 600), 'oats, banana, coffee'),
+    ('lunch', 12, (450, 900), 'chicken, rice, salad'),
+    ('dinner', 19, (500, 1000), 'salmon, potatoes, greens'),
+    ('snack', 16, (100, 350), 'yogurt, nuts'),
+)
+WORKOUTS = (
+    ('Running', (20, 70), 11, 10.0),
+    ('Cycling', (30, 120), 8, 25.0),
+    ('Strength Training', (30, 75), 6, None),
+    ('Swimming', (20, 60), 9, 2.0),
+    ('Yoga', (20, 60), 3, None),
+    ('Walking', (20, 90), 4, 6.0),
+)
+
+class _Writer:
+    """Buffers rows per model and flushes them as executemany inserts."""
+
+    def __init__(self, db):
+        self.db = db
+        self.buffers = {}
+        self.written = 0
+
+    def add(self, model, row):
+        buffer = self.buffers.setdefault(model, [])
+        buffer.append(row)
+        if len(buffer) >= BATCH_SIZE:
+            self.flush(model)
+
+    def flush(self, model=None):
+        from sqlalchemy import insert
+
+        for key in ([model] if model else list(self.buffers)):
+            rows = self.buffers.get(key)
+            if rows:
+                self.db.session.execute(insert(key), rows)
+                self.written += len(rows)
+                self.buffers[key] = []
+
+def _user_logs(writer, rng, user_id, start, days):
+    from app.models.health import WeightLog, NutritionLog, WorkoutLog, SleepLog
+
+    weight = rng.uniform(55, 110)
+    trend = rng.uniform(-0.02, 0.01)  # kg per day
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        # Occasional holidays with no logging at all
+        if rng.random() < 0.03:
+            continue
+
+        weight = max(40.0, weight + trend + rng.gauss(0, 0.25))
+        if rng.random() < 0.8:
+            writer.add(WeightLog, dict(user_id=user_id, weight=round(weight, 1),
+                                       date=day.replace(hour=7, minute=rng.randint(0, 59))))
+
+        for meal_type, hour, (low, high), food_items in MEALS:
+            if meal_type == 'snack' and rng.random() < 0.5:
+                continue
+            if rng.random() < 0.1:
+                continue
+            calories = rng.randint(low, high)
+            writer.add(NutritionLog, dict(
+                user_id=user_id, meal_type=meal_type, calories=calories,
+                protein=round(calories * rng.uniform(0.04, 0.08), 1),
+                carbs=round(calories * rng.uniform(0.08, 0.14), 1),
+                fat=round(calories * rng.uniform(0.02, 0.045), 1),
+                food_items=food_items, date=day.replace(hour=hour, minute=rng.randint(0, 59))
+            ))
+
+        if rng.random() < 0.55:
+            workout_type, (low, high), burn_rate, speed = rng.choice(WORKOUTS)
+            duration = rng.randint(low, high)
+            writer.add(WorkoutLog, dict(
+                user_id=user_id, workout_type=workout_type, duration=duration,
+                calories_burned=duration * burn_rate,
+                distance=round(speed * duration / 60 * rng.uniform(0.8, 1.2), 2) if speed else None,
+                date=day.replace(hour=rng.choice((6, 12, 18)), minute=rng.randint(0, 59))
+            ))
+
+        if rng.random() < 0.9:
+            writer.add(SleepLog, dict(user_id=user_id, hours=round(min(12.0, max(3.0, rng.gauss(7.2, 1.0))), 1),
+                                      quality=rng.randint(3, 10), date=day.replace(hour=6, minute=30)))
+
+    return weight
+
+def _user_goals(writer, rng, user_id, start, days, weight):
+    from app.models.health import Goal
+
+    now = start + timedelta(days=days)
+    for n in range(rng.randint(1, 4)):
+        goal_start = start + timedelta(days=rng.randint(0, max(days - 1, 0)))
+        goal_type = rng.choice(('weight', 'nutrition', 'workout', 'sleep'))
+        target_value = {'weight': round(weight - rng.uniform(2, 8), 1), 'nutrition': 2000,
+                        'workout': 4, 'sleep': 8}[goal_type]
+        target_date = goal_start + timedelta(days=rng.randint(30, 240))
+        achieved = target_date < now and rng.random() < 0.5
+        writer.add(Goal, dict(
+            user_id=user_id, goal_type=goal_type, target_value=target_value, start_date=goal_start,
+            target_date=target_date, achieved=achieved, achieved_date=target_date if achieved else None,
+            description=f'{goal_type.capitalize()} goal {n + 1}'
+        ))
+
+def populate(users=10, years=1, seed=0, prefix='bench'):
+    """Create ``users`` users with ``years`` of history each; needs an app context.
+
+    Returns the new user ids. Commits once the summaries are rebuilt.
+    """
+    from app import db
+    from app.models.user import User
+    from app.utils.search import rebuild_search_index
+    from app.utils.summary import rebuild_daily_summaries
+
+    rng = random.Random(seed)
+    days = int(365 * years)
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    start = today - timedelta(days=days - 1)
+
+    # One hash shared by every user; hashing per user would dominate the run
+    template = User(username='template', email='template@example.com')
+    template.set_password(PASSWORD)
+
+    user_ids = []
+    for n in range(users):
+        user = User(username=f'{prefix}{n}', email=f'{prefix}{n}@example.com',
+                    password_hash=template.password_hash, height=round(rng.uniform(150, 200), 1),
+                    age=rng.randint(18, 80), gender=rng.choice(('male', 'female', 'non-binary')),
+                    created_at=start)
+        db.session.add(user)
+        db.session.flush()
+        user_ids.append(user.id)
+
+    writer = _Writer(db)
+    for user_id in user_ids:
+        weight = _user_logs(writer, rng, user_id, start, days)
+        _user_goals(writer, rng, user_id, start, days, weight)
+    writer.flush()
+    db.session.commit()
+
+    rebuild_daily_summaries(user_ids)
+    rebuild_search_index(user_ids)
+    return user_ids, writer.written
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--years', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--prefix', default='bench', help='Username prefix; must not clash with existing users.')
+    parser.add_argument('--database-url', help='Defaults to DATABASE_URL from the environment.')
+    args = parser.parse_args(argv)
+
+    if args.database_url:
+        import os
+        os.environ['DATABASE_URL'] = args.database_url
+
+    from app import create_app
+
+    app = create_app()
+    with app.app_context():
+        began = time.perf_counter()
+        user_ids, rows = populate(args.users, args.years, args.seed, args.prefix)
+        elapsed = time.perf_counter() - began
+    print(f'Created {len(user_ids)} users and {rows} rows in {elapsed:.1f}s ({rows / elapsed:.0f} rows/s).')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""Time history pages and the dashboard goals panel with and without the fragment cache.
+
+Populates a fresh database with ``benchmarks.datagen``, signs in through the
+test client and renders each page ``--runs`` times with the cache disabled,
+then with it enabled. It also checks that a cached page is byte-for-byte the
+page rendered without the cache and that a write makes it render afresh.
+
+    python -m benchmarks.fragments --years 2 --per-page 100
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+PAGES = ('/dashboard/panels/goals', '/health/weight/history', '/health/nutrition/history',
+         '/health/workout/history', '/health/sleep/history')
+
+def timings(client, url, runs):
+    result = []
+    for _ in range(runs):
+        began = time.perf_counter()
+        response = client.get(url)
+        result.append((time.perf_counter() - began) * 1000)
+        assert response.status_code == 200, (url, response.status_code)
+    return statistics.median(result)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--years', type=float, default=2.0)
+    parser.add_argument('--per-page', type=int, default=100)
+    parser.add_argument('--runs', type=int, default=30)
+    args = parser.parse_args(argv)
+
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'fragments.db')
+
+    from datetime import date
+    from app import create_app, db
+    from app.models.user import User
+    from benchmarks.datagen import PASSWORD, populate
+
+    app = create_app()
+    app.config['WTF_CSRF_ENABLED'] = False
+    with app.app_context():
+        (user_id,), rows = populate(1, args.years)
+        username = db.session.get(User, user_id).username
+    print(f'{rows} rows over {args.years:g} years; {args.per_page} rows per history page\n')
+
+    client = app.test_client()
+    assert client.post('/auth/login', data=dict(username=username, password=PASSWORD)).status_code == 302
+
+    cache = app.extensions['fragment_cache']
+    maxbytes = cache.maxbytes
+    print(f'{"page":28} {"uncached":>9} {"cached":>9}')
+    for page in PAGES:
+        url = page if page.startswith('/dashboard') else f'{page}?per_page={args.per_page}'
+        cache.maxbytes = 0
+        uncached = timings(client, url, args.runs)
+        expected = client.get(url).data
+        cache.maxbytes = maxbytes
+        client.get(url)
+        cached = timings(client, url, args.runs)
+        assert client.get(url).data == expected, f'{url} differs when served from the cache'
+        print(f'{page:28} {uncached:7.2f}ms {cached:7.2f}ms')
+
+    url = f'/health/weight/history?per_page={args.per_page}'
+    client.post('/health/weight', data=dict(weight=123.4, date=date.today().isoformat()))
+    assert b'123.4' in client.get(url).data, 'a write did not invalidate the cached history'
+
+    stats = cache.stats()
+    print(f'\n{stats["hits"]} hits, {stats["misses"]} misses, {stats["entries"]} fragments, '
+          f'{stats["bytes"] / 1024:.0f}KiB cached')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
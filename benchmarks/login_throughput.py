@@ -0,0 +1,111 @@
+"""Measure login throughput and page latency during a login burst.
+
+Runs ``--clients`` threads that log in over and over (as a threaded gunicorn
+worker would serve them) next to ``--browsers`` threads loading the dashboard
+as an already signed-in user. Reports successful and rejected (503) logins,
+latencies for both, and the password hasher's queue-time metrics.
+
+    python -m benchmarks.login_throughput --clients 16 --seconds 10
+    python -m benchmarks.login_throughput --hash-workers 0   # hash on the request thread, unbounded
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=16, help='Threads logging in concurrently.')
+    parser.add_argument('--browsers', type=int, default=2, help='Threads loading the dashboard meanwhile.')
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--hash-workers', type=int, default=2)
+    parser.add_argument('--hash-queue', type=int, default=4)
+    parser.add_argument('--method', default='', help='Werkzeug hash method, e.g. pbkdf2:sha256:600000.')
+    args = parser.parse_args(argv)
+
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'logins.db')
+    os.environ['PASSWORD_HASH_WORKERS'] = str(args.hash_workers)
+    os.environ['PASSWORD_HASH_QUEUE'] = str(args.hash_queue)
+    os.environ['PASSWORD_HASH_METHOD'] = args.method
+
+    from app import create_app, db
+    from app.models.user import User
+    from app.utils.passwords import PasswordHasher
+
+    app = create_app()
+    app.config['WTF_CSRF_ENABLED'] = False
+    with app.app_context():
+        for n in range(args.clients + args.browsers):
+            user = User(username=f'bench{n}', email=f'bench{n}@example.com')
+            user.set_password('correct horse battery')
+            db.session.add(user)
+        db.session.commit()
+    # Browsers sign in before the burst starts, so their own logins are never turned away
+    browsers = []
+    for n in range(args.browsers):
+        client = app.test_client()
+        assert client.post('/auth/login', data=dict(username=f'bench{args.clients + n}',
+                                                    password='correct horse battery')).status_code == 302
+        browsers.append(client)
+
+    # Fresh hasher so the metrics only cover the burst, not the setup above
+    app.extensions['password_hasher'] = PasswordHasher(
+        method=args.method, workers=args.hash_workers, queue_size=args.hash_queue,
+        timeout=app.config['PASSWORD_HASH_TIMEOUT']
+    )
+
+    deadline = time.perf_counter() + args.seconds
+    lock = threading.Lock()
+    logins, rejected, pages = [], [0], []
+
+    def login(n):
+        client = app.test_client()
+        while time.perf_counter() < deadline:
+            began = time.perf_counter()
+            response = client.post('/auth/login', data=dict(username=f'bench{n}', password='correct horse battery'))
+            elapsed = time.perf_counter() - began
+            with lock:
+                if response.status_code == 302:
+                    logins.append(elapsed)
+                elif response.status_code == 503:
+                    rejected[0] += 1
+                else:
+                    raise RuntimeError(f'unexpected login status {response.status_code}')
+            client.get('/auth/logout')
+
+    def browse(n):
+        client = browsers[n]
+        while time.perf_counter() < deadline:
+            began = time.perf_counter()
+            assert client.get('/dashboard').status_code == 200
+            with lock:
+                pages.append(time.perf_counter() - began)
+
+    threads = [threading.Thread(target=login, args=(n,)) for n in range(args.clients)]
+    threads += [threading.Thread(target=browse, args=(n,)) for n in range(args.browsers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    print(f'logins: {len(logins)} ok ({len(logins) / elapsed:.1f}/s), {rejected[0]} rejected as busy, '
+          f'p50 {percentile(logins, 0.5) * 1000:.0f}ms, p95 {percentile(logins, 0.95) * 1000:.0f}ms')
+    print(f'dashboard: {len(pages)} pages, p50 {percentile(pages, 0.5) * 1000:.1f}ms, '
+          f'p95 {percentile(pages, 0.95) * 1000:.1f}ms')
+    stats = app.extensions['password_hasher'].stats()
+    print('hasher: ' + ', '.join(f'{name}={value:.1f}' if isinstance(value, float) else f'{name}={value}'
+                                for name, value in stats.items()))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
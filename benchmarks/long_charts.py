@@ -0,0 +1,94 @@
+"""Check that chart payloads and render times stay bounded on long histories.
+
+Populates a fresh database with ``benchmarks.datagen`` and, for every chart
+kind and range, fetches the JSON series and renders the PNG in-process. Each
+must stay within ``CHART_POINTS`` points. Pass ``--raw`` to lift the budget
+and see what the same charts cost without downsampling. The vectorised LTTB
+is checked against a plain Python version first.
+
+    python -m benchmarks.long_charts --years 10
+    python -m benchmarks.long_charts --years 10 --raw
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+def _reference_lttb(points, threshold):
+    # Straightforward port of the original algorithm, one point at a time
+    length = len(points)
+    every = (length - 2) / (threshold - 2)
+    kept, a = [points[0]], 0
+    for i in range(threshold - 2):
+        start, end = int(i * every) + 1, int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, length)
+        following = points[end:next_end] or [points[-1]]
+        avg_x = sum(p[0] for p in following) / len(following)
+        avg_y = sum(p[1] for p in following) / len(following)
+        ax, ay = points[a]
+        best = max(range(start, end), key=lambda j: abs(
+            (ax - avg_x) * (points[j][1] - ay) - (ax - points[j][0]) * (avg_y - ay)))
+        kept.append(points[best])
+        a = best
+    kept.append(points[-1])
+    return kept
+
+def check_lttb():
+    import numpy as np
+    from app.utils.downsample import lttb
+
+    rng = np.random.default_rng(1)
+    x = np.cumsum(rng.integers(1, 4, 5000)).astype(float)
+    y = np.cumsum(rng.normal(0, 1, 5000))
+    kept = lttb(x, y, 300)
+    assert len(kept) == 300
+    reference = _reference_lttb(list(zip(x.tolist(), y.tolist())), 300)
+    assert [tuple(point) for point in np.column_stack((x[kept], y[kept])).tolist()] == reference
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--years', type=float, default=10.0)
+    parser.add_argument('--points', type=int, default=400)
+    parser.add_argument('--raw', action='store_true', help='Disable downsampling for comparison.')
+    args = parser.parse_args(argv)
+
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'charts.db')
+    os.environ['CHART_RENDER_WORKERS'] = '0'
+
+    from app import create_app
+    from app.utils.charts import CHARTS, RANGES, get_chart, get_chart_data, invalidate_charts
+    from benchmarks.datagen import populate
+
+    check_lttb()
+
+    app = create_app()
+    app.config['CHART_POINTS'] = 10 ** 9 if args.raw else args.points
+    over_budget = []
+    with app.test_request_context():
+        (user_id,), rows = populate(1, args.years)
+        print(f'{rows} rows over {args.years:g} years; budget {app.config["CHART_POINTS"]} points\n')
+        print(f'{"chart":10} {"range":5} {"days":>6} {"points":>7} {"method":>8} {"json":>9} {"render":>9}')
+        for kind in CHARTS:
+            for range_name in RANGES:
+                invalidate_charts(user_id)
+                data = get_chart_data(user_id, kind, range_name=range_name)
+                if data is None:
+                    continue
+                began = time.perf_counter()
+                get_chart(user_id, kind, range_name=range_name)
+                render = (time.perf_counter() - began) * 1000
+                size = len(json.dumps(data))
+                print(f'{kind:10} {range_name:5} {data["days"]:6} {len(data["x"]):7} {data["method"]:>8} '
+                      f'{size / 1024:7.1f}KB {render:7.0f}ms')
+                if not args.raw and len(data['x']) > args.points:
+                    over_budget.append(f'{kind}/{range_name}')
+
+    if over_budget:
+        print(f'Over the point budget: {", ".join(over_budget)}')
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
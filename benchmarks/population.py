@@ -0,0 +1,87 @@
+"""Time the population statistics job and check it against per-user queries.
+
+Populates a fresh database with ``benchmarks.datagen`` and runs a full
+``refresh_population_stats`` once per worker count in ``--workers``, reporting
+users per second. The vectorised per-user figures are checked against plain
+per-user ORM lookups for a sample of users. Finally, one user's logs change
+and an incremental run must recompute only that user.
+
+    python -m benchmarks.population --users 2000 --years 1 --workers 1 2 4
+"""
+import argparse
+import math
+import os
+import sys
+import tempfile
+
+def _close(a, b):
+    if a is None or b is None:
+        return a is b
+    return math.isclose(a, b, rel_tol=1e-9)
+
+def check_against_orm(user_ids, sample=25):
+    from app import db
+    from app.models.population import UserStats
+    from app.models.summary import DailySummary
+    from app.models.user import User
+
+    for user_id in user_ids[:sample]:
+        stats = db.session.get(UserStats, user_id)
+        user = db.session.get(User, user_id)
+        summaries = DailySummary.query.filter_by(user_id=user_id).order_by(DailySummary.day).all()
+        nights = [row.sleep_hours for row in summaries if row.sleep_hours is not None]
+        workouts = [row.workout_minutes for row in summaries if row.workout_minutes is not None]
+        weeks = max((summaries[-1].day - summaries[0].day).days + 1, 7) / 7
+        expected = dict(
+            bmi=user.get_bmi(),
+            avg_sleep_hours=sum(nights) / len(nights) if nights else None,
+            weekly_workout_minutes=sum(workouts) / weeks if workouts else None,
+        )
+        for name, value in expected.items():
+            assert _close(getattr(stats, name), value), (user_id, name, getattr(stats, name), value)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--years', type=float, default=1.0)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--chunk-size', type=int, default=250)
+    args = parser.parse_args(argv)
+
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'population.db')
+    os.environ['IDENTITY_CACHE_TTL'] = '0'
+
+    from app import create_app, db
+    from app.models.health import SleepLog
+    from app.utils.hooks import logs_changed
+    from app.utils.population import refresh_population_stats
+    from benchmarks.datagen import populate
+
+    app = create_app()
+    with app.app_context():
+        user_ids, rows = populate(args.users, args.years)
+        print(f'{rows} rows for {args.users} users over {args.years:g} years; {os.cpu_count()} CPUs\n')
+
+        baseline = None
+        for workers in args.workers:
+            run = refresh_population_stats(workers=workers, chunk_size=args.chunk_size, full=True)
+            rate = run.processed / run.seconds
+            baseline = baseline or rate
+            print(f'{run.workers} workers: {run.processed} users in {run.seconds:5.2f}s  '
+                  f'{rate:7.0f} users/s  ({rate / baseline:.1f}x)')
+
+        check_against_orm(user_ids)
+
+        log = SleepLog.query.filter_by(user_id=user_ids[-1]).first()
+        log.hours += 1
+        logs_changed(log.user_id, 'sleep', [log.date])
+        db.session.commit()
+        run = refresh_population_stats(workers=max(args.workers), chunk_size=args.chunk_size)
+        print(f'\nIncremental run after one change: {run.processed} users in {run.seconds:.2f}s')
+        if run.processed != 1:
+            print('Expected exactly one user to be recomputed')
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
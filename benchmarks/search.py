@@ -0,0 +1,110 @@
+"""Time full-text search over a large index.
+
+Fills a fresh database with ``--entries`` search entries spread over
+``--users`` users, using the vocabulary of the generated logs plus rarer
+words from notes. It then times ranked first-page queries for one user: a
+common word, a rare word, a prefix and two words. Exits non-zero when any
+p95 exceeds ``--max-ms``. The entries are inserted directly, so the
+benchmark measures the index, not the app's reindexing.
+
+    python -m benchmarks.search --entries 1000000
+    python -m benchmarks.search --database-url postgresql://localhost/health_bench
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+FOODS = ('oats banana coffee', 'chicken rice salad', 'salmon potatoes greens', 'yogurt nuts',
+         'sushi miso soup', 'pasta tomato basil', 'burrito beans avocado', 'ramen egg')
+WORKOUTS = ('Running', 'Cycling', 'Strength Training', 'Swimming', 'Yoga', 'Walking')
+NOTES = ('felt great', 'knee sore afterwards', 'slept badly', 'headache all day', 'personal best',
+         'travel day', 'ate out with friends', 'rainy and cold', 'hill sprints', 'new shoes')
+QUERIES = {
+    'common word': 'lunch',
+    'rare word': 'sprints',
+    'prefix': 'avoc',
+    'two words': 'sushi miso',
+}
+
+def generate(db, users, entries, seed=0, batch_size=20000):
+    from sqlalchemy import insert
+    from app.models.search import SearchEntry
+    from app.models.user import User
+
+    rng = random.Random(seed)
+    db.session.execute(insert(User), [
+        dict(username=f'search{n}', email=f'search{n}@example.com', password_hash='-') for n in range(users)
+    ])
+    user_ids = [user_id for (user_id,) in db.session.query(User.id).order_by(User.id)]
+
+    start = date.today() - timedelta(days=3650)
+    batch = []
+    for n in range(entries):
+        kind = rng.choice(('nutrition', 'nutrition', 'nutrition', 'workout', 'sleep'))
+        if kind == 'nutrition':
+            body = f'{rng.choice(("breakfast", "lunch", "dinner", "snack"))} {rng.choice(FOODS)}'
+        elif kind == 'workout':
+            body = rng.choice(WORKOUTS)
+        else:
+            body = ''
+        if rng.random() < 0.2 or not body:
+            body = f'{body} {rng.choice(NOTES)}'.strip()
+        batch.append(dict(user_id=user_ids[n % users], kind=kind, log_id=n + 1,
+                          day=start + timedelta(days=rng.randrange(3650)), body=body))
+        if len(batch) >= batch_size:
+            db.session.execute(insert(SearchEntry), batch)
+            batch = []
+    if batch:
+        db.session.execute(insert(SearchEntry), batch)
+    db.session.commit()
+    return user_ids
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--entries', type=int, default=1000000)
+    parser.add_argument('--users', type=int, default=250)
+    parser.add_argument('--runs', type=int, default=30)
+    parser.add_argument('--max-ms', type=float, default=50.0)
+    parser.add_argument('--database-url', help='Run against this database instead of a temporary SQLite file.')
+    args = parser.parse_args(argv)
+
+    os.environ['DATABASE_URL'] = args.database_url or 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'search.db')
+
+    from app import create_app, db
+    from app.utils.search import search
+
+    app = create_app()
+    with app.app_context():
+        began = time.perf_counter()
+        user_ids = generate(db, args.users, args.entries)
+        print(f'Indexed {args.entries} entries for {args.users} users in {time.perf_counter() - began:.1f}s '
+              f'(~{args.entries // args.users} per user)\n')
+
+        slow = []
+        for name, query in QUERIES.items():
+            timings, found = [], 0
+            for run in range(args.runs):
+                user_id = user_ids[run % len(user_ids)]
+                began = time.perf_counter()
+                page = search(user_id, query)
+                timings.append((time.perf_counter() - began) * 1000)
+                found += len(page.items)
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            print(f'{name:12} {query!r:14} p50 {statistics.median(timings):6.2f}ms  p95 {p95:6.2f}ms  '
+                  f'{found / args.runs:4.1f} results/page')
+            if p95 > args.max_ms:
+                slow.append(name)
+
+    if slow:
+        print(f'Slower than {args.max_ms:.0f}ms: {", ".join(slow)}')
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""Measure app startup and guard against heavy imports creeping back in.
+
+Runs ``create_app()`` in fresh interpreters under ``python -X importtime`` and
+reports the slowest imports. Exits non-zero when a lazily imported module is
+loaded at startup or the median startup time exceeds ``--max-ms``.
+
+    python -m benchmarks.startup --runs 5 --max-ms 1500
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Only needed for charts and analytics, never at worker boot
+LAZY_MODULES = ('matplotlib', 'pandas', 'numpy')
+
+STARTUP_SNIPPET = '''
+import sys, time
+start = time.perf_counter()
+from app import create_app
+create_app()
+print('elapsed', (time.perf_counter() - start) * 1000)
+print('loaded', ','.join(m for m in {lazy!r} if m in sys.modules))
+'''
+
+def run_once(env):
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', STARTUP_SNIPPET.format(lazy=LAZY_MODULES)],
+        capture_output=True, text=True, env=env, check=True
+    )
+    values = dict(line.split(' ', 1) for line in proc.stdout.splitlines() if ' ' in line)
+    loaded = [m for m in values.get('loaded', '').strip().split(',') if m]
+    return float(values['elapsed']), loaded, parse_importtime(proc.stderr)
+
+def parse_importtime(output):
+    # Lines look like: "import time:   self [us] | cumulative | imported package"
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, self_us, cumulative_us, name = line.replace('import time:', '|', 1).split('|')
+        # Nested imports are indented one extra space per level after the separator
+        imports.append((int(cumulative_us), int(self_us), name[1:].rstrip()))
+    return imports
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max-ms', type=float, default=None, help='fail if the median startup exceeds this')
+    parser.add_argument('--top', type=int, default=15, help='number of slowest top-level imports to show')
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ)
+    env['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'startup.db')
+
+    timings = []
+    for _ in range(args.runs):
+        elapsed, loaded, imports = run_once(env)
+        timings.append(elapsed)
+
+    median = statistics.median(timings)
+    print(f'create_app() startup: median {median:.1f} ms over {args.runs} runs (min {min(timings):.1f} ms)')
+    print('Slowest top-level imports (cumulative ms):')
+    top_level = [entry for entry in imports if not entry[2].startswith(' ')]
+    for cumulative_us, _, name in sorted(top_level, reverse=True)[:args.top]:
+        print(f'  {cumulative_us / 1000:8.1f}  {name}')
+
+    failed = False
+    if loaded:
+        print(f'FAIL: imported at startup but should be lazy: {", ".join(loaded)}')
+        failed = True
+    if args.max_ms is not None and median > args.max_ms:
+        print(f'FAIL: median startup {median:.1f} ms exceeds budget of {args.max_ms:.1f} ms')
+        failed = True
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
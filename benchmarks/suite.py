@@ -0,0 +1,203 @@
+"""Latency, throughput, query count and memory benchmarks for the main pages.
+
+The scenarios run as the ``benchmark`` tests in ``tests/test_benchmark_suite.py``:
+they populate a fresh database with ``benchmarks.datagen``, sign in as one of
+the generated users and exercise the dashboard shell and its panels, every
+history view, the goal list, the add/delete handlers and login through the
+Flask test client. For each scenario they record latency percentiles,
+operations per second, SQL statements per operation and peak traced memory.
+Given an earlier results file, a scenario fails when its median got slower
+than the allowed regression or it needs more queries than before.
+
+This module holds the scenarios and a small wrapper that runs those tests with
+larger defaults and always writes a results file:
+
+    python -m benchmarks.suite --users 20 --years 2 --output bench.json
+    python -m benchmarks.suite --compare bench.json --output bench-new.json
+    python -m benchmarks.suite --database-url postgresql://localhost/health_bench
+
+which is the same as
+
+    python -m pytest -m benchmark --bench-users 20 --bench-years 2 --bench-output bench.json
+"""
+import argparse
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+HISTORY_VIEWS = ('weight', 'nutrition', 'workout', 'sleep')
+
+# Endpoints the dashboard shell loads its panels from
+DASHBOARD_PANELS = ('/dashboard/panels/recent', '/dashboard/panels/bmi', '/dashboard/panels/goals') + tuple(
+    f'/dashboard/panels/charts/{kind}' for kind in HISTORY_VIEWS
+)
+
+READ_PAGES = {
+    'dashboard': ('/dashboard',),
+    'dashboard_panels': DASHBOARD_PANELS,
+    **{f'{kind}_history': (f'/health/{kind}/history',) for kind in HISTORY_VIEWS},
+    'goals_list': ('/health/goals/list',),
+}
+
+ADD_FORMS = {
+    'weight': lambda day: dict(weight=75.5, date=day),
+    'nutrition': lambda day: dict(meal_type='lunch', calories=650, protein=30, carbs=70, fat=20,
+                                  food_items='benchmark bowl', date=day),
+    'workout': lambda day: dict(workout_type='Running', duration=40, calories_burned=420, distance=7.5, date=day),
+    'sleep': lambda day: dict(hours=7.5, quality=8, date=day),
+}
+
+class StatementCounter:
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self._seen)
+
+    def _seen(self, *args):
+        self.count += 1
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def measure(name, operation, iterations, counter, warmup=3, memory_runs=3):
+    """Run ``operation(i)`` and return its stats; it must return an HTTP status code."""
+    for i in range(warmup):
+        operation(-1 - i)
+
+    timings = []
+    statements = counter.count
+    for i in range(iterations):
+        began = time.perf_counter()
+        status = operation(i)
+        timings.append(time.perf_counter() - began)
+        if status >= 400:
+            raise RuntimeError(f'{name} returned {status}')
+    statements = (counter.count - statements) / iterations
+
+    # tracemalloc slows everything down, so memory gets its own short pass
+    tracemalloc.start()
+    for i in range(memory_runs):
+        operation(iterations + i)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    total = sum(timings)
+    return dict(
+        iterations=iterations,
+        mean_ms=total / iterations * 1000,
+        p50_ms=percentile(timings, 0.5) * 1000,
+        p95_ms=percentile(timings, 0.95) * 1000,
+        max_ms=max(timings) * 1000,
+        ops_per_s=iterations / total,
+        queries_per_op=statements,
+        peak_kib=peak / 1024,
+    )
+
+def read(client, urls):
+    """Operation fetching ``urls``; returns the worst status code."""
+    return lambda i: max(client.get(url).status_code for url in urls)
+
+def write_scenarios(app, client, user_id, kind, iterations):
+    """Yield (name, operation, iterations) adding ``kind`` logs, then deleting them again."""
+    from app import db
+    from app.utils.importer import LOG_TYPES
+
+    today = date.today()
+    form = ADD_FORMS[kind]
+    model = LOG_TYPES[kind][0]
+    with app.app_context():
+        before = db.session.query(db.func.max(model.id)).scalar() or 0
+
+    def add(i):
+        return client.post(f'/health/{kind}', data=form((today - timedelta(days=abs(i) % 30)).isoformat())).status_code
+
+    yield f'add_{kind}', add, iterations
+
+    # Delete exactly the rows the add scenario created (warmup and memory passes included)
+    with app.app_context():
+        created = [row_id for (row_id,) in db.session.query(model.id).filter(
+            model.user_id == user_id, model.id > before).order_by(model.id)]
+    pending = iter(created)
+
+    def delete(i):
+        return client.post(f'/health/{kind}/{next(pending)}/delete').status_code
+
+    yield f'delete_{kind}', delete, min(iterations, len(created) - 6)
+
+def login(app, username, password):
+    """Operation signing in with a fresh client and out again."""
+    login_client = app.test_client()
+
+    def operation(i):
+        status = login_client.post('/auth/login', data=dict(username=username, password=password)).status_code
+        login_client.get('/auth/logout')
+        return status
+
+    return operation
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def new_report():
+    return dict(
+        meta=dict(commit=git_commit(), created=datetime.utcnow().isoformat(timespec='seconds'),
+                  python=platform.python_version(), platform=platform.platform()),
+        results={},
+    )
+
+def regression(old, stats, max_regression):
+    """Describe how ``stats`` got worse than ``old``, or return None."""
+    # More queries per request is a regression whatever the timing noise says
+    if stats['queries_per_op'] > old['queries_per_op']:
+        return f'{old["queries_per_op"]:.1f} -> {stats["queries_per_op"]:.1f} queries per request'
+    change = (stats['p50_ms'] - old['p50_ms']) / old['p50_ms'] * 100 if old['p50_ms'] else 0.0
+    if change > max_regression:
+        return f'p50 {old["p50_ms"]:.2f}ms -> {stats["p50_ms"]:.2f}ms ({change:+.1f}%, {max_regression:g}% allowed)'
+    return None
+
+def format_results(report):
+    """Lines summarising every scenario in ``report``."""
+    meta = report['meta']
+    if 'rows' in meta:
+        yield f'{meta["database"]}: {meta["rows"]} rows for {meta["users"]} users, {meta["iterations"]} iterations'
+    for name, stats in report['results'].items():
+        yield (f'{name:20} p50 {stats["p50_ms"]:8.2f}ms  p95 {stats["p95_ms"]:8.2f}ms  '
+               f'{stats["ops_per_s"]:8.1f}/s  {stats["queries_per_op"]:5.1f} queries  {stats["peak_kib"]:8.0f} KiB peak')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--years', type=float, default=1.0)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--database-url', help='Run against this database instead of a temporary SQLite file.')
+    parser.add_argument('--output', default='benchmark-results.json')
+    parser.add_argument('--compare', help='Earlier results file to compare against.')
+    parser.add_argument('--max-regression', type=float, default=25.0, help='Allowed p50 slowdown in percent.')
+    args = parser.parse_args(argv)
+
+    import pytest
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    options = [
+        os.path.join(root, 'tests', 'test_benchmark_suite.py'), '-q', '-m', 'benchmark',
+        f'--bench-users={args.users}', f'--bench-years={args.years}', f'--bench-iterations={args.iterations}',
+        f'--bench-output={args.output}', f'--bench-max-regression={args.max_regression}',
+    ]
+    if args.database_url:
+        options.append(f'--database-url={args.database_url}')
+    if args.compare:
+        options.append(f'--bench-compare={args.compare}')
+    return int(pytest.main(options))
+
+if __name__ == '__main__':
+    sys.exit(main())
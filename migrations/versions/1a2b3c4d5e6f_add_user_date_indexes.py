@@ -0,0 +1,36 @@
+"""add composite user/date indexes to log tables
+
+Revision ID: 1a2b3c4d5e6f
+Revises: 
+Create Date: 2026-10-18 19:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1a2b3c4d5e6f'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_weight_logs_user_id_date', 'weight_logs', ['user_id', 'date']),
+    ('ix_nutrition_logs_user_id_date', 'nutrition_logs', ['user_id', 'date']),
+    ('ix_workout_logs_user_id_date', 'workout_logs', ['user_id', 'date']),
+    ('ix_sleep_logs_user_id_date', 'sleep_logs', ['user_id', 'date']),
+    ('ix_goals_user_id_achieved_target_date', 'goals', ['user_id', 'achieved', 'target_date']),
+]
+
+
+def upgrade():
+    # create_app() runs db.create_all(), so fresh databases may already have them
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
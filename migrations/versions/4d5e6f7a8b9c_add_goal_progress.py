@@ -0,0 +1,44 @@
+"""add cached progress columns to goals
+
+Revision ID: 4d5e6f7a8b9c
+Revises: 3c4d5e6f7a8b
+Create Date: 2026-10-18 22:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4d5e6f7a8b9c'
+down_revision = '3c4d5e6f7a8b'
+branch_labels = None
+depends_on = None
+
+
+COLUMNS = [
+    sa.Column('start_value', sa.Float(), nullable=True),
+    sa.Column('current_value', sa.Float(), nullable=True),
+    sa.Column('progress', sa.Float(), nullable=True),
+    sa.Column('evaluated_at', sa.DateTime(), nullable=True),
+]
+
+
+def upgrade():
+    # create_app() runs db.create_all(), so fresh databases may already have them
+    existing = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('goals')}
+    missing = [column for column in COLUMNS if column.name not in existing]
+    if not missing:
+        return
+    # Fill in afterwards with `flask rebuild-summaries`, which also evaluates goals
+    with op.batch_alter_table('goals', schema=None) as batch_op:
+        for column in missing:
+            batch_op.add_column(column)
+
+
+def downgrade():
+    with op.batch_alter_table('goals', schema=None) as batch_op:
+        batch_op.drop_column('evaluated_at')
+        batch_op.drop_column('progress')
+        batch_op.drop_column('current_value')
+        batch_op.drop_column('start_value')
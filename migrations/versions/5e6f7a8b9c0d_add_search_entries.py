@@ -0,0 +1,63 @@
+"""add search_entries with a full-text index
+
+Revision ID: 5e6f7a8b9c0d
+Revises: 4d5e6f7a8b9c
+Create Date: 2026-10-18 23:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e6f7a8b9c0d'
+down_revision = '4d5e6f7a8b9c'
+branch_labels = None
+depends_on = None
+
+
+SQLITE_FTS = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_entries_fts USING fts5("
+    "user_id, kind, body, content='search_entries', content_rowid='id', "
+    "tokenize='porter unicode61', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS search_entries_ai AFTER INSERT ON search_entries BEGIN "
+    "INSERT INTO search_entries_fts(rowid, user_id, kind, body) VALUES (new.id, new.user_id, new.kind, new.body); END",
+    "CREATE TRIGGER IF NOT EXISTS search_entries_ad AFTER DELETE ON search_entries BEGIN "
+    "INSERT INTO search_entries_fts(search_entries_fts, rowid, user_id, kind, body) "
+    "VALUES ('delete', old.id, old.user_id, old.kind, old.body); END",
+]
+
+POSTGRESQL_FTS = [
+    "CREATE EXTENSION IF NOT EXISTS btree_gin",
+    "ALTER TABLE search_entries ADD COLUMN IF NOT EXISTS document tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('english', body)) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_search_entries_user_id_document ON search_entries USING gin (user_id, document)",
+]
+
+
+def upgrade():
+    # Populate afterwards with `flask rebuild-search-index`
+    op.create_table('search_entries',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('log_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('body', sa.Text(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+    op.create_index('ix_search_entries_user_id_kind_day', 'search_entries', ['user_id', 'kind', 'day'], unique=False,
+                    if_not_exists=True)
+
+    dialect = op.get_bind().dialect.name
+    for statement in {'sqlite': SQLITE_FTS, 'postgresql': POSTGRESQL_FTS}.get(dialect, []):
+        op.execute(statement)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute('DROP TABLE IF EXISTS search_entries_fts')
+    op.drop_index('ix_search_entries_user_id_kind_day', table_name='search_entries')
+    op.drop_table('search_entries')
@@ -0,0 +1,49 @@
+"""add user_stats and population_stats
+
+Revision ID: 6f7a8b9c0d1e
+Revises: 5e6f7a8b9c0d
+Create Date: 2026-10-19 00:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6f7a8b9c0d1e'
+down_revision = '5e6f7a8b9c0d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Filled by `flask population-stats`
+    op.create_table('user_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('latest_weight', sa.Float(), nullable=True),
+    sa.Column('bmi', sa.Float(), nullable=True),
+    sa.Column('avg_sleep_hours', sa.Float(), nullable=True),
+    sa.Column('weekly_workout_minutes', sa.Float(), nullable=True),
+    sa.Column('summary_days', sa.Integer(), nullable=False),
+    sa.Column('summary_updated_at', sa.DateTime(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id'),
+    if_not_exists=True
+    )
+    op.create_table('population_stats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('metric', sa.String(length=50), nullable=False),
+    sa.Column('bucket', sa.String(length=50), nullable=False),
+    sa.Column('value', sa.Float(), nullable=True),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('metric', 'bucket', name='uq_population_stats_metric_bucket'),
+    if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_table('population_stats')
+    op.drop_table('user_stats')
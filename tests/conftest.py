@@ -0,0 +1,68 @@
+import json
+import pytest
+
+BENCHMARK_REPORT = pytest.StashKey()
+
+def pytest_addoption(parser):
+    group = parser.getgroup('benchmark', 'performance benchmark suite (tests marked benchmark)')
+    group.addoption('--database-url', help='Run the benchmark suite against this database instead of a temporary SQLite file.')
+    group.addoption('--bench-users', type=int, default=3, help='Synthetic users to generate.')
+    group.addoption('--bench-years', type=float, default=0.5, help='Years of logs per user.')
+    group.addoption('--bench-iterations', type=int, default=10, help='Timed runs per scenario.')
+    group.addoption('--bench-output', help='Write the results to this JSON file.')
+    group.addoption('--bench-compare', help='Earlier results file; slower or chattier scenarios fail.')
+    group.addoption('--bench-max-regression', type=float, default=25.0, help='Allowed p50 slowdown in percent.')
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', 'sqlite:///' + str(tmp_path / 'test.db'))
+    monkeypatch.setenv('ARCHIVE_DIR', str(tmp_path / 'archive'))
+    # Cheap hashes keep sign-ins from dominating the tests
+    monkeypatch.setenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:1000')
+
+    from app import create_app
+    app = create_app()
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    yield app
+
+@pytest.fixture
+def user(app):
+    from app import db
+    from app.models.user import User
+
+    with app.app_context():
+        user = User(username='alice', email='alice@example.com', height=170)
+        user.set_password('password123')
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+@pytest.fixture
+def client(app, user):
+    """A test client signed in as ``user``."""
+    client = app.test_client()
+    assert client.post('/auth/login', data=dict(username='alice', password='password123')).status_code == 302
+    return client
+
+@pytest.fixture(scope='session')
+def benchmark_report(request):
+    """Results of the benchmark scenarios, written to --bench-output when the session ends."""
+    from benchmarks.suite import new_report
+
+    report = request.config.stash[BENCHMARK_REPORT] = new_report()
+    yield report
+    output = request.config.getoption('bench_output')
+    if output and report['results']:
+        with open(output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+def pytest_terminal_summary(terminalreporter, config):
+    report = config.stash.get(BENCHMARK_REPORT, None)
+    if report and report['results']:
+        from benchmarks.suite import format_results
+
+        terminalreporter.write_sep('-', 'benchmark results')
+        for line in format_results(report):
+            terminalreporter.write_line(line)
+        if config.getoption('bench_output'):
+            terminalreporter.write_line(f'Wrote {config.getoption("bench_output")}')
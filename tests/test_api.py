@@ -0,0 +1,49 @@
+"""Validation of batch inserts through ``POST /api/v1/<kind>``."""
+import json
+
+import pytest
+
+from app import db
+from app.models.health import WeightLog
+from app.utils.importer import LOG_TYPES
+
+def post(client, kind, body):
+    return client.post(f'/api/v1/{kind}', data=body, content_type='application/json')
+
+def test_batch_insert(client):
+    response = post(client, 'weight', '[{"weight": 70.5, "date": "2024-01-01"}, {"weight": 70.1, "date": "2024-01-02"}]')
+    assert response.status_code == 201
+    assert len(response.get_json()['ids']) == 2
+
+@pytest.mark.parametrize('value', ['NaN', 'Infinity', '-Infinity'])
+def test_non_finite_value_is_rejected_per_item(app, client, value):
+    # Python's JSON parser accepts these literals, so they reach the field rules
+    response = post(client, 'weight', f'[{{"weight": 70.5, "date": "2024-01-01"}}, {{"weight": {value}, "date": "2024-01-02"}}]')
+
+    assert response.status_code == 422
+    errors = response.get_json()['errors']
+    assert [error['index'] for error in errors] == [1]
+    assert 'finite' in errors[0]['message']
+    with app.app_context():
+        assert db.session.query(WeightLog).count() == 0
+
+@pytest.mark.parametrize('kind, field, entry', [
+    ('nutrition', 'calories', {'meal_type': 'lunch'}),
+    ('workout', 'duration', {'workout_type': 'Run'}),
+    ('sleep', 'quality', {'hours': 7.5}),
+])
+@pytest.mark.parametrize('value', ['NaN', 'Infinity', '1e400'])
+def test_non_finite_integer_is_rejected_per_item(app, client, kind, field, entry, value):
+    valid = json.dumps(dict(entry, date='2024-01-01', **{field: 5}))
+    invalid = json.dumps(dict(entry, date='2024-01-02'))[:-1] + f', "{field}": {value}}}'
+    fractional = json.dumps(dict(entry, date='2024-01-03', **{field: 5.5}))
+    response = post(client, kind, f'[{valid}, {invalid}, {fractional}]')
+
+    assert response.status_code == 422
+    errors = response.get_json()['errors']
+    assert errors == [
+        {'index': 1, 'message': f'{field} must be a finite number'},
+        {'index': 2, 'message': f'{field} must be a whole number'},
+    ]
+    with app.app_context():
+        assert db.session.query(LOG_TYPES[kind][0]).count() == 0
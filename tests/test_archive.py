@@ -0,0 +1,83 @@
+"""Archive runs only become visible once their delete of the live rows committed."""
+import os
+from datetime import date, datetime, time, timedelta
+from unittest import mock
+
+import pytest
+
+from app import db
+from app.models.health import WeightLog
+from app.utils import archive
+
+@pytest.fixture
+def logs(app, client, user):
+    today = date.today()
+    for day in range(10):
+        client.post('/health/weight', data=dict(weight=70 + day, date=(today - timedelta(days=400 + day)).isoformat()))
+    client.post('/health/weight', data=dict(weight=80, date=today.isoformat()))
+    with app.app_context():
+        root = archive._kind_dir(user, 'weight')
+    return datetime.combine(today - timedelta(days=300), time.min), root
+
+def visible(client):
+    """(id, weight) of every weight log the API returns, live or archived."""
+    found, after = [], None
+    while True:
+        page = client.get('/api/v1/weight?per_page=50' + (f'&after={after}' if after else '')).get_json()
+        found += [(item['id'], item['weight']) for item in page['items']]
+        after = page['next']
+        if not after:
+            return sorted(found)
+
+def crash_before_commit(app, user, before):
+    # The process dies after renaming its files to pending, so nothing cleans them up
+    with app.app_context():
+        with mock.patch.object(db.session, 'commit', side_effect=[None, SystemExit('killed')]), \
+                mock.patch.object(archive.shutil, 'rmtree'):
+            with pytest.raises(SystemExit):
+                archive.archive_user_logs(user, 'weight', before)
+        db.session.rollback()
+
+def test_dead_run_does_not_resurrect_deleted_logs(app, client, user, logs):
+    before, root = logs
+    crash_before_commit(app, user, before)
+    assert any(name.endswith(archive.PENDING) for name in os.listdir(root))
+
+    # The rows are still live, so the user can delete some of them
+    old = [row_id for row_id, weight in visible(client) if weight < 80]
+    for row_id in old[:3]:
+        assert client.post(f'/health/weight/{row_id}/delete').status_code == 302
+
+    remaining = visible(client)
+    assert [row_id for row_id, _ in remaining if row_id in old[:3]] == []
+    assert len(remaining) == 8
+    assert not any(name.endswith(archive.PENDING) for name in os.listdir(root))
+
+    with app.app_context():
+        assert archive.archive_user_logs(user, 'weight', before) == 7
+    assert visible(client) == remaining
+
+def test_pending_files_of_a_running_run_are_kept(app, client, user, logs):
+    before, root = logs
+    crash_before_commit(app, user, before)
+
+    # While a run holds the lock, its uncommitted files may still be about to commit
+    with archive._run_lock(root):
+        expected = visible(client)
+        assert len(expected) == 11
+        assert any(name.endswith(archive.PENDING) for name in os.listdir(root))
+    assert visible(client) == expected
+    assert not any(name.endswith(archive.PENDING) for name in os.listdir(root))
+
+def test_committed_run_is_picked_up_by_readers(app, client, user, logs):
+    before, _ = logs
+    expected = visible(client)
+
+    # The process dies after committing, before renaming its files into place
+    with app.app_context():
+        with mock.patch.object(archive, '_promote', side_effect=SystemExit('killed')):
+            with pytest.raises(SystemExit):
+                archive.archive_user_logs(user, 'weight', before)
+        assert WeightLog.query.filter(WeightLog.date < before).count() == 0
+
+    assert visible(client) == expected
@@ -0,0 +1,78 @@
+"""Benchmark scenarios from ``benchmarks.suite``.
+
+These run against their own generated database so the numbers are comparable
+between runs; pass ``--bench-compare`` with an earlier ``--bench-output`` file
+to fail scenarios that regressed.
+"""
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from benchmarks.suite import ADD_FORMS, READ_PAGES, StatementCounter, login, measure, read, regression, write_scenarios
+
+pytestmark = pytest.mark.benchmark
+
+@pytest.fixture(scope='module')
+def bench(request, tmp_path_factory, benchmark_report):
+    from app import create_app, db
+    from app.models.user import User
+    from benchmarks.datagen import PASSWORD, populate
+
+    option = request.config.getoption
+    url = option('database_url') or 'sqlite:///' + str(tmp_path_factory.mktemp('suite') / 'suite.db')
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setenv('DATABASE_URL', url)
+        app = create_app()
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    # Unique usernames let the suite share a long-lived PostgreSQL database
+    prefix = f'suite{int(time.time())}_'
+    with app.app_context():
+        user_ids, rows = populate(option('bench_users'), option('bench_years'), prefix=prefix)
+        username = db.session.get(User, user_ids[0]).username
+        benchmark_report['meta'].update(
+            database=db.engine.dialect.name, users=option('bench_users'), years=option('bench_years'),
+            rows=rows, iterations=option('bench_iterations'),
+        )
+        counter = StatementCounter(db.engine)
+
+    client = app.test_client()
+    assert client.post('/auth/login', data=dict(username=username, password=PASSWORD)).status_code == 302
+
+    previous = {}
+    if option('bench_compare'):
+        with open(option('bench_compare')) as file:
+            previous = json.load(file)['results']
+
+    return SimpleNamespace(
+        app=app, client=client, user_id=user_ids[0], username=username, password=PASSWORD, counter=counter,
+        iterations=option('bench_iterations'), previous=previous, max_regression=option('bench_max_regression'),
+        report=benchmark_report,
+    )
+
+def run(bench, name, operation, iterations):
+    """Measure one scenario, record it and return how it regressed, if it did."""
+    stats = bench.report['results'][name] = measure(name, operation, iterations, bench.counter)
+    old = bench.previous.get(name)
+    problem = old and regression(old, stats, bench.max_regression)
+    return f'{name}: {problem}' if problem else None
+
+@pytest.mark.parametrize('name', READ_PAGES)
+def test_read(bench, name):
+    problem = run(bench, name, read(bench.client, READ_PAGES[name]), bench.iterations)
+    assert problem is None, problem
+
+@pytest.mark.parametrize('kind', ADD_FORMS)
+def test_writes(bench, kind):
+    problems = [
+        run(bench, name, operation, iterations)
+        for name, operation, iterations in write_scenarios(bench.app, bench.client, bench.user_id, kind, bench.iterations)
+    ]
+    problems = [problem for problem in problems if problem]
+    assert not problems, '; '.join(problems)
+
+def test_login(bench):
+    problem = run(bench, 'login', login(bench.app, bench.username, bench.password), max(5, bench.iterations // 5))
+    assert problem is None, problem
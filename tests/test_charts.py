@@ -0,0 +1,14 @@
+"""Chart pool and cache settings are read from the environment."""
+from app import create_app
+
+def test_render_settings_come_from_environment(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', 'sqlite:///' + str(tmp_path / 'test.db'))
+    monkeypatch.setenv('CHART_RENDER_QUEUE', '3')
+    monkeypatch.setenv('CHART_RENDER_TIMEOUT', '1.5')
+    monkeypatch.setenv('CHART_CACHE_SIZE', '16')
+
+    app = create_app()
+
+    assert (app.config['CHART_RENDER_QUEUE'], app.config['CHART_RENDER_TIMEOUT'], app.config['CHART_CACHE_SIZE']) == (3, 1.5, 16)
+    assert app.extensions['chart_renderer'].timeout == 1.5
+    assert app.extensions['chart_cache'].maxsize == 16
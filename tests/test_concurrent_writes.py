@@ -0,0 +1,15 @@
+"""Writers in separate processes must never see ``database is locked``."""
+from benchmarks.concurrent_writes import run
+
+def test_concurrent_writes_never_lock(tmp_path, monkeypatch):
+    uri = 'sqlite:///' + str(tmp_path / 'concurrency.db')
+    # setup() builds an app in this process too; keep its settings out of later tests
+    monkeypatch.setenv('DATABASE_URL', uri)
+
+    report = run(uri, writers=3, readers=1, writes=40)
+
+    latencies, errors = report['writer']
+    assert report['mode'] == 'wal'
+    assert errors == 0
+    assert len(latencies) == 3 * 40
+    assert report['reader'][1] == 0
@@ -0,0 +1,68 @@
+"""How many SQL statements the dashboard shell and each of its panels issue.
+
+The first request may also load the user; once the identity cache is warm each
+panel must stay within ``MAX_QUERIES`` and revalidating one with its ETag
+within a single statement.
+"""
+import html
+import re
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app import db
+from app.models.health import WeightLog, NutritionLog, WorkoutLog, SleepLog, Goal
+from app.utils.summary import rebuild_user_summaries
+
+MAX_QUERIES = 2
+
+@pytest.fixture
+def statements(app, user):
+    """Statements executed since the list was last cleared, for a user with a month of logs."""
+    now = datetime.utcnow()
+    with app.app_context():
+        for day in range(30):
+            when = now - timedelta(days=day)
+            db.session.add(WeightLog(user_id=user, weight=80 - day * 0.1, date=when))
+            db.session.add(NutritionLog(user_id=user, meal_type='lunch', calories=600, protein=30,
+                                        carbs=60, fat=20, date=when))
+            db.session.add(WorkoutLog(user_id=user, workout_type='Run', duration=30, date=when))
+            db.session.add(SleepLog(user_id=user, hours=7.5, quality=8, date=when))
+        db.session.add(Goal(user_id=user, goal_type='weight', target_value=75,
+                            target_date=now + timedelta(days=60), description='Reach 75kg'))
+        db.session.flush()
+        rebuild_user_summaries(user)
+        db.session.commit()
+        engine = db.engine
+
+    seen = []
+    event.listen(engine, 'before_cursor_execute', lambda conn, cursor, statement, *rest: seen.append(statement))
+    return seen
+
+def count(client, statements, url, status=200, **kwargs):
+    statements.clear()
+    response = client.get(url, **kwargs)
+    assert response.status_code == status, url
+    return response, list(statements)
+
+def panels(client):
+    # The shell names its panels; fetch them the way the page's script does
+    shell = client.get('/dashboard').data.decode()
+    return [html.unescape(url) for url in re.findall(r'data-panel="([^"]+)"', shell)]
+
+def test_shell_needs_no_queries(client, statements):
+    count(client, statements, '/dashboard')
+    assert count(client, statements, '/dashboard')[1] == []
+
+def test_panels_stay_within_budget(client, statements):
+    urls = panels(client)
+    assert len(urls) == 7
+    for url in urls:
+        count(client, statements, url)
+        response, warm = count(client, statements, url)
+        assert len(warm) <= MAX_QUERIES, (url, warm)
+
+        etag = response.headers.get('ETag')
+        assert etag, url
+        assert len(count(client, statements, url, status=304, headers={'If-None-Match': etag})[1]) <= 1, url
@@ -0,0 +1,42 @@
+"""Rolling-window goals are only achieved once a whole window has passed."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models.health import Goal, WorkoutLog
+from app.utils.goals import WINDOW_DAYS, evaluate_goals
+from app.utils.hooks import logs_changed
+
+def log_workouts(user_id, count):
+    # Early in the day, so every workout falls inside even a window that opened today
+    now = datetime.utcnow().replace(hour=0, minute=0)
+    for n in range(count):
+        db.session.add(WorkoutLog(user_id=user_id, workout_type='Run', duration=30, date=now + timedelta(minutes=n)))
+    logs_changed(user_id, 'workout', [now.date()])
+    db.session.commit()
+
+@pytest.mark.parametrize('started_days_ago, achieved', [(0, False), (WINDOW_DAYS - 2, False), (WINDOW_DAYS + 3, True)])
+def test_workout_goal_waits_for_a_whole_window(app, user, started_days_ago, achieved):
+    with app.app_context():
+        goal = Goal(user_id=user, goal_type='workout', target_value=3,
+                    start_date=datetime.utcnow() - timedelta(days=started_days_ago))
+        db.session.add(goal)
+        db.session.commit()
+
+        log_workouts(user, 4)
+
+        goal = db.session.get(Goal, goal.id)
+        assert goal.current_value == 4
+        assert goal.progress == 100.0
+        assert goal.achieved is achieved
+
+def test_open_window_goal_is_achieved_once_the_window_closes(app, user):
+    with app.app_context():
+        goal = Goal(user_id=user, goal_type='workout', target_value=2, start_date=datetime.utcnow())
+        db.session.add(goal)
+        log_workouts(user, 2)
+        assert not db.session.get(Goal, goal.id).achieved
+
+        db.session.get(Goal, goal.id).start_date = datetime.utcnow() - timedelta(days=WINDOW_DAYS)
+        assert [reached.id for reached in evaluate_goals(user, ['workout'])] == [goal.id]
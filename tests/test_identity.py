@@ -0,0 +1,22 @@
+"""The identity cache serves the logged-in user and forgets them on profile updates."""
+from app.models.user import User
+from app.utils.identity import load_identity
+
+def test_profile_update_is_visible_at_once(app, client, user):
+    with app.app_context():
+        assert load_identity(user).height == 170
+
+    assert client.post('/auth/profile', data=dict(first_name='Alicia', height=180)).status_code == 302
+
+    with app.app_context():
+        cached = load_identity(user)
+        assert (cached.first_name, cached.height) == ('Alicia', 180)
+
+def test_bmi_uses_latest_weight(app, client):
+    assert client.post('/health/weight', data=dict(weight=72.25, date='2024-01-01')).status_code == 302
+    assert client.post('/health/weight', data=dict(weight=80.92, date='2024-02-01')).status_code == 302
+
+    with app.app_context():
+        user = User.query.filter_by(username='alice').one()
+        assert user.get_latest_weight() == 80.92
+        assert user.get_bmi() == 28.0
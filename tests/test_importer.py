@@ -0,0 +1,54 @@
+"""Field validation and end-to-end imports through ``/health/import``."""
+import io
+
+import pytest
+
+from app import db
+from app.forms.health import NutritionLogForm, SleepLogForm, WorkoutLogForm
+from app.models.health import NutritionLog
+from app.utils.importer import clean_record, field_rules
+
+def clean(form_class, **record):
+    return clean_record(field_rules(form_class), dict(date='2024-01-01', **record))
+
+@pytest.mark.parametrize('raw, expected', [(450, 450), ('450', 450), (' 450 ', 450), (450.0, 450), ('450.0', 450)])
+def test_integer_field_accepts_whole_numbers(raw, expected):
+    row, problems = clean(NutritionLogForm, meal_type='lunch', calories=raw)
+    assert problems == []
+    assert row['calories'] == expected and type(row['calories']) is int
+
+@pytest.mark.parametrize('form_class, field, record', [
+    (NutritionLogForm, 'calories', dict(meal_type='lunch')),
+    (WorkoutLogForm, 'duration', dict(workout_type='Run')),
+    (SleepLogForm, 'quality', dict(hours=7.5)),
+])
+@pytest.mark.parametrize('raw, message', [
+    (float('nan'), 'must be a finite number'),
+    (float('inf'), 'must be a finite number'),
+    ('Infinity', 'must be a finite number'),
+    ('1e400', 'must be a finite number'),
+    (7.9, 'must be a whole number'),
+    ('7.9', 'must be a whole number'),
+    (True, 'must be a number'),
+    ('seven', 'is invalid'),
+])
+def test_integer_field_rejects(form_class, field, record, raw, message):
+    _, problems = clean(form_class, **record, **{field: raw})
+    assert problems == [f'{field} {message}']
+
+def test_float_field_rejects_booleans():
+    _, problems = clean(SleepLogForm, hours=True)
+    assert problems == ['hours must be a number']
+
+def test_import_reports_bad_integers_per_row(app, client, user):
+    body = b'[{"date": "2024-01-01", "meal_type": "lunch", "calories": 600},' \
+           b' {"date": "2024-01-02", "meal_type": "lunch", "calories": Infinity},' \
+           b' {"date": "2024-01-03", "meal_type": "lunch", "calories": 72.9}]'
+    response = client.post('/health/import', data=dict(log_type='nutrition', file=(io.BytesIO(body), 'meals.json')),
+                           content_type='multipart/form-data')
+
+    assert response.status_code == 200
+    assert b'calories must be a finite number' in response.data
+    assert b'calories must be a whole number' in response.data
+    with app.app_context():
+        assert [row.calories for row in db.session.query(NutritionLog)] == [600]
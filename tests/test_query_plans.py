@@ -0,0 +1,41 @@
+"""The hot per-user queries must be served by the composite indexes.
+
+Builds the same queries the routes issue and runs them through SQLite's
+``EXPLAIN QUERY PLAN``; a table scan or a temporary B-tree sort instead of the
+expected index fails the test.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func
+
+from app import db
+from app.models.health import WeightLog, NutritionLog, WorkoutLog, SleepLog, Goal
+
+def explain(session, query):
+    compiled = query.statement.compile(dialect=session.get_bind().dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    rows = session.connection().exec_driver_sql('EXPLAIN QUERY PLAN ' + str(compiled), params).all()
+    return [row[-1] for row in rows]
+
+def hot_queries():
+    """Yield (name, index, build) where ``build(user_id)`` returns the query."""
+    for model in (WeightLog, NutritionLog, WorkoutLog, SleepLog):
+        index = f'ix_{model.__tablename__}_user_id_date'
+        yield (f'{model.__name__} latest', index,
+               lambda user_id, model=model: model.query.filter_by(user_id=user_id).order_by(model.date.desc()).limit(1))
+        yield (f'{model.__name__} history', index,
+               lambda user_id, model=model: model.query.filter_by(user_id=user_id).order_by(model.date.desc()))
+        yield (f'{model.__name__} window', index,
+               lambda user_id, model=model: db.session.query(func.count(model.id), func.max(model.id)).filter(
+                   model.user_id == user_id, model.date >= datetime.utcnow() - timedelta(days=30)))
+
+    yield ('Goal active', 'ix_goals_user_id_achieved_target_date',
+           lambda user_id: Goal.query.filter_by(user_id=user_id, achieved=False).order_by(Goal.target_date))
+
+@pytest.mark.parametrize('name, index, build', [pytest.param(*query, id=query[0]) for query in hot_queries()])
+def test_query_uses_index(app, name, index, build):
+    with app.app_context():
+        plan = explain(db.session, build(1))
+    assert any(index in step for step in plan), f'{name} does not use {index}: {" / ".join(plan)}'
+    assert not any('TEMP B-TREE' in step for step in plan), f'{name} sorts in a temporary B-tree: {" / ".join(plan)}'
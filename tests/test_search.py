@@ -0,0 +1,47 @@
+"""Search refuses unindexed backends unless the substring fallback is switched on."""
+import logging
+from unittest import mock
+
+import pytest
+from flask import Flask
+
+from app import db
+from app.utils import search
+
+@pytest.fixture
+def meals(client):
+    for day, food in enumerate(('sushi rice', 'sushi platter', 'pasta')):
+        client.post('/health/nutrition', data=dict(meal_type='dinner', calories=500, food_items=food,
+                                                   date=f'2024-01-0{day + 1}'))
+
+def on_other_database():
+    bind = mock.Mock()
+    bind.dialect.name = 'mysql'
+    return mock.patch.object(db.session, 'get_bind', return_value=bind)
+
+def test_unindexed_database_is_refused_at_startup():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'mysql://localhost/health'
+    with pytest.raises(RuntimeError, match='SEARCH_SUBSTRING_FALLBACK'):
+        search.init_app(app)
+
+    app.config['SEARCH_SUBSTRING_FALLBACK'] = True
+    search.init_app(app)
+
+def test_indexed_search(app, user, meals):
+    with app.app_context():
+        page = search.search(user, 'sush')
+    assert sorted(search.plain(item.snippet) for item in page.items) == ['dinner sushi platter', 'dinner sushi rice']
+
+def test_substring_fallback_is_opt_in(app, user, meals):
+    with app.app_context(), on_other_database():
+        with pytest.raises(RuntimeError):
+            search.search(user, 'sushi')
+
+def test_substring_fallback_warns(app, user, meals, caplog):
+    app.config['SEARCH_SUBSTRING_FALLBACK'] = True
+    with app.app_context(), on_other_database(), caplog.at_level(logging.WARNING):
+        page = search.search(user, 'Sushi', per_page=1)
+    assert len(page.items) == 1 and page.has_next
+    assert '\x02sushi\x03' in page.items[0].snippet.lower()
+    assert 'without an index' in caplog.text